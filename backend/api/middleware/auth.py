@@ -2,14 +2,180 @@ from fastapi import Request, HTTPException, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from config.settings import get_settings
-from typing import Optional, Dict
+from typing import Any, Callable, Optional, Dict, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
 import logging
+import re
+import time
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 settings = get_settings()
 
+
+class TokenCache:
+    """
+    Bounded LRU of verified tokens.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are not
+    kept in memory, and hold the decoded payload until the token's `exp` (or
+    max_ttl, whichever comes first). A hit skips signature verification
+    entirely; an expired entry is dropped and the token goes back through
+    jwt.decode, which rejects it.
+    """
+
+    def __init__(self, max_size: int = 1024, max_ttl: float = 300.0, clock: Callable[[], float] = time.time):
+        """
+        Initialize token cache
+
+        Args:
+            max_size: Maximum number of cached tokens
+            max_ttl: Upper bound in seconds on how long a payload is reused
+            clock: Time source in seconds since the epoch (compared with `exp`)
+        """
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a token, or None if absent or expired"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        """Cache a verified payload until its expiry"""
+        expires_at = self.clock() + self.max_ttl
+        if "exp" in payload:
+            try:
+                expires_at = min(expires_at, float(payload["exp"]))
+            except (TypeError, ValueError):
+                return
+        key = self._key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its payload, reusing earlier verifications
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.ALGORITHM]
+        )
+        token_cache.put(token, payload)
+    return payload
+
+# Paths served without authentication, matched as prefixes
+PUBLIC_PATH_PREFIXES = (
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/market",    # Public market data
+    "/api/v1/",      # WebSocket endpoints (authenticated by ws_auth)
+)
+
+
+class PathPolicy:
+    """
+    Public-path policy compiled once into a single anchored regex.
+
+    One `re.match` replaces a `startswith` scan over every prefix.
+    """
+
+    def __init__(self, prefixes: Tuple[str, ...]):
+        self.prefixes = tuple(prefixes)
+        alternatives = "|".join(re.escape(p) for p in sorted(self.prefixes, key=len, reverse=True))
+        self._pattern = re.compile(f"(?:{alternatives})") if self.prefixes else None
+
+    def is_public(self, path: str) -> bool:
+        return bool(self._pattern and self._pattern.match(path))
+
+
+public_paths = PathPolicy(PUBLIC_PATH_PREFIXES)
+
+
+def _bearer_token(auth_header: Optional[str]) -> str:
+    """Extract the token from an Authorization header, raising 401 if malformed"""
+    if not auth_header:
+        raise HTTPException(
+            status_code=401,
+            detail="No authorization header found"
+        )
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid authentication scheme"
+        )
+    return token.strip()
+
+
+async def require_user(request: Request) -> dict:
+    """
+    Route dependency enforcing JWT authentication.
+
+    Attach it to protected routers (`dependencies=[Depends(require_user)]`) so
+    that only those routes pay for auth; public routes carry no check at all.
+    The payload is also stored on `request.state.user`.
+    """
+    token = _bearer_token(request.headers.get("authorization"))
+    try:
+        payload = decode_token(token)
+    except JWTError as e:
+        logger.error(f"JWT validation error: {str(e)}")
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid token"
+        )
+    request.state.user = payload
+    return payload
+
+
 async def create_access_token(data: Dict) -> str:
     """Create a new JWT access token"""
     to_encode = data.copy()
@@ -23,54 +189,28 @@ async def auth_middleware(request: Request, call_next):
     """
     Middleware for JWT authentication.
     Some endpoints will be public, others will require authentication.
+
+    The app now authenticates through the `require_user` route dependency;
+    this global variant remains for deployments that mount it directly.
     """
-    # List of public endpoints that don't require authentication
-    public_paths = [
-        "/docs",
-        "/redoc",
-        "/openapi.json",
-        "/api/market",    # Public market data
-        "/api/v1/",      # WebSocket endpoints
-        "/api/v1/ws",    # Main WebSocket endpoint
-        "/api/v1/market", # Market WebSocket endpoints
-        "/api/v1/position" # Position WebSocket endpoints
-    ]
-
-    # Check if the path is public
-    if any(request.url.path.startswith(path) for path in public_paths):
+    if public_paths.is_public(request.url.path):
         return await call_next(request)
 
     # Skip WebSocket upgrade requests
     if request.headers.get("upgrade", "").lower() == "websocket":
         # For WebSocket requests, we'll handle auth in the WebSocket endpoint
-        logger.info("Skipping middleware auth for WebSocket upgrade request")
+        logger.debug("Skipping middleware auth for WebSocket upgrade request")
         return await call_next(request)
 
     try:
         # Get the JWT token from the request header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            raise HTTPException(
-                status_code=401,
-                detail="No authorization header found"
-            )
-
-        scheme, token = auth_header.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid authentication scheme"
-            )
+        token = _bearer_token(request.headers.get("Authorization"))
 
         # Verify the JWT token
         try:
-            payload = jwt.decode(
-                token,
-                settings.JWT_SECRET,
-                algorithms=[settings.ALGORITHM]
-            )
+            payload = decode_token(token)
             request.state.user = payload
-            logger.info(f"Successfully authenticated user: {payload.get('sub')}")
+            logger.debug(f"Successfully authenticated user: {payload.get('sub')}")
         except JWTError as e:
             logger.error(f"JWT validation error: {str(e)}")
             raise HTTPException(
@@ -92,17 +232,11 @@ async def auth_middleware(request: Request, call_next):
 async def validate_token(token: str) -> dict:
     """Validate JWT token and return payload"""
     try:
-        logger.info(f"Validating token (first 20 chars): {token[:20]}...")
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.ALGORITHM]
-        )
-        logger.info(f"Token validated successfully for user: {payload.get('sub')}")
+        payload = decode_token(token)
+        logger.debug(f"Token validated successfully for user: {payload.get('sub')}")
         return payload
     except JWTError as e:
         logger.error(f"JWT validation error: {str(e)}")
-        logger.error(f"Token that failed validation (first 20 chars): {token[:20]}...")
         raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
         logger.error(f"Unexpected error during token validation: {str(e)}")
@@ -117,10 +251,9 @@ async def ws_auth(
         # Try to get token from query params if not provided
         if not token:
             auth_header = websocket.headers.get("authorization", "")
-            logger.info(f"Auth header found: {auth_header[:30]}...")
+            logger.debug("Using token from authorization header")
             token = auth_header.replace("Bearer ", "")
             
-        logger.info(f"WS Auth - Attempting authentication with token (first 20 chars): {token[:20] if token else 'None'}...")
         
         if not token:
             logger.error("WS Auth - No token found in headers or query params")
@@ -129,7 +262,7 @@ async def ws_auth(
         try:
             # Validate the token
             payload = await validate_token(token)
-            logger.info(f"WS Auth - Token validated successfully for user: {payload.get('sub')}")
+            logger.debug(f"WS Auth - Token validated successfully for user: {payload.get('sub')}")
             return payload
         except JWTError as e:
             logger.error(f"WS Auth - Token validation failed: {str(e)}")
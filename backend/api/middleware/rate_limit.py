@@ -1,28 +1,248 @@
-from datetime import datetime, timedelta
-from typing import Dict, DefaultDict
-from collections import defaultdict
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Allow `limit` events per `window` seconds"""
+    limit: int
+    window: float = 60.0
+
+
+# Expensive actions get their own, stricter budget on top of the global one
+DEFAULT_ACTION_LIMITS: Dict[str, RateLimit] = {
+    "strategy_select": RateLimit(limit=5, window=60.0),
+    "deposit": RateLimit(limit=10, window=60.0),
+}
+
+
+def _estimate(previous: int, current: int, now: float, window_index: int, window: float) -> float:
+    """Sliding-window-counter estimate: weight the previous window by its remaining overlap"""
+    elapsed = now - window_index * window
+    return previous * (1 - elapsed / window) + current
+
+
+class RateLimitBackend(ABC):
+    """Counter storage for the rate limiter"""
+
+    @abstractmethod
+    async def acquire(self, checks: List[Tuple[str, RateLimit]], now: float) -> bool:
+        """
+        Count one event against every key if all of them are under their limit
+
+        Args:
+            checks: (key, limit) pairs that must all allow the event
+            now: Current time in seconds
+
+        Returns:
+            True if the event was allowed (and counted), False otherwise
+        """
+
+
+class _WindowCounter:
+    __slots__ = ("window_index", "current", "previous", "expires_at")
+
+    def __init__(self, window_index: int, expires_at: float):
+        self.window_index = window_index
+        self.current = 0
+        self.previous = 0
+        self.expires_at = expires_at
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process sliding-window counters.
+
+    Each key holds two integers, so a check is O(1) regardless of the limit.
+    Keys are kept in least-recently-used order; keys idle for two windows
+    carry no information and are evicted from the front as checks run, and
+    max_keys bounds memory outright.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, _WindowCounter]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    async def acquire(self, checks: List[Tuple[str, RateLimit]], now: float) -> bool:
+        self._evict(now)
+        counters = [self._counter(key, rule, now) for key, rule in checks]
+        for counter, (_, rule) in zip(counters, checks):
+            estimated = _estimate(counter.previous, counter.current, now, counter.window_index, rule.window)
+            if estimated + 1 > rule.limit:
+                return False
+        for counter in counters:
+            counter.current += 1
+        return True
+
+    def _counter(self, key: str, rule: RateLimit, now: float) -> _WindowCounter:
+        window_index = int(now // rule.window)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = _WindowCounter(window_index, 0.0)
+            self._counters[key] = counter
+        else:
+            self._counters.move_to_end(key)
+        if counter.window_index != window_index:
+            counter.previous = counter.current if window_index == counter.window_index + 1 else 0
+            counter.current = 0
+            counter.window_index = window_index
+        counter.expires_at = (window_index + 2) * rule.window
+        return counter
+
+    def _evict(self, now: float) -> None:
+        while self._counters:
+            key, counter = next(iter(self._counters.items()))
+            if counter.expires_at > now and len(self._counters) < self.max_keys:
+                break
+            del self._counters[key]
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counters shared by every worker through Redis.
+
+    Counters live in `{prefix}{key}:{window_index}` and expire after two
+    windows. The check and the increment are separate round trips, so under
+    heavy contention a few events past the limit can slip through; that is
+    accepted in exchange for not needing server-side scripting.
+    """
+
+    def __init__(self, client: Any = None, url: Optional[str] = None, prefix: str = "helenus:rl:"):
+        """
+        Initialize Redis rate limit backend
+
+        Args:
+            client: Existing redis.asyncio client (or compatible stand-in)
+            url: Redis URL, used when no client is given
+            prefix: Key prefix for counters
+        """
+        if client is None:
+            if not url:
+                raise ValueError("RedisRateLimitBackend requires a client or a url")
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    async def acquire(self, checks: List[Tuple[str, RateLimit]], now: float) -> bool:
+        keys = []
+        for key, rule in checks:
+            window_index = int(now // rule.window)
+            keys.append((
+                f"{self.prefix}{key}:{window_index}",
+                f"{self.prefix}{key}:{window_index - 1}",
+                window_index,
+                rule
+            ))
+
+        values = await self.client.mget([k for current, previous, _, _ in keys for k in (current, previous)])
+        for i, (_, _, window_index, rule) in enumerate(keys):
+            current = int(values[2 * i] or 0)
+            previous = int(values[2 * i + 1] or 0)
+            if _estimate(previous, current, now, window_index, rule.window) + 1 > rule.limit:
+                return False
+
+        pipe = self.client.pipeline()
+        for current, _, _, rule in keys:
+            pipe.incr(current)
+            pipe.expire(current, int(rule.window * 2) + 1)
+        await pipe.execute()
+        return True
+
+
 class WebSocketRateLimiter:
-    def __init__(self, rate_limit: int = 60):  # messages per minute
+    """
+    Rate limiter for WebSocket messages.
+
+    Every message counts against the client's global budget (`rate_limit` per
+    `window`); messages with an action or topic that has its own limit also
+    count against that. A message is allowed only if every applicable budget
+    has room, and only then is it counted.
+
+    Example:
+        limiter = WebSocketRateLimiter(rate_limit=60)
+        if not await limiter.is_allowed(client_id, action="deposit"):
+            # reject the message
+    """
+
+    def __init__(
+        self,
+        rate_limit: int = 60,  # messages per minute
+        window: float = 60.0,
+        action_limits: Optional[Dict[str, RateLimit]] = None,
+        topic_limits: Optional[Dict[str, RateLimit]] = None,
+        backend: Optional[RateLimitBackend] = None,
+        clock=time.time
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            rate_limit: Messages allowed per window for each client
+            window: Window length in seconds
+            action_limits: Extra limits per message type (defaults to
+                DEFAULT_ACTION_LIMITS)
+            topic_limits: Extra limits per topic, or per topic prefix such as
+                "market" for "market_ETH-USD"
+            backend: Counter storage; in-process by default
+            clock: Time source in seconds
+        """
         self.rate_limit = rate_limit
-        self.message_counts: DefaultDict[str, list] = defaultdict(list)
-        
-    async def is_allowed(self, client_id: str) -> bool:
-        now = datetime.now()
-        minute_ago = now - timedelta(minutes=1)
-        
-        # Clean old messages
-        self.message_counts[client_id] = [
-            ts for ts in self.message_counts[client_id] 
-            if ts > minute_ago
-        ]
-        
-        if len(self.message_counts[client_id]) >= self.rate_limit:
-            logger.warning(f"Rate limit exceeded for client {client_id}")
-            return False
-            
-        self.message_counts[client_id].append(now)
-        return True
+        self.default_limit = RateLimit(limit=rate_limit, window=window)
+        self.action_limits = DEFAULT_ACTION_LIMITS if action_limits is None else action_limits
+        self.topic_limits = topic_limits or {}
+        self.backend = backend if backend is not None else InMemoryRateLimitBackend()
+        self.clock = clock
+
+    def _topic_limit(self, topic: str) -> Optional[RateLimit]:
+        rule = self.topic_limits.get(topic)
+        if rule is None and "_" in topic:
+            rule = self.topic_limits.get(topic.split("_", 1)[0])
+        return rule
+
+    async def is_allowed(
+        self,
+        client_id: str,
+        action: Optional[str] = None,
+        topic: Optional[str] = None
+    ) -> bool:
+        """
+        Check and count one message from a client
+
+        Args:
+            client_id: Client identifier
+            action: Message type, e.g. "deposit"
+            topic: Topic the message targets, e.g. "market_ETH-USD"
+
+        Returns:
+            True if the message is within every applicable limit
+        """
+        checks = [(client_id, self.default_limit)]
+        if action and action in self.action_limits:
+            checks.append((f"{client_id}:action:{action}", self.action_limits[action]))
+        if topic:
+            rule = self._topic_limit(topic)
+            if rule:
+                checks.append((f"{client_id}:topic:{topic}", rule))
+
+        if await self.backend.acquire(checks, self.clock()):
+            return True
+        logger.warning(f"Rate limit exceeded for client {client_id} ({action or 'message'})")
+        return False
+
+
+def create_rate_limiter(settings: Any) -> WebSocketRateLimiter:
+    """Build the WebSocket rate limiter configured by settings"""
+    backend = None
+    if (settings.RATE_LIMIT_BACKEND or "memory").lower() == "redis":
+        backend = RedisRateLimitBackend(url=settings.REDIS_URL)
+    return WebSocketRateLimiter(rate_limit=settings.WS_RATE_LIMIT, backend=backend)
@@ -1,7 +1,14 @@
 from fastapi import APIRouter
 from datetime import datetime
+from services.database import get_database_service
+from services.mongo import get_pool_stats
+from services.cdp_executor import get_cdp_executor
+from core.container import get_container
 
+# Liveness stays public (load balancers, orchestrators); the detail
+# endpoints expose internals and are mounted behind authentication
 router = APIRouter()
+detail_router = APIRouter()
 
 @router.get("/health")
 async def health_check():
@@ -11,3 +18,36 @@ async def health_check():
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0"
     }
+
+@detail_router.get("/health/db")
+async def database_health():
+    """MongoDB connection-pool utilization and cache hit rates"""
+    return {
+        "pool": get_pool_stats(),
+        "cache": get_database_service().get_cache_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@detail_router.get("/health/cdp")
+async def cdp_health():
+    """Queue depth and latency of the CDP SDK thread pool"""
+    return {
+        "executor": get_cdp_executor().get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@detail_router.get("/health/vaults")
+async def vault_deployment_health():
+    """Background vault deployments: pending, failures and latency"""
+    return {
+        "deployer": get_container().vault_deployer.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@detail_router.get("/health/agents")
+async def agent_health():
+    """Agents and, when sharded, the worker processes running them"""
+    return {
+        "agents": get_container().agent_manager.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
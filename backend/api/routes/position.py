@@ -7,8 +7,6 @@ from models.position import (
     PositionResponse,
     PositionList
 )
-from cdp_langchain.agent_toolkits import CdpToolkit
-from cdp_langchain.utils import CdpAgentkitWrapper
 from config.settings import get_settings
 import logging
 
@@ -23,6 +21,7 @@ cdp_toolkit = None
 def get_cdp_wrapper():
     global cdp_wrapper
     if cdp_wrapper is None:
+        from cdp_langchain.utils import CdpAgentkitWrapper
         try:
             cdp_wrapper = CdpAgentkitWrapper(
                 api_key_name=settings.CDP_API_KEY_NAME,
@@ -41,6 +40,7 @@ def get_cdp_toolkit():
     if cdp_toolkit is None:
         wrapper = get_cdp_wrapper()
         if wrapper:
+            from cdp_langchain.agent_toolkits import CdpToolkit
             try:
                 cdp_toolkit = CdpToolkit.from_cdp_agentkit_wrapper(wrapper)
                 logger.info("CDP toolkit initialized successfully")
@@ -6,7 +6,6 @@ from models.api import (
     StrategyResponse,
     StrategyList
 )
-from core.agents.morpho.agent import MorphoAgent
 from config.settings import get_settings
 import logging
 
@@ -36,6 +35,7 @@ async def list_strategies():
 @router.post("/", response_model=StrategyResponse)
 async def create_strategy(strategy: StrategyCreate):
     """Create a new strategy instance"""
+    from core.agents.morpho.agent import MorphoAgent
     try:
         # Initialize the Morpho agent with the strategy parameters
         agent = MorphoAgent(
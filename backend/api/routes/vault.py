@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
 from models.vault import VaultCreate, VaultUpdate, VaultResponse, VaultList
-from services.vault_service import VaultService
-from api.middleware.auth import get_current_user
+from core.container import ServiceContainer, get_container
+from api.middleware.auth import require_user
 import logging
 
 router = APIRouter()
@@ -11,14 +11,14 @@ logger = logging.getLogger(__name__)
 @router.post("/", response_model=VaultResponse)
 async def create_vault(
     vault: VaultCreate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(require_user),
+    container: ServiceContainer = Depends(get_container)
 ):
     """Create a new trading vault"""
     try:
-        vault_service = VaultService()
-        vault_data = await vault_service.create_vault(
-            user_id=current_user["sub"],
-            vault_params=vault.dict()
+        vault_data = await container.vault_service.create_vault(
+            vault.model_dump(),
+            current_user["sub"]
         )
         return vault_data
     except Exception as e:
@@ -29,11 +29,10 @@ async def create_vault(
         )
 
 @router.get("/{vault_id}", response_model=VaultResponse)
-async def get_vault(vault_id: str):
+async def get_vault(vault_id: str, container: ServiceContainer = Depends(get_container)):
     """Get vault details"""
     try:
-        vault_service = VaultService()
-        vault = await vault_service.get_vault(vault_id)
+        vault = await container.vault_service.get_vault(vault_id)
         if not vault:
             raise HTTPException(
                 status_code=404,
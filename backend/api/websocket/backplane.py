@@ -0,0 +1,204 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import logging
+from api.websocket.codec import JSONCodec, MessageCodec, MsgPackCodec, msgpack
+
+logger = logging.getLogger(__name__)
+
+# Topic every worker listens on; used for messages meant for all clients
+BROADCAST_TOPIC = "__broadcast__"
+
+MessageHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def backplane_codec() -> MessageCodec:
+    """
+    Codec for messages crossing a backplane
+
+    MessagePack when installed: its Decimal extension type round-trips, so
+    clients get the same values whichever backplane carried the message.
+    Without it, JSON, and the in-process backplane converts the same way.
+    """
+    return MsgPackCodec() if msgpack is not None else JSONCodec()
+
+
+class Backplane(ABC):
+    """
+    Publish/subscribe transport behind the ConnectionManager.
+
+    Each worker process owns one backplane. The manager subscribes a topic when
+    its first local client subscribes to it and unsubscribes when the last one
+    leaves. Published messages come back through the handler given to start(),
+    on every worker that holds a subscription for the topic, including the
+    publisher.
+    """
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler) -> None:
+        """Start receiving messages, delivering them to handler(topic, message)"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Stop receiving messages and release resources"""
+
+    @abstractmethod
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        """Publish a message to every worker subscribed to topic"""
+
+    @abstractmethod
+    async def subscribe(self, topic: str) -> None:
+        """Start receiving messages for topic"""
+
+    @abstractmethod
+    async def unsubscribe(self, topic: str) -> None:
+        """Stop receiving messages for topic"""
+
+
+class InProcessBackplane(Backplane):
+    """Single-process backplane; publishing delivers straight to the local handler"""
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+        self._topics: Set[str] = set()
+        # Without msgpack, messages get the lossy JSON conversion a Redis
+        # round trip applies; with it, they pass through as they are
+        self._codec: Optional[MessageCodec] = None if msgpack is not None else JSONCodec()
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._handler = None
+        self._topics.clear()
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        if self._handler and topic in self._topics:
+            if self._codec is not None:
+                message = self._codec.decode(self._codec.encode(message))
+            await self._handler(topic, message)
+
+    async def subscribe(self, topic: str) -> None:
+        self._topics.add(topic)
+
+    async def unsubscribe(self, topic: str) -> None:
+        self._topics.discard(topic)
+
+
+class RedisBackplane(Backplane):
+    """
+    Redis pub/sub backplane for multi-worker and multi-host deployments.
+
+    Each topic maps to one Redis channel under channel_prefix. Any client that
+    exposes the redis.asyncio publish()/pubsub() interface can be passed in,
+    which is how tests run it against a local stand-in.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: Optional[str] = None,
+        channel_prefix: str = "helenus:ws:",
+        poll_timeout: float = 1.0
+    ):
+        """
+        Initialize Redis backplane
+
+        Args:
+            client: Existing redis.asyncio client (or compatible stand-in)
+            url: Redis URL, used when no client is given
+            channel_prefix: Prefix for the Redis channel of each topic
+            poll_timeout: Seconds to wait for a message per reader poll
+        """
+        if client is None:
+            if not url:
+                raise ValueError("RedisBackplane requires a client or a url")
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.client = client
+        self.channel_prefix = channel_prefix
+        self.poll_timeout = poll_timeout
+        self._codec = backplane_codec()
+        self._pubsub = None
+        self._handler: Optional[MessageHandler] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._running = False
+
+    def _channel(self, topic: str) -> str:
+        return f"{self.channel_prefix}{topic}"
+
+    def _topic(self, channel: Any) -> str:
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        return channel[len(self.channel_prefix):]
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        self._pubsub = self.client.pubsub()
+        self._running = True
+        self._reader_task = asyncio.create_task(self._read_loop())
+        logger.info("Redis backplane started")
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        if self._pubsub:
+            await self._pubsub.close()
+            self._pubsub = None
+        logger.info("Redis backplane stopped")
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        await self.client.publish(self._channel(topic), self._codec.encode(message))
+
+    async def subscribe(self, topic: str) -> None:
+        await self._pubsub.subscribe(self._channel(topic))
+
+    async def unsubscribe(self, topic: str) -> None:
+        await self._pubsub.unsubscribe(self._channel(topic))
+
+    async def _read_loop(self) -> None:
+        """Forward messages from Redis to the handler"""
+        while self._running:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(self.poll_timeout)
+                    continue
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=self.poll_timeout
+                )
+                if message is None or message.get("type") != "message":
+                    continue
+                await self._handler(
+                    self._topic(message["channel"]),
+                    self._codec.decode(message["data"])
+                )
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Backplane read error: {str(e)}")
+                await asyncio.sleep(1)  # Prevent tight loop on error
+
+
+def create_backplane(settings: Any) -> Backplane:
+    """
+    Build the backplane configured by WS_BACKPLANE
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Backplane instance ("memory" or "redis")
+    """
+    kind = (settings.WS_BACKPLANE or "memory").lower()
+    if kind == "redis":
+        return RedisBackplane(url=settings.REDIS_URL)
+    if kind != "memory":
+        logger.warning(f"Unknown WS_BACKPLANE '{kind}', using in-process backplane")
+    return InProcessBackplane()
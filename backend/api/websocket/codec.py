@@ -0,0 +1,206 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional, Union
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+import json
+import logging
+from fastapi import WebSocket, WebSocketDisconnect
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JSON_SUBPROTOCOL = "helenus.json.v1"
+MSGPACK_SUBPROTOCOL = "helenus.msgpack.v1"
+
+# MessagePack extension type carrying a Decimal as [unscaled_int, scale]
+DECIMAL_EXT_TYPE = 1
+
+
+def decimal_to_scaled(value: Decimal) -> tuple:
+    """
+    Split a finite Decimal into an unscaled integer and a decimal scale
+
+    Args:
+        value: Decimal to split
+
+    Returns:
+        Tuple of (unscaled, scale) such that value == unscaled * 10 ** -scale
+    """
+    if not value.is_finite():
+        raise ValueError(f"Cannot encode non-finite Decimal: {value}")
+    sign, digits, exponent = value.as_tuple()
+    unscaled = int("".join(map(str, digits)) or "0")
+    if exponent > 0:
+        unscaled *= 10 ** exponent
+        exponent = 0
+    return (-unscaled if sign else unscaled), -exponent
+
+
+def scaled_to_decimal(unscaled: int, scale: int) -> Decimal:
+    """Rebuild a Decimal from its unscaled integer and scale"""
+    return Decimal(unscaled).scaleb(-scale)
+
+
+class MessageCodec(ABC):
+    """
+    Wire encoding for WebSocket messages.
+
+    A codec turns message dicts into frames and back. The codec in use for a
+    connection is picked once, during the subprotocol handshake.
+    """
+    subprotocol: Optional[str] = None
+    binary: bool = False
+
+    @abstractmethod
+    def encode(self, message: Dict[str, Any]) -> Union[str, bytes]:
+        """Encode a message dict into a frame payload"""
+
+    @abstractmethod
+    def decode(self, payload: Union[str, bytes]) -> Dict[str, Any]:
+        """Decode a frame payload into a message dict"""
+
+    async def send(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+        """Encode and send a message on the given socket"""
+        payload = self.encode(message)
+        if self.binary:
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+
+    async def receive(self, websocket: WebSocket) -> Dict[str, Any]:
+        """
+        Receive and decode the next data frame
+
+        Raises:
+            WebSocketDisconnect: When the client closes the connection
+        """
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+        payload = frame.get("bytes")
+        if payload is None:
+            payload = frame.get("text", "")
+        return self.decode(payload)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONCodec(MessageCodec):
+    """JSON text frames (the default, and the legacy behaviour)"""
+    binary = False
+
+    def __init__(self, subprotocol: Optional[str] = None):
+        self.subprotocol = subprotocol
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        return json.dumps(
+            message,
+            default=_json_default,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+
+    def decode(self, payload: Union[str, bytes]) -> Dict[str, Any]:
+        return json.loads(payload)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        unscaled, scale = decimal_to_scaled(value)
+        return msgpack.ExtType(DECIMAL_EXT_TYPE, msgpack.packb([unscaled, scale]))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == DECIMAL_EXT_TYPE:
+        unscaled, scale = msgpack.unpackb(data)
+        return scaled_to_decimal(unscaled, scale)
+    return msgpack.ExtType(code, data)
+
+
+class MsgPackCodec(MessageCodec):
+    """
+    MessagePack binary frames.
+
+    Decimals travel as an extension type holding a scaled integer, so prices
+    and amounts keep their exact precision without string round trips.
+    """
+    subprotocol = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(message, default=_msgpack_default, use_bin_type=True)
+
+    def decode(self, payload: Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(payload, str):
+            # Tolerate text frames from clients that fall back to JSON
+            return json.loads(payload)
+        return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False)
+
+
+def supported_subprotocols() -> list:
+    """Subprotocols this server can speak, in server preference order"""
+    protocols = [JSON_SUBPROTOCOL]
+    if msgpack is not None:
+        protocols.insert(0, MSGPACK_SUBPROTOCOL)
+    return protocols
+
+
+def select_codec(requested: Iterable[str]) -> MessageCodec:
+    """
+    Pick a codec from the client's Sec-WebSocket-Protocol offer
+
+    The first subprotocol the client lists that we support wins. Clients that
+    offer nothing we recognise get plain JSON without a subprotocol.
+
+    Args:
+        requested: Subprotocols offered by the client, in client preference order
+
+    Returns:
+        The codec to use for the connection
+    """
+    supported = supported_subprotocols()
+    for protocol in requested or []:
+        if protocol not in supported:
+            continue
+        if protocol == MSGPACK_SUBPROTOCOL:
+            return MsgPackCodec()
+        return JSONCodec(subprotocol=JSON_SUBPROTOCOL)
+    return JSONCodec()
+
+
+async def accept_with_codec(websocket: WebSocket) -> MessageCodec:
+    """
+    Accept a WebSocket connection, negotiating the wire codec
+
+    Args:
+        websocket: Connection that has not been accepted yet
+
+    Returns:
+        The codec negotiated for the connection
+    """
+    codec = select_codec(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=codec.subprotocol)
+    logger.debug(f"Negotiated WebSocket codec: {codec.subprotocol or 'json'}")
+    return codec
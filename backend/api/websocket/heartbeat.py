@@ -0,0 +1,302 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from dataclasses import dataclass
+from datetime import datetime
+import asyncio
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Timer:
+    key: Hashable
+    expires_tick: int
+    level: int = 0
+    slot: int = 0
+
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel.
+
+    Timers are bucketed by expiry tick into a stack of wheels; level 0 holds
+    timers due within one rotation, each higher level covers `slots` times the
+    span of the one below and cascades its buckets down as time reaches them.
+    Scheduling and cancelling are O(1), and advancing costs O(1) amortized per
+    tick plus the number of expired timers.
+
+    Example:
+        wheel = TimerWheel(tick=1.0)
+        wheel.schedule("client-1", 30.0, now=time.monotonic())
+        expired = wheel.advance(time.monotonic())
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, now: float = 0.0):
+        """
+        Initialize timer wheel
+
+        Args:
+            tick: Resolution of the wheel in seconds
+            slots: Buckets per level
+            levels: Number of levels; timers beyond tick * slots ** levels are
+                parked on the top level and re-placed as it cascades
+            now: Current clock value
+        """
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: List[List[Dict[Hashable, _Timer]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._timers: Dict[Hashable, _Timer] = {}
+        self._current_tick = int(now // tick)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, delay: float, now: Optional[float] = None) -> None:
+        """
+        Schedule (or reschedule) the timer for key
+
+        Args:
+            key: Timer identity; an existing timer with this key is replaced
+            delay: Seconds until the timer expires
+            now: Current clock value; defaults to the wheel's current tick
+        """
+        self.cancel(key)
+        base = self._current_tick if now is None else max(self._current_tick, int(now // self.tick))
+        timer = _Timer(key=key, expires_tick=base + max(1, math.ceil(delay / self.tick)))
+        self._timers[key] = timer
+        self._place(timer)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the timer for key, returning whether one was pending"""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self._wheels[timer.level][timer.slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Move the wheel forward to now
+
+        Args:
+            now: Current clock value
+
+        Returns:
+            Keys of the timers that expired, in expiry order
+        """
+        expired: List[Hashable] = []
+        target_tick = int(now // self.tick)
+        while self._current_tick < target_tick:
+            self._current_tick += 1
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if self._current_tick % span == 0:
+                    self._cascade(level, (self._current_tick // span) % self.slots)
+            bucket = self._wheels[0][self._current_tick % self.slots]
+            if bucket:
+                self._wheels[0][self._current_tick % self.slots] = {}
+                for key in bucket:
+                    del self._timers[key]
+                    expired.append(key)
+        return expired
+
+    def _place(self, timer: _Timer) -> None:
+        delta = timer.expires_tick - self._current_tick
+        level = self.levels - 1
+        for candidate in range(self.levels):
+            if delta < self.slots ** (candidate + 1):
+                level = candidate
+                break
+        timer.level = level
+        timer.slot = (timer.expires_tick // self.slots ** level) % self.slots
+        self._wheels[level][timer.slot][timer.key] = timer
+
+    def _cascade(self, level: int, slot: int) -> None:
+        bucket = self._wheels[level][slot]
+        if not bucket:
+            return
+        self._wheels[level][slot] = {}
+        for timer in bucket.values():
+            self._place(timer)
+
+
+@dataclass
+class _Connection:
+    ping: Callable[[], Awaitable[None]]
+    evict: Callable[[], Awaitable[None]]
+    last_activity: float
+    missed_pongs: int = 0
+
+
+class HeartbeatMonitor:
+    """
+    Idle detection and keepalive for WebSocket connections.
+
+    One task drives a TimerWheel for every tracked connection. Inbound traffic
+    only stamps last_activity; when a connection's timer fires it is pinged
+    only if it has actually been idle for `interval`, otherwise the timer is
+    pushed out to the end of the idle window. A connection that misses
+    `max_missed_pongs` pings in a row is evicted. Every reschedule adds up to
+    `jitter * interval` of random delay so that pings for connections opened
+    together do not stay in lockstep.
+
+    Example:
+        heartbeat = HeartbeatMonitor(interval=30, max_missed_pongs=2)
+        heartbeat.track(client_id, ping=send_ping, evict=close_connection)
+        heartbeat.touch(client_id)  # on every inbound message, including pong
+    """
+
+    def __init__(
+        self,
+        interval: float = 30.0,
+        max_missed_pongs: int = 2,
+        resolution: float = 1.0,
+        jitter: float = 0.1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize heartbeat monitor
+
+        Args:
+            interval: Seconds of inactivity before a connection is pinged
+            max_missed_pongs: Unanswered pings before a connection is evicted
+            resolution: Timer wheel tick in seconds
+            jitter: Fraction of interval used as random spread on reschedule
+            clock: Monotonic clock
+        """
+        self.interval = interval
+        self.max_missed_pongs = max_missed_pongs
+        self.resolution = resolution
+        self.jitter = jitter
+        self.clock = clock
+        self.wheel = TimerWheel(tick=resolution, now=clock())
+        self.connections: Dict[Hashable, _Connection] = {}
+        self.pings_sent = 0
+        self.evictions = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def track(
+        self,
+        client_id: Hashable,
+        ping: Callable[[], Awaitable[None]],
+        evict: Callable[[], Awaitable[None]]
+    ) -> None:
+        """
+        Start watching a connection
+
+        Args:
+            client_id: Connection identifier
+            ping: Coroutine function sending a ping to the client
+            evict: Coroutine function closing the connection
+        """
+        now = self.clock()
+        self.connections[client_id] = _Connection(ping=ping, evict=evict, last_activity=now)
+        self._schedule(client_id, self.interval, now)
+        self._ensure_running()
+
+    def untrack(self, client_id: Hashable) -> None:
+        """Stop watching a connection"""
+        self.connections.pop(client_id, None)
+        self.wheel.cancel(client_id)
+
+    def touch(self, client_id: Hashable) -> None:
+        """Record inbound activity (any message, including pong) for a connection"""
+        connection = self.connections.get(client_id)
+        if connection:
+            connection.last_activity = self.clock()
+            connection.missed_pongs = 0
+
+    async def start(self) -> None:
+        """Start the heartbeat task"""
+        self._ensure_running()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def tick(self) -> None:
+        """Advance the wheel and ping or evict the connections that are due"""
+        now = self.clock()
+        pings, evictions = [], []
+        for client_id in self.wheel.advance(now):
+            connection = self.connections.get(client_id)
+            if connection is None:
+                continue
+            idle = now - connection.last_activity
+            if idle < self.interval:
+                self._schedule(client_id, self.interval - idle, now)
+            elif connection.missed_pongs >= self.max_missed_pongs:
+                evictions.append(client_id)
+            else:
+                connection.missed_pongs += 1
+                pings.append(client_id)
+                self._schedule(client_id, self.interval, now)
+
+        for client_id in evictions:
+            await self._evict(client_id)
+
+        if pings:
+            results = await asyncio.gather(
+                *(self.connections[client_id].ping() for client_id in pings),
+                return_exceptions=True
+            )
+            self.pings_sent += len(pings)
+            for client_id, result in zip(pings, results):
+                if isinstance(result, Exception) and client_id in self.connections:
+                    logger.warning(f"Ping failed for {client_id}: {str(result)}")
+                    await self._evict(client_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get heartbeat statistics"""
+        return {
+            "tracked_connections": len(self.connections),
+            "pending_timers": len(self.wheel),
+            "pings_sent": self.pings_sent,
+            "evictions": self.evictions,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def _schedule(self, client_id: Hashable, delay: float, now: float) -> None:
+        spread = random.uniform(0, self.interval * self.jitter) if self.jitter else 0.0
+        self.wheel.schedule(client_id, delay + spread, now)
+
+    async def _evict(self, client_id: Hashable) -> None:
+        connection = self.connections.get(client_id)
+        self.untrack(client_id)
+        if connection is None:
+            return
+        self.evictions += 1
+        logger.info(f"Evicting idle connection {client_id}")
+        try:
+            await connection.evict()
+        except Exception as e:
+            logger.error(f"Eviction error for {client_id}: {str(e)}")
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.resolution)
+                await self.tick()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Heartbeat error: {str(e)}")
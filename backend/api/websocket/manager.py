@@ -6,31 +6,80 @@ import asyncio
 from datetime import datetime
 from models.websocket import WSMessage, WSMessageType
 from api.websocket.queue import MessageQueue
+from api.websocket.backplane import Backplane, BROADCAST_TOPIC, create_backplane
+from api.websocket.codec import JSONCodec, MessageCodec
+from api.websocket.heartbeat import HeartbeatMonitor
+from config.settings import get_settings
 from api.middleware.auth import validate_token
 from core.manager.agent import AgentManager
 
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
-    """Manages WebSocket connections and message broadcasting"""
+    """
+    Manages WebSocket connections and message broadcasting
 
-    def __init__(self):
+    Connections live in this process, but publishing goes through a Backplane
+    so that broadcasts and topic messages reach clients on every worker.
+    """
+
+    def __init__(
+        self,
+        backplane: Optional[Backplane] = None,
+        heartbeat: Optional[HeartbeatMonitor] = None
+    ):
+        settings = get_settings()
         self.active_connections: Dict[str, WebSocket] = {}
+        # Wire codec negotiated by each connection (see accept_with_codec)
+        self.codecs: Dict[str, MessageCodec] = {}
         self.subscriptions: Dict[str, Set[str]] = {}
-        self.message_queue = MessageQueue()
+        self.topic_subscribers: Dict[str, Set[str]] = {}
+        self.backplane = backplane or create_backplane(settings)
+        self._backplane_started = False
+        self.heartbeat = heartbeat or HeartbeatMonitor(
+            interval=settings.WS_HEARTBEAT_INTERVAL,
+            max_missed_pongs=settings.WS_MAX_MISSED_PONGS
+        )
+        self.message_queue = MessageQueue(
+            max_size=settings.WS_QUEUE_MAX_SIZE,
+            num_workers=settings.WS_QUEUE_WORKERS
+        )
         self.agent_manager = AgentManager()
-        self._cleanup_task = None
         self.logger = logging.getLogger(__name__)
         
     async def initialize(self):
         """Initialize the WebSocket manager"""
-        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        await self._start_backplane()
+        await self.heartbeat.start()
         await self.agent_manager.initialize()
+
+    async def _start_backplane(self):
+        """Start the backplane once and listen for all-client broadcasts"""
+        if self._backplane_started:
+            return
+        self._backplane_started = True
+        await self.backplane.start(self._deliver)
+        await self.backplane.subscribe(BROADCAST_TOPIC)
         
-    async def connect(self, websocket: WebSocket, client_id: str) -> bool:
-        """Connect a new client"""
+    async def connect(self, websocket: WebSocket, client_id: str, codec: Optional[MessageCodec] = None) -> bool:
+        """
+        Connect a new client
+
+        Args:
+            websocket: The accepted connection
+            client_id: Client identifier
+            codec: Codec negotiated when accepting it; plain JSON if omitted
+        """
         try:
+            await self._start_backplane()
             self.active_connections[client_id] = websocket
+            self.codecs[client_id] = codec or JSONCodec()
+            self.subscriptions.setdefault(client_id, set())
+            self.heartbeat.track(
+                client_id,
+                ping=lambda: self._send_ping(client_id),
+                evict=lambda: self._evict(client_id)
+            )
             await self.broadcast_status(client_id, "connected")
             return True
         except Exception as e:
@@ -39,11 +88,15 @@ class ConnectionManager:
             
     async def disconnect(self, client_id: str):
         """Disconnect a client"""
+        self.heartbeat.untrack(client_id)
         if client_id in self.active_connections:
-            await self.broadcast_status(client_id, "disconnected")
+            # Remove first so a failed send to this client cannot recurse here
             del self.active_connections[client_id]
+            self.codecs.pop(client_id, None)
+            await self.broadcast_status(client_id, "disconnected")
             
         if client_id in self.subscriptions:
+            await self._remove_topics(client_id, set(self.subscriptions[client_id]))
             del self.subscriptions[client_id]
             
         self.logger.info(f"Client {client_id} disconnected")
@@ -60,21 +113,68 @@ class ConnectionManager:
         await self.broadcast(message)
 
     async def broadcast(self, message: dict):
+        """Send a message to every connected client on every worker"""
+        await self._start_backplane()
+        await self.backplane.publish(BROADCAST_TOPIC, message)
+
+    async def broadcast_message(self, message: Any, topic: str):
+        """
+        Send a message to every client subscribed to topic, on every worker
+
+        Args:
+            message: WSMessage (or plain dict) to send
+            topic: Topic name, e.g. "strategy_<vault_id>"
+        """
+        payload = message.model_dump(mode="json") if hasattr(message, "model_dump") else message
+        await self._start_backplane()
+        await self.backplane.publish(topic, payload)
+
+    async def _deliver(self, topic: str, message: dict):
+        """Backplane callback: fan a message out to local clients"""
+        if topic == BROADCAST_TOPIC:
+            client_ids = list(self.active_connections)
+        else:
+            client_ids = list(self.topic_subscribers.get(topic, ()))
+        await self._send_local(client_ids, message)
+
+    async def _send_local(self, client_ids: list, message: dict):
         disconnected = []
-        for client_id, connection in self.active_connections.items():
+        for client_id in client_ids:
+            connection = self.active_connections.get(client_id)
+            if connection is None:
+                continue
             try:
-                await connection.send_json(message)
+                await self._send(client_id, connection, message)
             except Exception:
                 disconnected.append(client_id)
         
         for client_id in disconnected:
             await self.disconnect(client_id)
 
+    async def _add_topics(self, client_id: str, topics: Set[str]):
+        """Track client topics, subscribing the backplane on first local interest"""
+        for topic in topics:
+            subscribers = self.topic_subscribers.setdefault(topic, set())
+            if not subscribers:
+                await self.backplane.subscribe(topic)
+            subscribers.add(client_id)
+
+    async def _remove_topics(self, client_id: str, topics: Set[str]):
+        """Drop client topics, unsubscribing the backplane when no local interest remains"""
+        for topic in topics:
+            subscribers = self.topic_subscribers.get(topic)
+            if not subscribers:
+                continue
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.topic_subscribers[topic]
+                await self.backplane.unsubscribe(topic)
+
     async def send_personal_message(self, client_id: str, message: WSMessage):
         """Send message to specific client"""
         if client_id in self.active_connections:
             try:
-                await self.active_connections[client_id].send_json(message.dict())
+                await self._send(client_id, self.active_connections[client_id], message.dict())
             except Exception as e:
                 logger.error(f"Failed to send personal message: {str(e)}")
                 await self.disconnect(client_id)
@@ -84,6 +184,9 @@ class ConnectionManager:
         try:
             message = json.loads(message_text)
             message_type = message.get("type")
+            self.heartbeat.touch(client_id)
+            if message_type == WSMessageType.PONG:
+                return
             
             handlers = {
                 WSMessageType.SUBSCRIBE: self._handle_subscribe,
@@ -119,8 +222,10 @@ class ConnectionManager:
         
     async def _handle_subscribe(self, client_id: str, data: dict):
         """Handle subscription requests"""
-        topics = data.get("data", {}).get("topics", [])
+        topics = set(data.get("data", {}).get("topics", []))
         if client_id in self.subscriptions:
+            await self._start_backplane()
+            await self._add_topics(client_id, topics - self.subscriptions[client_id])
             self.subscriptions[client_id].update(topics)
             
         await self.send_personal_message(
@@ -134,8 +239,9 @@ class ConnectionManager:
         
     async def _handle_unsubscribe(self, client_id: str, data: dict):
         """Handle unsubscribe requests"""
-        topics = data.get("data", {}).get("topics", [])
+        topics = set(data.get("data", {}).get("topics", []))
         if client_id in self.subscriptions:
+            await self._remove_topics(client_id, topics & self.subscriptions[client_id])
             self.subscriptions[client_id].difference_update(topics)
             
         await self.send_personal_message(
@@ -172,7 +278,9 @@ class ConnectionManager:
             )
             
             # Subscribe to strategy updates
-            self.subscriptions[client_id].add(f"strategy_{strategy_id}")
+            topic = f"strategy_{strategy_id}"
+            await self._add_topics(client_id, {topic} - self.subscriptions[client_id])
+            self.subscriptions[client_id].add(topic)
             
         except Exception as e:
             logger.error(f"Strategy initialization failed: {str(e)}")
@@ -230,38 +338,42 @@ class ConnectionManager:
             logger.error(f"Strategy update failed: {str(e)}")
             await self.send_error(client_id, str(e))
             
-    async def _cleanup_loop(self):
-        """Periodic cleanup of inactive connections"""
-        while True:
+    async def _send(self, client_id: str, websocket: WebSocket, message: dict):
+        """Send a message in the client's negotiated codec"""
+        codec = self.codecs.get(client_id) or JSONCodec()
+        await codec.send(websocket, message)
+
+    async def _send_ping(self, client_id: str):
+        """Heartbeat callback: ping an idle client"""
+        websocket = self.active_connections.get(client_id)
+        if websocket is None:
+            return
+        await self._send(client_id, websocket, {
+            "type": "ping",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    async def _evict(self, client_id: str):
+        """Heartbeat callback: close a client that stopped answering pings"""
+        websocket = self.active_connections.get(client_id)
+        if websocket is not None:
             try:
-                # Ping all connections
-                disconnected = []
-                for client_id, websocket in self.active_connections.items():
-                    try:
-                        await websocket.send_json({
-                            "type": "ping",
-                            "timestamp": datetime.utcnow().isoformat()
-                        })
-                    except Exception:
-                        disconnected.append(client_id)
-                        
-                # Cleanup disconnected
-                for client_id in disconnected:
-                    await self.disconnect(client_id)
-                    
+                await websocket.close(code=4002, reason="Heartbeat timeout")
             except Exception as e:
-                logger.error(f"Cleanup error: {str(e)}")
-                
-            await asyncio.sleep(30)  # Run every 30 seconds
+                logger.debug(f"Close failed for {client_id}: {str(e)}")
+        await self.disconnect(client_id)
 
     async def cleanup(self):
         """Cleanup resources"""
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
+        await self.heartbeat.stop()
             
         # Close all connections
         for client_id in list(self.active_connections.keys()):
             await self.disconnect(client_id)
+
+        if self._backplane_started:
+            await self.backplane.stop()
+            self._backplane_started = False
             
         # Cleanup agent manager
         await self.agent_manager.cleanup()
@@ -0,0 +1,215 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+import asyncio
+import logging
+from fastapi import WebSocket
+from api.websocket.codec import MessageCodec
+from models.websocket import WSMessageType
+
+logger = logging.getLogger(__name__)
+
+RequestHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+SerialKey = Callable[[Dict[str, Any]], Optional[Hashable]]
+
+# First element of a serial key that only serializes within one connection
+CONNECTION_SCOPE = "connection"
+
+
+def state_key(message: Dict[str, Any]) -> Optional[Hashable]:
+    """
+    Serialization key of a message that changes state, None for the rest
+
+    Deposits read a vault's balance and write it back, so two deposits to one
+    vault must not overlap, whichever connection sends them. strategy_select
+    creates the user's vault, wallet and agent, so those run one at a time
+    per connection.
+    """
+    message_type = message.get("type")
+    if message_type == "deposit":
+        vault_id = (message.get("data") or {}).get("vault_id")
+        # Without a vault the deposit fails before touching any state
+        return ("vault", vault_id) if vault_id else None
+    if message_type == WSMessageType.STRATEGY_SELECT:
+        return (CONNECTION_SCOPE, "strategy_select")
+    return None
+
+
+class KeyLocks:
+    """
+    asyncio locks by key, dropped once nobody holds or waits for them.
+
+    Each key counts its holders and waiters; the entry is deleted when that
+    count reaches zero, not when the lock merely looks unlocked (a released
+    lock is briefly unlocked before its next waiter wakes up).
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, Tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    async def acquire(self, key: Hashable) -> Callable[[], None]:
+        """
+        Wait for the lock of key
+
+        Returns:
+            Function releasing it
+        """
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._unref(key)
+            raise
+
+        def release() -> None:
+            lock.release()
+            self._unref(key)
+        return release
+
+    def _unref(self, key: Hashable) -> None:
+        lock, users = self._locks[key]
+        if users <= 1:
+            del self._locks[key]
+        else:
+            self._locks[key] = (lock, users - 1)
+
+
+# Shared by every connection in this process, so deposits to one vault from
+# two connections of a user are serialized too. Separate server processes
+# do not share it.
+_shared_key_locks = KeyLocks()
+
+
+class RequestPipeline:
+    """
+    Concurrent request dispatch for a single WebSocket connection.
+
+    Each inbound message is handled in its own task, so a slow request (for
+    example strategy_select creating a vault, wallet and agent) does not hold
+    up the ones behind it. Responses are sent as soon as they are ready and
+    echo the client's request_id, so clients match them up even when they
+    complete out of order. At most max_in_flight requests run at once; once the
+    cap is reached, submit() waits, which stops the connection from reading
+    more messages until a slot frees up. Messages that share a serial_key
+    (by default state_key: deposits to one vault, strategy selections) run
+    one at a time, in the order they arrived. Keys are shared with the other
+    connections of this server process, except CONNECTION_SCOPE keys; other
+    processes are not serialized against.
+
+    Example:
+        pipeline = RequestPipeline(websocket, codec, handle, max_in_flight=8)
+        while True:
+            await pipeline.submit(await codec.receive(websocket))
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        codec: MessageCodec,
+        handler: RequestHandler,
+        max_in_flight: int = 8,
+        serial_key: Optional[SerialKey] = state_key,
+        key_locks: Optional[KeyLocks] = None
+    ):
+        """
+        Initialize request pipeline
+
+        Args:
+            websocket: Accepted WebSocket connection
+            codec: Codec negotiated for the connection
+            handler: Coroutine mapping a request message to a response dict
+            max_in_flight: Maximum concurrently running requests
+            serial_key: Maps a message to a key; messages with the same
+                (non-None) key are handled one at a time
+            key_locks: Lock table for serial keys; defaults to the one
+                shared by all connections in the process
+        """
+        self.websocket = websocket
+        self.codec = codec
+        self.handler = handler
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._send_lock = asyncio.Lock()
+        self.serial_key = serial_key
+        self._key_locks = key_locks if key_locks is not None else _shared_key_locks
+        # Tells this connection's CONNECTION_SCOPE keys from other connections'
+        self._scope = object()
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def submit(self, message: Dict[str, Any]) -> asyncio.Task:
+        """
+        Start handling a message, waiting for a free slot first
+
+        Args:
+            message: Decoded inbound message
+
+        Returns:
+            The task handling the message
+        """
+        await self._slots.acquire()
+        task = asyncio.create_task(self._run(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    async def drain(self) -> None:
+        """Wait for every in-flight request to finish"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def close(self) -> None:
+        """
+        Stop sending responses (the client has gone).
+
+        In-flight requests keep running to completion; deposits and vault
+        deployments must not be abandoned halfway because a socket dropped.
+        """
+        self._closed = True
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+
+    async def _run(self, message: Dict[str, Any]) -> None:
+        request_id: Optional[str] = message.get("request_id")
+        key = self.serial_key(message) if self.serial_key else None
+        try:
+            if key is None:
+                response = await self.handler(message)
+            else:
+                if isinstance(key, tuple) and key and key[0] == CONNECTION_SCOPE:
+                    key = (CONNECTION_SCOPE, self._scope, *key[1:])
+                # Locks hand over in arrival order: tasks are created, and so
+                # queue on the lock, in the order messages were submitted
+                release = await self._key_locks.acquire(key)
+                try:
+                    response = await self.handler(message)
+                finally:
+                    release()
+        except Exception as e:
+            logger.error(f"Request {request_id} failed: {str(e)}")
+            response = {"type": WSMessageType.ERROR, "data": {"message": str(e)}}
+
+        if request_id is not None:
+            response = {**response, "request_id": request_id}
+        await self.send(response)
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Send a message, serialised with any other sends on this connection"""
+        if self._closed:
+            return
+        async with self._send_lock:
+            try:
+                await self.codec.send(self.websocket, message)
+            except Exception as e:
+                logger.debug(f"Dropping response after send failure: {str(e)}")
+                self._closed = True
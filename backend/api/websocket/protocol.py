@@ -1,9 +1,11 @@
 from fastapi import WebSocket, WebSocketDisconnect
 from typing import AsyncIterator, Optional
-import asyncio
 import logging
 from models.websocket import WSMessage
+from api.websocket.codec import MessageCodec, JSONCodec, accept_with_codec
+from api.websocket.heartbeat import HeartbeatMonitor
 from datetime import datetime
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -16,62 +18,75 @@ class WebSocketProtocol:
 
     Features:
     - Connection state tracking
-    - Heartbeat mechanism (ping/pong)
-    - Message serialization/deserialization
+    - Heartbeat mechanism (ping/pong) via a shared HeartbeatMonitor
+    - Message serialization/deserialization (JSON or MessagePack, negotiated
+      through the Sec-WebSocket-Protocol handshake)
     - Async message iteration
     - Graceful connection closure
 
     Example:
-        protocol = WebSocketProtocol(websocket)
+        protocol = WebSocketProtocol(websocket, heartbeat_monitor=manager.heartbeat)
         await protocol.accept()
         async for message in protocol.iter_messages():
             # Handle message
     """
-    def __init__(self, websocket: WebSocket):
+    def __init__(self, websocket: WebSocket, heartbeat_monitor: Optional[HeartbeatMonitor] = None):
         self.websocket = websocket
         self.connected = False
-        self._ping_task: Optional[asyncio.Task] = None
+        self.heartbeat_monitor = heartbeat_monitor
+        self.connection_id = uuid.uuid4().hex
         self.last_heartbeat = datetime.now()
         self.user_id: Optional[str] = None
+        self.codec: MessageCodec = JSONCodec()
         
     async def accept(self) -> None:
-        await self.websocket.accept()
+        self.codec = await accept_with_codec(self.websocket)
         self.connected = True
-        self._ping_task = asyncio.create_task(self._ping_loop())
+        if self.heartbeat_monitor:
+            self.heartbeat_monitor.track(
+                self.connection_id,
+                ping=self._send_ping,
+                evict=lambda: self.close(code=4002)
+            )
         
-    async def _ping_loop(self) -> None:
-        while self.connected:
-            try:
-                await self.websocket.send_bytes(b'ping')
-                await asyncio.sleep(20)
-            except Exception:
-                break
+    async def _send_ping(self) -> None:
+        await self.codec.send(self.websocket, {
+            "type": "ping",
+            "timestamp": datetime.utcnow().isoformat()
+        })
                 
     async def iter_messages(self) -> AsyncIterator[WSMessage]:
         while self.connected:
             try:
-                data = await self.websocket.receive_text()
-                message = WSMessage.model_validate_json(data)
+                data = await self.codec.receive(self.websocket)
+                if self.heartbeat_monitor:
+                    self.heartbeat_monitor.touch(self.connection_id)
+                if data.get("type") == "pong":
+                    self.last_heartbeat = datetime.now()
+                    continue
+                message = WSMessage.model_validate(data)
                 yield message
             except WebSocketDisconnect:
                 self.connected = False
+                if self.heartbeat_monitor:
+                    self.heartbeat_monitor.untrack(self.connection_id)
                 break
                 
     async def send(self, message: dict) -> None:
         if self.connected:
-            await self.websocket.send_json(message)
+            await self.codec.send(self.websocket, message)
             
     async def close(self, code: int = 1000) -> None:
         self.connected = False
-        if self._ping_task:
-            self._ping_task.cancel()
+        if self.heartbeat_monitor:
+            self.heartbeat_monitor.untrack(self.connection_id)
         await self.websocket.close(code=code)
 
     async def send_json(self, data: dict):
-        await self.websocket.send_json(data)
+        await self.codec.send(self.websocket, data)
         
     async def receive_json(self) -> dict:
-        return await self.websocket.receive_json()
+        return await self.codec.receive(self.websocket)
         
     async def heartbeat(self):
         self.last_heartbeat = datetime.now()
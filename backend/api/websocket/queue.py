@@ -1,115 +1,311 @@
-from typing import Dict, Any, Callable, Awaitable, Optional
+from typing import Dict, Any, Callable, Awaitable, Optional, List, Deque, Tuple, Union
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
 import asyncio
 import logging
+import time
 from datetime import datetime
-from models.websocket import WSMessage
+from models.websocket import WSMessage, WSMessageType
 
 logger = logging.getLogger(__name__)
 
+# Priority lanes, served strictly in this order
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+LANE_COUNT = 3
+
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    WSMessageType.EMERGENCY.value: PRIORITY_HIGH,
+    WSMessageType.ERROR.value: PRIORITY_HIGH,
+    WSMessageType.POSITION_UPDATE.value: PRIORITY_HIGH,
+    WSMessageType.STRATEGY_SELECT.value: PRIORITY_NORMAL,
+    WSMessageType.STRATEGY_UPDATE.value: PRIORITY_NORMAL,
+    WSMessageType.MARKET_UPDATE.value: PRIORITY_LOW,
+    WSMessageType.MONITOR_UPDATE.value: PRIORITY_LOW,
+}
+
+# What put_message does when the queue is full
+OVERFLOW_REJECT = "reject"            # raise asyncio.QueueFull
+OVERFLOW_DROP_NEW = "drop_new"        # discard the incoming message
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # discard the oldest message of the lowest-priority lane
+
+MessageHandler = Callable[[Union[WSMessage, List[WSMessage]]], Awaitable[None]]
+
+
+@dataclass
+class _HandlerOptions:
+    concurrency: Optional[int] = None
+    batch_size: int = 1
+
+
+@dataclass
+class _QueuedMessage:
+    message: WSMessage
+    enqueued_at: float
+
+
+def _type_key(message_type: Any) -> str:
+    """Plain string key for a message type (str enums hash by member name)"""
+    return getattr(message_type, "value", message_type)
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 of latency samples (seconds), in milliseconds"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        name: round(ordered[min(last, int(q * len(ordered)))] * 1000, 3)
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+    }
+
+
 class MessageQueue:
     """
     Asynchronous message queue for handling WebSocket messages.
-    Provides message buffering and ordered processing.
+
+    Messages are sorted into priority lanes by type (emergency and position
+    messages ahead of market updates) and served by a pool of workers. Within a
+    lane, message types take turns so a burst of one type cannot starve the
+    others. Messages of one type are dequeued in arrival order, but with
+    several workers they may be handled concurrently; register a handler with
+    concurrency=1 to process its messages one after another. Handlers can cap
+    their own concurrency and can ask to receive messages in batches.
     """
-    
-    def __init__(self, max_size: int = 1000):
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        num_workers: int = 4,
+        overflow: str = OVERFLOW_REJECT,
+        priorities: Optional[Dict[str, int]] = None,
+        latency_samples: int = 1000
+    ):
         """
         Initialize message queue
-        
+
         Args:
-            max_size: Maximum queue size
+            max_size: Maximum number of queued messages across all lanes
+            num_workers: Number of concurrent worker tasks
+            overflow: Full-queue policy: "reject", "drop_new" or "drop_oldest"
+            priorities: Message type to lane overrides (0 = highest)
+            latency_samples: Number of recent latency samples kept for stats
         """
-        self.queue = asyncio.Queue(maxsize=max_size)
-        self.handlers: Dict[str, Callable[[WSMessage], Awaitable[None]]] = {}
-        self._processor_task: Optional[asyncio.Task] = None
+        if overflow not in (OVERFLOW_REJECT, OVERFLOW_DROP_NEW, OVERFLOW_DROP_OLDEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.max_size = max_size
+        self.num_workers = num_workers
+        self.overflow = overflow
+        self.priorities: Dict[str, int] = dict(DEFAULT_PRIORITIES)
+        self.priorities.update({_type_key(k): v for k, v in (priorities or {}).items()})
+        self.handlers: Dict[str, MessageHandler] = {}
+        self._options: Dict[str, _HandlerOptions] = {}
+        self._lanes: List["OrderedDict[str, Deque[_QueuedMessage]]"] = [
+            OrderedDict() for _ in range(LANE_COUNT)
+        ]
+        self._size = 0
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._condition = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
         self._running = False
-        
+        self._wait_latency: Deque[float] = deque(maxlen=latency_samples)
+        self._handle_latency: Deque[float] = deque(maxlen=latency_samples)
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rejected = 0
+
     async def start(self):
         """Start message processing"""
         if not self._running:
             self._running = True
-            self._processor_task = asyncio.create_task(self._process_messages())
-            logger.info("Message queue processor started")
-            
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.num_workers)
+            ]
+            logger.info(f"Message queue started with {self.num_workers} workers")
+
     async def stop(self):
         """Stop message processing"""
         self._running = False
-        if self._processor_task:
-            self._processor_task.cancel()
-            try:
-                await self._processor_task
-            except asyncio.CancelledError:
-                pass
-            self._processor_task = None
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
             logger.info("Message queue processor stopped")
-            
+
+    async def join(self):
+        """Wait until every queued message has been handled"""
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._size == 0 and not any(self._in_flight.values())
+            )
+
     def register_handler(
         self,
         message_type: str,
-        handler: Callable[[WSMessage], Awaitable[None]]
+        handler: MessageHandler,
+        concurrency: Optional[int] = None,
+        batch_size: int = 1,
+        priority: Optional[int] = None
     ):
         """
         Register a message handler
-        
+
         Args:
             message_type: Type of message to handle
-            handler: Async handler function
+            handler: Async handler function; receives a list of messages when
+                batch_size > 1, otherwise a single message
+            concurrency: Maximum concurrent invocations of this handler
+            batch_size: Maximum messages per invocation
+            priority: Lane for this message type, overriding the default
         """
+        message_type = _type_key(message_type)
         self.handlers[message_type] = handler
+        self._options[message_type] = _HandlerOptions(
+            concurrency=concurrency,
+            batch_size=max(1, batch_size)
+        )
+        if priority is not None:
+            self.priorities[message_type] = min(max(priority, 0), LANE_COUNT - 1)
         logger.info(f"Registered handler for message type: {message_type}")
-        
-    async def put_message(self, message: WSMessage):
+
+    async def put_message(self, message: WSMessage) -> bool:
         """
-        Add message to queue
-        
+        Add message to queue without waiting for space
+
         Args:
             message: Message to queue
+
+        Returns:
+            True if the message was queued, False if it was dropped
+
+        Raises:
+            asyncio.QueueFull: When the queue is full and the policy is "reject"
         """
-        try:
-            await self.queue.put(message)
-        except asyncio.QueueFull:
-            logger.error("Message queue full, dropping message")
-            
-    async def _process_messages(self):
-        """Process messages from queue"""
+        message_type = _type_key(message.type)
+        lane = self.priorities.get(message_type, PRIORITY_NORMAL)
+        async with self._condition:
+            if self._size >= self.max_size and not self._make_room(lane):
+                if self.overflow == OVERFLOW_REJECT:
+                    self.rejected += 1
+                    logger.warning(f"Message queue full, rejecting {message_type} message")
+                    raise asyncio.QueueFull()
+                self.dropped += 1
+                logger.warning(f"Message queue full, dropping {message_type} message")
+                return False
+            self._lanes[lane].setdefault(message_type, deque()).append(
+                _QueuedMessage(message=message, enqueued_at=time.monotonic())
+            )
+            self._size += 1
+            self._condition.notify()
+        return True
+
+    def _make_room(self, incoming_lane: int) -> bool:
+        """Apply drop_oldest: evict from the lowest lane not above the incoming one"""
+        if self.overflow != OVERFLOW_DROP_OLDEST:
+            return False
+        for lane in range(LANE_COUNT - 1, incoming_lane - 1, -1):
+            if not self._lanes[lane]:
+                continue
+            # Types rotate as they are served, so the first type's head is
+            # not necessarily the lane's oldest message
+            message_type, pending = min(self._lanes[lane].items(), key=lambda item: item[1][0].enqueued_at)
+            pending.popleft()
+            if not pending:
+                del self._lanes[lane][message_type]
+            self._size -= 1
+            self.dropped += 1
+            logger.warning(f"Message queue full, dropped oldest {message_type} message")
+            return True
+        return False
+
+    def _take_batch(self) -> Optional[Tuple[str, List[_QueuedMessage]]]:
+        """Pop the next batch from the highest non-empty lane, honouring concurrency caps"""
+        for lane in self._lanes:
+            for message_type, pending in lane.items():
+                options = self._options.get(message_type, _HandlerOptions())
+                if options.concurrency and self._in_flight[message_type] >= options.concurrency:
+                    continue
+                batch = [pending.popleft() for _ in range(min(options.batch_size, len(pending)))]
+                if pending:
+                    lane.move_to_end(message_type)
+                else:
+                    del lane[message_type]
+                self._size -= len(batch)
+                self._in_flight[message_type] += 1
+                return message_type, batch
+        return None
+
+    async def _worker(self):
+        """Take batches off the lanes and dispatch them"""
         while self._running:
             try:
-                message = await self.queue.get()
-                
+                async with self._condition:
+                    taken = self._take_batch()
+                    while taken is None:
+                        await self._condition.wait()
+                        taken = self._take_batch()
+                message_type, batch = taken
                 try:
-                    await self._handle_message(message)
-                except Exception as e:
-                    logger.error(f"Error processing message: {str(e)}")
+                    await self._handle_batch(message_type, batch)
                 finally:
-                    self.queue.task_done()
-                    
+                    async with self._condition:
+                        self._in_flight[message_type] -= 1
+                        self._condition.notify_all()
+
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in message processor: {str(e)}")
                 await asyncio.sleep(1)  # Prevent tight loop on error
-                
-    async def _handle_message(self, message: WSMessage):
+
+    async def _handle_batch(self, message_type: str, batch: List[_QueuedMessage]):
         """
-        Handle a single message
-        
+        Handle a batch of messages of one type
+
         Args:
-            message: Message to handle
+            message_type: Type shared by every message in the batch
+            batch: Queued messages, oldest first
         """
-        handler = self.handlers.get(message.type)
-        if handler:
-            try:
-                await handler(message)
-            except Exception as e:
-                logger.error(f"Error in message handler: {str(e)}")
-        else:
-            logger.warning(f"No handler for message type: {message.type}")
-            
+        started = time.monotonic()
+        for item in batch:
+            self._wait_latency.append(started - item.enqueued_at)
+
+        handler = self.handlers.get(message_type)
+        if not handler:
+            logger.warning(f"No handler for message type: {message_type}")
+            self.dropped += len(batch)
+            return
+
+        try:
+            if self._options[message_type].batch_size > 1:
+                await handler([item.message for item in batch])
+            else:
+                await handler(batch[0].message)
+            self.processed += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Error in message handler: {str(e)}")
+        finally:
+            self._handle_latency.append(time.monotonic() - started)
+
     async def get_queue_stats(self) -> Dict[str, Any]:
         """Get queue statistics"""
         return {
-            "queue_size": self.queue.qsize(),
+            "queue_size": self._size,
+            "lane_sizes": [sum(len(p) for p in lane.values()) for lane in self._lanes],
             "handlers": list(self.handlers.keys()),
+            "workers": len(self._workers),
+            "in_flight": {k: v for k, v in self._in_flight.items() if v},
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "wait_latency_ms": _percentiles(self._wait_latency),
+            "handle_latency_ms": _percentiles(self._handle_latency),
             "running": self._running,
             "timestamp": datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+        }
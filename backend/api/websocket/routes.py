@@ -3,23 +3,18 @@ import os
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 # Comment out the auth dependency import for hackathon purposes
 # from api.middleware.auth import ws_auth
-from services.websocket import WebSocketService
-from services.vault_service import VaultService
-from core.manager.agent import AgentManager
-from services.monitor import StrategyMonitor
+from core.container import get_container
 from api.dependencies import get_connection_manager
 from api.websocket.manager import manager
-from services.price_feed import PriceFeed
+from api.websocket.codec import accept_with_codec
+from api.websocket.pipeline import RequestPipeline
+from config.settings import get_settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Instantiate shared service instances.
-vault_service = VaultService()
-agent_manager = AgentManager()
-price_feed_instance = PriceFeed()
-monitor = StrategyMonitor(manager, price_feed_instance)
-ws_service = WebSocketService(vault_service, agent_manager, monitor)
+# Services (WebSocketService, rate limiter, ...) live in the application-wide
+# container, which the lifespan builds at startup; nothing is built on import.
 
 """
 WebSocket Route Handler
@@ -57,22 +52,44 @@ async def agent_websocket(websocket: WebSocket, client_id: str):
     logger.info("Disabled auth route is now active (using dummy users)")
     logger.info(f"Running from: {os.path.abspath(__file__)}")
     logger.info(f"User connected as: {dummy_user['id']}")
+    container = get_container()
+    ws_service = container.ws_service
+    rate_limiter = container.rate_limiter
     
-    await websocket.accept()
+    async def handle(message: dict) -> dict:
+        #response = await ws_service.handle_message(message_type, data, user["id"])
+
+        # Use dummy_user["id"] where you'd normally use the authenticated user's ID.
+        response = await ws_service.handle_message(
+            message.get("type"),
+            message.get("data", {}),
+            dummy_user["id"]
+        )
+        logger.info(f"Sending response to {dummy_user['id']}: {response}")
+        return response
+
+    codec = await accept_with_codec(websocket)
+    # Each message runs in its own task; responses carry the client's request_id
+    pipeline = RequestPipeline(
+        websocket,
+        codec,
+        handle,
+        max_in_flight=get_settings().WS_MAX_IN_FLIGHT
+    )
     try:
         while True:
-            message = await websocket.receive_json()
+            message = await codec.receive(websocket)
             # Optional: log the received message to observe behavior per user.
             logger.info(f"Received message from {dummy_user['id']}: {message}")
-            message_type = message.get("type")
-            data = message.get("data", {})
-            #response = await ws_service.handle_message(message_type, data, user["id"])
-            
-            # Use dummy_user["id"] where you'd normally use the authenticated user's ID.
-            response = await ws_service.handle_message(message_type, data, dummy_user["id"])
-            logger.info(f"Sending response to {dummy_user['id']}: {response}")
-            await websocket.send_json(response)
+            if not await rate_limiter.is_allowed(dummy_user["id"], action=message.get("type")):
+                rejection = {"type": "error", "data": {"message": "Rate limit exceeded"}}
+                if message.get("request_id") is not None:
+                    rejection["request_id"] = message["request_id"]
+                await pipeline.send(rejection)
+                continue
+            await pipeline.submit(message)
     except WebSocketDisconnect:
+        pipeline.close()
         logger.info(f"WebSocket disconnected for user: {dummy_user['id']}")
 
 
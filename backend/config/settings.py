@@ -18,6 +18,7 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-jwt-secret-key-here")
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))  # verified tokens kept in memory
     
     # Database
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
@@ -25,6 +26,9 @@ class Settings(BaseSettings):
     # Web3 Settings
     WEB3_PROVIDER_URI: str = os.getenv("WEB3_PROVIDER_URI", "http://localhost:8545")
     CHAIN_ID: int = int(os.getenv("CHAIN_ID", "1"))
+    GAS_SPEED: str = os.getenv("GAS_SPEED", "standard")  # "slow", "standard" or "fast"
+    FEE_HISTORY_BLOCKS: int = int(os.getenv("FEE_HISTORY_BLOCKS", "20"))  # blocks sampled for priority fees
+    GAS_LIMIT_MARGIN: float = float(os.getenv("GAS_LIMIT_MARGIN", "1.2"))  # multiplier on estimated gas
     
     # Morpho Protocol Settings
     MORPHO_CONTRACT_ADDRESS: str = os.getenv("MORPHO_CONTRACT_ADDRESS", "")
@@ -36,21 +40,61 @@ class Settings(BaseSettings):
     CDP_API_KEY_NAME: str = os.getenv("CDP_API_KEY_NAME", "")
     CDP_API_KEY_PRIVATE_KEY: str = os.getenv("CDP_API_KEY_PRIVATE_KEY", "")
     NETWORK_ID: str = os.getenv("NETWORK_ID", "base-sepolia")
+    CDP_EXECUTOR_WORKERS: int = int(os.getenv("CDP_EXECUTOR_WORKERS", "8"))  # threads for blocking CDP SDK calls
+    CDP_CALL_TIMEOUT: float = float(os.getenv("CDP_CALL_TIMEOUT", "120"))  # seconds, covers on-chain confirmation
     
     # LLM Settings
     LLM_MODEL: str = os.environ.get("LLM_MODEL", "gpt-4o")
+    DECISION_MODEL: str = os.getenv("DECISION_MODEL", "openai")  # "openai" (LLM_MODEL) or "deterministic" (offline stand-in)
+    DECISION_CACHE_TTL: float = float(os.getenv("DECISION_CACHE_TTL", "300"))  # seconds an answer is reused for the same situation
+    DECISION_BATCH_SIZE: int = int(os.getenv("DECISION_BATCH_SIZE", "32"))  # agent prompts per model call
+    DECISION_BATCH_WAIT_MS: float = float(os.getenv("DECISION_BATCH_WAIT_MS", "20"))  # wait for more prompts before a call
 
     #DATABASE SETTINGS
     MONGODB_URL: str = os.getenv("MONGODB_URL")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME")
+    DB_CREATE_INDEXES: bool = os.getenv("DB_CREATE_INDEXES", "True").lower() == "true"  # build missing indexes at startup
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))  # wait for a free pooled connection
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+    METRICS_BACKEND: str = os.getenv("METRICS_BACKEND", "mongo")  # "mongo" or "memory"
+    METRICS_FLUSH_INTERVAL: float = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))  # seconds
+    METRICS_RAW_RETENTION: int = int(os.getenv("METRICS_RAW_RETENTION", str(7 * 86400)))  # seconds raw samples are kept
+    JOURNAL_BACKEND: str = os.getenv("JOURNAL_BACKEND", "mongo")  # "mongo" or "memory"
+    JOURNAL_MAX_ATTEMPTS: int = int(os.getenv("JOURNAL_MAX_ATTEMPTS", "3"))  # tries per leverage-loop step
+    AGENT_SNAPSHOT_BACKEND: str = os.getenv("AGENT_SNAPSHOT_BACKEND", "mongo")  # "mongo", "file" or "none"
+    AGENT_SNAPSHOT_PATH: str = os.getenv("AGENT_SNAPSHOT_PATH", "data/agent_snapshots.jsonl")  # file backend
+    AGENT_SNAPSHOT_INTERVAL: float = float(os.getenv("AGENT_SNAPSHOT_INTERVAL", "30"))  # seconds
+    AGENT_WORKERS: int = int(os.getenv("AGENT_WORKERS", "0"))  # agent shard processes; 0 runs agents in the API process
+    AGENT_WORKER_HEARTBEAT: float = float(os.getenv("AGENT_WORKER_HEARTBEAT", "5"))  # seconds between worker heartbeats
+    AGENT_WORKER_TIMEOUT: float = float(os.getenv("AGENT_WORKER_TIMEOUT", "30"))  # silence before a worker is restarted
+    DB_CACHE_TTL: float = float(os.getenv("DB_CACHE_TTL", "30"))  # seconds
+    DB_CACHE_SIZE: int = int(os.getenv("DB_CACHE_SIZE", "10000"))
+    DB_CACHE_WATCH_CHANGES: bool = os.getenv("DB_CACHE_WATCH_CHANGES", "False").lower() == "true"
+    DB_WRITE_BEHIND: bool = os.getenv("DB_WRITE_BEHIND", "True").lower() == "true"
+    DB_WRITE_WINDOW: float = float(os.getenv("DB_WRITE_WINDOW", "0.25"))  # seconds a vault must be quiet before writing
+    DB_WRITE_MAX_AGE: float = float(os.getenv("DB_WRITE_MAX_AGE", "2"))  # seconds a buffered change may wait
     
     # Add WebSocket settings
     WS_HEARTBEAT_INTERVAL: int = 30  # seconds
     WS_CONNECTION_TIMEOUT: int = 60  # seconds
+    WS_MAX_MISSED_PONGS: int = int(os.getenv("WS_MAX_MISSED_PONGS", "2"))
+    WS_QUEUE_MAX_SIZE: int = int(os.getenv("WS_QUEUE_MAX_SIZE", "1000"))
+    WS_QUEUE_WORKERS: int = int(os.getenv("WS_QUEUE_WORKERS", "4"))
+    WS_RATE_LIMIT: int = int(os.getenv("WS_RATE_LIMIT", "60"))  # messages per minute per client
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+    WS_MAX_IN_FLIGHT: int = int(os.getenv("WS_MAX_IN_FLIGHT", "8"))  # concurrent requests per connection
+    WS_BACKPLANE: str = os.getenv("WS_BACKPLANE", "memory")  # "memory" or "redis"
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
     
     # New field
     VAULT_FACTORY_ADDRESS: str = os.getenv("VAULT_FACTORY_ADDRESS")
     DEPLOYER_PRIVATE_KEY: str = os.getenv("DEPLOYER_PRIVATE_KEY")
+    VAULT_DEPLOY_CONCURRENCY: int = int(os.getenv("VAULT_DEPLOY_CONCURRENCY", "16"))  # background deployments in flight
+    VAULT_DEPLOY_ATTEMPTS: int = int(os.getenv("VAULT_DEPLOY_ATTEMPTS", "3"))  # tries before a vault is marked failed
    
 
     class Config:
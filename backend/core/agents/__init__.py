@@ -1,11 +1,20 @@
 """
 Agents package initialization
+
+MorphoAgent pulls in langchain and the CDP SDK, so it is imported on first
+attribute access rather than with the package.
 """
 
 from .base_agent import BaseAgent
-from .morpho.agent import MorphoAgent
 
 __all__ = [
     "BaseAgent",
     "MorphoAgent",
 ]
+
+
+def __getattr__(name):
+    if name == "MorphoAgent":
+        from .morpho.agent import MorphoAgent
+        return MorphoAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
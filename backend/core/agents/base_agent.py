@@ -115,13 +115,17 @@ class BaseAgent(ABC):
         Update agent's performance metrics.
         """
         try:
-            # Implement performance metric calculation logic here
-            self.performance_metrics.update({
-                "pnl": 0.0,  # Calculate actual PnL
-                "roi": 0.0,  # Calculate actual ROI
-                "sharpe_ratio": 0.0,  # Calculate Sharpe ratio
-                "max_drawdown": 0.0,  # Calculate max drawdown
-            })
+            # Computed from the equity time series when the agent records one
+            monitor = getattr(self, "performance_monitor", None)
+            if monitor is None:
+                self.performance_metrics.update({
+                    "pnl": 0.0,
+                    "roi": 0.0,
+                    "sharpe_ratio": 0.0,
+                    "max_drawdown": 0.0,
+                })
+                return
+            self.performance_metrics.update(await monitor.get_performance())
         except Exception as e:
             self.logger.error(f"Error updating performance metrics: {str(e)}")
     
@@ -1,9 +1,12 @@
 """
 Morpho agents package initialization
+
+The agent and its actions import langchain, web3 and the CDP SDK; they are
+loaded on first attribute access so importing a component stays cheap.
 """
 
-from .agent import MorphoAgent
-from .actions import borrow, leverage, repay
+import importlib
+
 from .components import (
     data_collector,
     decision_maker,
@@ -14,6 +17,13 @@ from .components import (
     strategy_analyzer,
 )
 
+_LAZY = {
+    "MorphoAgent": (".agent", "MorphoAgent"),
+    "borrow": (".actions.borrow", None),
+    "leverage": (".actions.leverage", None),
+    "repay": (".actions.repay", None),
+}
+
 __all__ = [
     "MorphoAgent",
     "borrow",
@@ -26,4 +36,14 @@ __all__ = [
     "position_manager",
     "risk_manager",
     "strategy_analyzer",
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY[name]
+    module = importlib.import_module(module_name, __name__)
+    value = getattr(module, attribute) if attribute else module
+    globals()[name] = value
+    return value
@@ -1,31 +1,27 @@
 from datetime import datetime
+import json
 from typing import Dict, Any, Optional, Set, List
 from decimal import Decimal
 
 from cdp import Wallet
 from config.settings import get_settings
-from core.agents.morpho.actions.repay import MORPHO_REPAY_PROMPT, morpho_repay
 from fastapi import WebSocket
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from cdp_langchain.agent_toolkits import CdpToolkit
 from cdp_langchain.utils import CdpAgentkitWrapper
 from core.agents.base_agent import BaseAgent
 from services.price_feed import PriceFeed
+from services.metrics import EQUITY_METRIC, get_metrics_pipeline
+from services.decision_llm import DecisionLLM, get_decision_llm
 from enum import Enum
 import logging
 import asyncio
-from langchain.schema import HumanMessage
-from cdp_langchain.tools import CdpTool
-from core.agents.morpho.actions.borrow import MorphoBorrowInput, morpho_borrow, MORPHO_BORROW_PROMPT
-from core.agents.morpho.actions.leverage import MORPHO_LEVERAGE_PROMPT, MorphoLeverageInput, morpho_leverage
-from core.agents.morpho.actions.repay import MorphoRepayInput, morpho_repay
+from core.agents.morpho.tools import AgentTools, get_tool_registry
+from services.cdp_executor import get_cdp_executor
+from pydantic_core import to_jsonable_python
 from cdp_agentkit_core.actions.morpho.deposit import MorphoDepositInput, deposit_to_morpho
 from cdp_agentkit_core.actions.morpho.withdraw import MorphoWithdrawInput, withdraw_from_morpho
 
 # Agent components
 from core.agents.morpho.components.data_collector import DataCollector
-from core.agents.morpho.components.decision_maker import DecisionMaker
 from core.agents.morpho.components.emergency_handler import EmergencyHandler
 from core.agents.morpho.components.performance_monitor import PerformanceMonitor
 from core.agents.morpho.components.position_manager import PositionManager
@@ -62,19 +58,21 @@ class MorphoAgent(BaseAgent):
         self.safety_buffer = Decimal(strategy_params.get("safety_buffer", "0.05"))
         self.min_apy_spread = Decimal(strategy_params.get("min_apy_spread", "0.02"))
         
-        # Initialize CDP integration
-        self.cdp_wrapper = CdpAgentkitWrapper(
-            wallet_data=strategy_params.get("wallet_data"),
-            api_key_name=self.settings.CDP_API_KEY_NAME,
-            private_key=self.settings.CDP_API_KEY_PRIVATE_KEY
-        )
-        self._setup_cdp_tools()
+        # CDP integration: configuring the wallet makes blocking SDK calls, so
+        # it happens in connect_wallet() (initialize or first trade), not here
+        self._cdp_wrapper: Optional[CdpAgentkitWrapper] = None
+        self._tools: Optional[AgentTools] = None
+        self._decision_llm: Optional[DecisionLLM] = None
+        # Wallet record id; snapshots keep this instead of the wallet data
+        self._wallet_id: Optional[str] = self._wallet_record_id(strategy_params.get("wallet_data"))
         
         # Initialize strategy components
         self.data_collector = DataCollector(settings)
-        self.decision_maker = DecisionMaker(settings)
         self.emergency_handler = EmergencyHandler(settings)
-        self.performance_monitor = PerformanceMonitor()
+        self.performance_monitor = PerformanceMonitor(
+            agent_id=strategy_params.get("vault_id"),
+            pipeline=get_metrics_pipeline()
+        )
         self.position_manager = PositionManager()
         self.risk_manager = RiskManager(settings)
         self.strategy_analyzer = StrategyAnalyzer(settings)
@@ -85,32 +83,118 @@ class MorphoAgent(BaseAgent):
         self.last_rebalance = None
         self.active_connections: Set[WebSocket] = set()
 
-    def _setup_cdp_tools(self):
-        """Initialize CDP toolkit and Morpho-specific tools"""
-        cdp_toolkit = CdpToolkit.from_cdp_agentkit_wrapper(self.cdp_wrapper)
-        self.tools = cdp_toolkit.get_tools()
-        
-        # Add Morpho-specific tools
-        morpho_tools = [
-            self._create_morpho_tool("morpho_borrow", MorphoBorrowInput, morpho_borrow),
-            self._create_morpho_tool("morpho_leverage", MorphoLeverageInput, morpho_leverage),
-            self._create_morpho_tool("morpho_repay", MorphoRepayInput, morpho_repay)
-        ]
-        self.tools.extend(morpho_tools)
+    @property
+    def cdp_wrapper(self) -> CdpAgentkitWrapper:
+        """CDP wallet wrapper (configured here if connect_wallet has not run)"""
+        if self._cdp_wrapper is None:
+            self._cdp_wrapper = self._create_cdp_wrapper()
+        return self._cdp_wrapper
+
+    @property
+    def tools(self) -> AgentTools:
+        # Tool definitions are shared by all agents; this only binds our wallet
+        if self._tools is None:
+            self._tools = get_tool_registry().bind(self.cdp_wrapper)
+        return self._tools
+
+    @property
+    def decision_llm(self) -> DecisionLLM:
+        """Cached, batched decision model (shared by every agent in the process)"""
+        if self._decision_llm is None:
+            self._decision_llm = get_decision_llm()
+        return self._decision_llm
+
+    def _exported_wallet_data(self) -> Optional[str]:
+        """
+        CDP wallet export (wallet_id and seed) from the strategy params, as JSON
+
+        strategy_select passes the models.wallet.Wallet record from
+        create_agent_wallet, which carries no seed; with nothing to import
+        the wrapper creates the wallet itself.
+        """
+        wallet_data = self.strategy_params.get("wallet_data")
+        if isinstance(wallet_data, str):
+            return wallet_data or None
+        if isinstance(wallet_data, dict) and "wallet_id" in wallet_data and "seed" in wallet_data:
+            return json.dumps(wallet_data)
+        return None
 
-    def _create_morpho_tool(self, name: str, input_schema: Any, func: Any):
-        """Create a Morpho-specific CDP tool"""
-        return CdpTool(
-            name=name,
-            description=f"Execute {name} operation on Morpho",
-            cdp_agentkit_wrapper=self.cdp_wrapper,
-            args_schema=input_schema,
-            func=func
+    @staticmethod
+    def _wallet_record_id(wallet_data: Any) -> Optional[str]:
+        if isinstance(wallet_data, dict):
+            return wallet_data.get("id")
+        return getattr(wallet_data, "id", None)
+
+    async def _load_wallet_data(self) -> None:
+        """Reload wallet_data left out of a snapshot from the agent's wallet record"""
+        from services.database import get_database_service
+        wallet = await get_database_service().get_agent_wallet(self._wallet_id)
+        if wallet is None:
+            self.logger.warning(f"Wallet record {self._wallet_id} not found")
+            return
+        self.strategy_params["wallet_data"] = wallet.wallet_data
+
+    def _create_cdp_wrapper(self) -> CdpAgentkitWrapper:
+        return CdpAgentkitWrapper(
+            cdp_wallet_data=self._exported_wallet_data(),
+            cdp_api_key_name=self.settings.CDP_API_KEY_NAME,
+            cdp_api_key_private_key=self.settings.CDP_API_KEY_PRIVATE_KEY,
+            network_id=self.settings.NETWORK_ID
         )
-    
+
+    async def connect_wallet(self) -> None:
+        """Configure the CDP wallet on the CDP pool, once"""
+        if self._cdp_wrapper is None:
+            if "wallet_data" not in self.strategy_params and self._wallet_id:
+                await self._load_wallet_data()
+            wrapper = await get_cdp_executor().run(self._create_cdp_wrapper)
+            if self._cdp_wrapper is None:
+                self._cdp_wrapper = wrapper
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Compact, JSON-safe agent state for a warm restart (see from_snapshot)
+
+        Holds what the agent accumulates while running; components, the
+        wallet connection and market feeds are rebuilt on restore. Wallet
+        data (possibly an exported seed) is not stored: only the wallet
+        record id, from which connect_wallet() reloads it.
+        """
+        strategy_params = {key: value for key, value in self.strategy_params.items() if key != "wallet_data"}
+        return to_jsonable_python({
+            "strategy_params": strategy_params,
+            "wallet_id": self._wallet_id,
+            "current_position": self.current_position,
+            "last_rebalance": self.last_rebalance,
+            "market_data": self.market_data,
+            "positions": self.position_manager.positions,
+            "metrics": self.performance_monitor.metrics,
+            "performance_metrics": self.performance_metrics
+        }, fallback=str)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any], settings: Any) -> "MorphoAgent":
+        """
+        Rebuild an agent from snapshot() without running initialize()
+
+        The wallet is connected on the first trade and market data is
+        refreshed by the next analyze_market().
+        """
+        agent = cls(strategy_params=snapshot["strategy_params"], settings=settings)
+        agent._wallet_id = snapshot.get("wallet_id")
+        agent.current_position = snapshot.get("current_position")
+        last_rebalance = snapshot.get("last_rebalance")
+        agent.last_rebalance = datetime.fromisoformat(last_rebalance) if last_rebalance else None
+        agent.market_data = snapshot.get("market_data") or {}
+        agent.position_manager.positions = snapshot.get("positions") or {}
+        agent.performance_monitor.metrics = snapshot.get("metrics") or {}
+        agent.performance_metrics = snapshot.get("performance_metrics") or {}
+        return agent
+
     async def initialize(self) -> bool:
         """Initialize the agent by validating the market data feed and preloading market data."""
         try:
+            await self.connect_wallet()
             await self.price_feed.validate_connection()
             self.market_data = await self.data_collector.fetch_market_data()
             self.logger.info("Morpho Agent initialized successfully.")
@@ -147,6 +231,10 @@ class MorphoAgent(BaseAgent):
             
             self.market_data = analysis
             self.performance_monitor.record_metric("market_analysis", analysis)
+            # PnL, ROI, Sharpe and drawdown are computed from this series
+            equity = self.position_equity(market_data.get("price"))
+            if equity is not None:
+                self.performance_monitor.record_metric(EQUITY_METRIC, equity)
             return analysis
             
         except Exception as e:
@@ -154,6 +242,29 @@ class MorphoAgent(BaseAgent):
             await self.emergency_handler.handle_emergency(e)
             return {}
     
+    def position_equity(self, collateral_price: Optional[float]) -> Optional[float]:
+        """
+        Value of the current position net of debt, in the debt token (USDC)
+
+        Args:
+            collateral_price: Price of the collateral token in the debt token
+
+        Returns:
+            Collateral value minus debt; None without a position (an opened
+            position is capital moved in, not profit) or when the position and
+            price do not say enough to value it
+        """
+        position = self.current_position
+        if not position:
+            return None
+        debt = float(position.get("debt", position.get("borrowed_amount", 0)) or 0)
+        if position.get("collateral_value") is not None:
+            return float(position["collateral_value"]) - debt
+        collateral = position.get("collateral")
+        if collateral is None or not collateral_price:
+            return None
+        return float(collateral) * float(collateral_price) - debt
+
     async def make_decision(self) -> Dict[str, Any]:
         """
         Make strategy decisions based on:
@@ -174,14 +285,23 @@ class MorphoAgent(BaseAgent):
             apy_spread = Decimal(self.market_data.get("apy_spread", 0))
             risk_level = Decimal(self.market_data.get("risk_metrics", {}).get("total_risk", 1))
             
-            decision = self.decision_maker.make_decision({
-                "current_ltv": float(current_ltv),
-                "target_ltv": float(self.target_ltv),
-                "apy_spread": float(apy_spread),
-                "risk_level": float(risk_level),
-                "position_data": position_data,
-                "market_data": self.market_data
-            })
+            # Agents in the same situation share one cached model answer
+            decision = await self.decision_llm.decide(
+                {
+                    "strategy_id": self.strategy_params.get("strategy_id"),
+                    "target_ltv": float(self.target_ltv),
+                    "max_leverage": float(self.max_leverage),
+                    "safety_buffer": float(self.safety_buffer),
+                    "min_apy_spread": float(self.min_apy_spread),
+                    "initial_deposit": self.strategy_params.get("initial_deposit")
+                },
+                {
+                    "current_ltv": float(current_ltv),
+                    "apy_spread": float(apy_spread),
+                    "risk_level": float(risk_level),
+                    "has_position": position_data is not None
+                }
+            )
             
             self.logger.info(f"Strategy decision: {decision}")
             return decision
@@ -244,18 +364,16 @@ class MorphoAgent(BaseAgent):
             await self.emergency_handler.handle_emergency(e)
             return False
     
+    async def handle_error(self, error: Exception) -> None:
+        """Hand errors to the emergency handler"""
+        self.emergency_handler.handle_emergency(error)
+
     # --- CDP AgentKit Action Methods ---
     async def execute_borrow(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute borrow via CDP AgentKit's morpho_borrow tool."""
         try:
-            borrow_input = MorphoBorrowInput(**params)
-            borrow_tool = next(tool for tool in self.tools if tool.name == "morpho_borrow")
-            result = await borrow_tool.arun(
-                collateral_token=borrow_input.collateral_token,
-                debt_token=borrow_input.debt_token,
-                borrow_amount=borrow_input.borrow_amount,
-                max_slippage=borrow_input.max_slippage
-            )
+            await self.connect_wallet()
+            result = await self.tools.arun("morpho_borrow", params)
             self.logger.info(f"Borrow result: {result}")
             return result
         except Exception as e:
@@ -265,14 +383,8 @@ class MorphoAgent(BaseAgent):
     async def execute_leverage(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute leverage adjustment via CDP AgentKit's morpho_leverage tool."""
         try:
-            leverage_input = MorphoLeverageInput(**params)
-            leverage_tool = next(tool for tool in self.tools if tool.name == "morpho_leverage")
-            result = await leverage_tool.arun(
-                position_id=leverage_input.position_id,
-                target_leverage=leverage_input.target_leverage,
-                action_type=leverage_input.action_type,
-                max_slippage=leverage_input.max_slippage
-            )
+            await self.connect_wallet()
+            result = await self.tools.arun("morpho_leverage", params)
             self.logger.info(f"Leverage result: {result}")
             return result
         except Exception as e:
@@ -282,14 +394,8 @@ class MorphoAgent(BaseAgent):
     async def execute_repay(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute repay via CDP AgentKit's morpho_repay tool."""
         try:
-            repay_input = MorphoRepayInput(**params)
-            repay_tool = next(tool for tool in self.tools if tool.name == "morpho_repay")
-            result = await repay_tool.arun(
-                position_id=repay_input.position_id,
-                repay_amount=repay_input.repay_amount,
-                withdraw_collateral=repay_input.withdraw_collateral,
-                max_slippage=repay_input.max_slippage
-            )
+            await self.connect_wallet()
+            result = await self.tools.arun("morpho_repay", params)
             self.logger.info(f"Repay result: {result}")
             return result
         except Exception as e:
@@ -1,25 +1,43 @@
 # Metrics and performance tracking
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from services.metrics import MetricsPipeline, numeric_fields
 
 class PerformanceMonitor:
     """
     Tracks metrics and performance of the trading agent.
+
+    The latest value of each metric is kept in memory; with a metrics pipeline,
+    every numeric field of every recorded value is also appended to the
+    agent's time series, so per-tick history survives the next tick.
     """
-    def __init__(self):
+    def __init__(self, agent_id: Optional[str] = None, pipeline: Optional[MetricsPipeline] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.metrics = {}
+        self.agent_id = agent_id
+        self.pipeline = pipeline
 
     def record_metric(self, name: str, value: Any) -> None:
         """
         Record a performance metric.
         """
-        self.logger.info(f"Recording metric '{name}': {value}")
+        self.logger.debug(f"Recording metric '{name}': {value}")
         self.metrics[name] = value
+        if self.pipeline is not None and self.agent_id:
+            for field, number in numeric_fields(value, name):
+                self.pipeline.record(self.agent_id, field, number)
 
     def get_metrics(self) -> Dict[str, Any]:
         """
         Retrieve recorded metrics.
         """
-        return self.metrics
\ No newline at end of file
+        return self.metrics
+
+    async def get_performance(self, resolution: str = "1h") -> Dict[str, float]:
+        """
+        PnL, ROI, Sharpe ratio and max drawdown of the agent's equity series.
+        """
+        if self.pipeline is None or not self.agent_id:
+            return {"pnl": 0.0, "roi": 0.0, "sharpe_ratio": 0.0, "max_drawdown": 0.0}
+        return await self.pipeline.get_performance(self.agent_id, resolution=resolution)
@@ -0,0 +1,135 @@
+import inspect
+import logging
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from cdp_agentkit_core.actions import CDP_ACTIONS, CdpAction
+from cdp_langchain.tools import CdpTool
+from cdp_langchain.utils import CdpAgentkitWrapper
+
+from core.agents.morpho.actions.borrow import MORPHO_BORROW_PROMPT, MorphoBorrowInput, morpho_borrow
+from core.agents.morpho.actions.leverage import MORPHO_LEVERAGE_PROMPT, MorphoLeverageInput, morpho_leverage
+from core.agents.morpho.actions.repay import MORPHO_REPAY_PROMPT, MorphoRepayInput, morpho_repay
+from services.cdp_executor import get_cdp_executor
+
+logger = logging.getLogger(__name__)
+
+MORPHO_ACTIONS = [
+    CdpAction(name="morpho_borrow", description=MORPHO_BORROW_PROMPT, args_schema=MorphoBorrowInput, func=morpho_borrow),
+    CdpAction(name="morpho_leverage", description=MORPHO_LEVERAGE_PROMPT, args_schema=MorphoLeverageInput, func=morpho_leverage),
+    CdpAction(name="morpho_repay", description=MORPHO_REPAY_PROMPT, args_schema=MorphoRepayInput, func=morpho_repay),
+]
+
+
+class ToolRegistry:
+    """
+    Process-wide CDP tool definitions, looked up by name.
+
+    A definition (name, prompt, input schema, action function) does not depend
+    on the agent, so the registry is built once and shared. Each agent binds it
+    to its own wallet wrapper with bind(), which returns a lightweight
+    AgentTools handle instead of a toolkit full of per-agent tool objects.
+    """
+
+    def __init__(self, actions: Optional[List[CdpAction]] = None):
+        self._actions: Dict[str, CdpAction] = {}
+        for action in actions or []:
+            self.register(action)
+
+    def register(self, action: CdpAction) -> None:
+        """Add (or replace) a tool definition"""
+        self._actions[action.name] = action
+
+    def get(self, name: str) -> CdpAction:
+        """
+        Get a tool definition by name
+
+        Raises:
+            ValueError: If no tool is registered under that name
+        """
+        try:
+            return self._actions[name]
+        except KeyError:
+            raise ValueError(f"Unknown CDP tool: {name}") from None
+
+    def names(self) -> List[str]:
+        return list(self._actions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._actions
+
+    def bind(self, wrapper: CdpAgentkitWrapper) -> "AgentTools":
+        """Tools of this registry, run against the wallet of `wrapper`"""
+        return AgentTools(self, wrapper)
+
+
+class AgentTools:
+    """
+    An agent's view of the registry: the shared definitions plus its wallet.
+
+    Actions run straight through the wallet wrapper. LangChain CdpTool objects
+    are only built if something asks for them (get_tools), e.g. to hand them
+    to an LLM agent.
+    """
+
+    __slots__ = ("registry", "wrapper", "_tools")
+
+    def __init__(self, registry: ToolRegistry, wrapper: CdpAgentkitWrapper):
+        self.registry = registry
+        self.wrapper = wrapper
+        self._tools: Optional[List[CdpTool]] = None
+
+    async def arun(self, name: str, params: Dict[str, Any]) -> Any:
+        """
+        Validate `params` against the tool's schema and run it with this wallet
+
+        Args:
+            name: Registered tool name, e.g. "morpho_borrow"
+            params: Tool input
+
+        Returns:
+            The action's result
+        """
+        action = self.registry.get(name)
+        if action.args_schema is not None:
+            params = action.args_schema(**params).model_dump()
+        if inspect.iscoroutinefunction(action.func):
+            return await self.wrapper.run_action(action.func, **params)
+        # CDP actions block on HTTP and on-chain confirmation: run them on the
+        # CDP pool, one at a time per wallet
+        return await get_cdp_executor().run(
+            partial(self.wrapper.run_action, action.func, **params),
+            wallet_id=self.wallet_id
+        )
+
+    @property
+    def wallet_id(self) -> str:
+        wallet_id = getattr(self.wrapper.wallet, "id", None)
+        return str(wallet_id) if wallet_id else f"wrapper-{id(self.wrapper)}"
+
+    def get_tools(self) -> List[CdpTool]:
+        """LangChain tools for every registered definition, built on first call"""
+        if self._tools is None:
+            self._tools = [
+                CdpTool(
+                    name=name,
+                    description=action.description,
+                    cdp_agentkit_wrapper=self.wrapper,
+                    args_schema=action.args_schema,
+                    func=action.func
+                )
+                for name, action in self.registry._actions.items()
+            ]
+        return self._tools
+
+
+_registry: Optional[ToolRegistry] = None
+
+
+def get_tool_registry() -> ToolRegistry:
+    """The shared registry: CDP AgentKit actions plus the Morpho actions"""
+    global _registry
+    if _registry is None:
+        _registry = ToolRegistry(CDP_ACTIONS + MORPHO_ACTIONS)
+        logger.info(f"CDP tool registry built with {len(_registry.names())} tools")
+    return _registry
@@ -0,0 +1,162 @@
+from functools import cached_property
+from typing import Any, Optional
+import logging
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Application-scoped services.
+
+    Each service is built on first access and then shared, so a request or
+    WebSocket message never constructs a VaultService, Web3 client, contract
+    object or CDP configuration of its own. All services also share one
+    AgentManager, which is what lets handle_deposit find the agent that
+    strategy selection registered.
+
+    Example:
+        container = get_container()
+        vault = await container.vault_service.create_vault(data, user_id)
+    """
+
+    def __init__(self, settings: Any = None):
+        self.settings = settings or get_settings()
+
+    @cached_property
+    def db(self):
+        from services.database import get_database_service
+        return get_database_service()
+
+    @cached_property
+    def web3(self):
+        from web3 import Web3
+        return Web3(Web3.HTTPProvider(self.settings.WEB3_PROVIDER_URI))
+
+    @cached_property
+    def fee_oracle(self):
+        # Shared by vault deployments and any other transaction we price
+        from utils.fee_oracle import FeeOracle
+        return FeeOracle(
+            self.web3,
+            history_blocks=self.settings.FEE_HISTORY_BLOCKS,
+            gas_margin=self.settings.GAS_LIMIT_MARGIN
+        )
+
+    @cached_property
+    def factory_client(self):
+        from utils.vault_factory import VaultFactoryClient
+        return VaultFactoryClient(
+            self.settings.WEB3_PROVIDER_URI,
+            self.settings.VAULT_FACTORY_ADDRESS,
+            self.settings.DEPLOYER_PRIVATE_KEY,
+            web3=self.web3,
+            fee_oracle=self.fee_oracle,
+            speed=self.settings.GAS_SPEED
+        )
+
+    @cached_property
+    def vault_deployer(self):
+        from services.vault_deployer import VaultDeployer
+        return VaultDeployer(
+            self.factory_client,
+            self.db,
+            concurrency=self.settings.VAULT_DEPLOY_CONCURRENCY,
+            max_attempts=self.settings.VAULT_DEPLOY_ATTEMPTS
+        )
+
+    @cached_property
+    def agent_manager(self):
+        from services.agent_snapshots import create_snapshot_store
+        if self.settings.AGENT_WORKERS > 0:
+            # Agents tick in worker processes, off the API event loop
+            from core.manager.sharded import ShardedAgentManager
+            return ShardedAgentManager(
+                workers=self.settings.AGENT_WORKERS,
+                snapshot_store=create_snapshot_store(self.settings),
+                heartbeat_interval=self.settings.AGENT_WORKER_HEARTBEAT,
+                heartbeat_timeout=self.settings.AGENT_WORKER_TIMEOUT
+            )
+        from core.manager.agent import AgentManager
+        return AgentManager(
+            snapshot_store=create_snapshot_store(self.settings),
+            snapshot_interval=self.settings.AGENT_SNAPSHOT_INTERVAL
+        )
+
+    @cached_property
+    def strategy_manager(self):
+        from core.manager.strategy import StrategyManager
+        return StrategyManager(self.agent_manager)
+
+    @cached_property
+    def vault_service(self):
+        from services.vault_service import VaultService
+        return VaultService(
+            db=self.db,
+            agent_manager=self.agent_manager,
+            strategy_manager=self.strategy_manager,
+            factory_client=self.factory_client,
+            deployer=self.vault_deployer
+        )
+
+    @cached_property
+    def wallet_service(self):
+        # Configures the CDP SDK; built on first wallet request so a missing
+        # CDP key only fails the calls that need it
+        from services.wallet_service import WalletService
+        return WalletService(db=self.db)
+
+    @cached_property
+    def price_feed(self):
+        from services.price_feed import PriceFeed
+        return PriceFeed()
+
+    @cached_property
+    def monitor(self):
+        from api.websocket.manager import manager
+        from services.monitor import StrategyMonitor
+        return StrategyMonitor(manager, self.price_feed)
+
+    @cached_property
+    def ws_service(self):
+        from services.websocket import WebSocketService
+        return WebSocketService(
+            self.vault_service,
+            self.agent_manager,
+            self.monitor,
+            wallet_service_factory=lambda: self.wallet_service
+        )
+
+    @cached_property
+    def rate_limiter(self):
+        from api.middleware.rate_limit import create_rate_limiter
+        return create_rate_limiter(self.settings)
+
+    async def shutdown(self) -> None:
+        """Stop background work of the services that were built"""
+        if "vault_deployer" in self.__dict__:
+            await self.vault_deployer.shutdown()
+
+    def build(self) -> None:
+        """Build the services every request needs up front (at startup)"""
+        self.vault_service
+        self.ws_service
+        self.rate_limiter
+
+
+_container: Optional[ServiceContainer] = None
+
+
+def get_container() -> ServiceContainer:
+    """Application-wide service container (also a FastAPI dependency)"""
+    global _container
+    if _container is None:
+        _container = ServiceContainer()
+    return _container
+
+
+def reset_container() -> None:
+    """Drop the application-wide container (shutdown and tests)"""
+    global _container
+    _container = None
@@ -1,35 +1,242 @@
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from config import settings
-from core.agents.morpho.agent import MorphoAgent
 import asyncio
+import hashlib
+import importlib
+import json
 import logging
+import time
+
+if TYPE_CHECKING:
+    from core.agents.morpho.agent import MorphoAgent
+    from services.agent_snapshots import SnapshotStore
 
 class AgentManager:
-    def __init__(self):
-        self.agents: Dict[str, MorphoAgent] = {}
+    def __init__(
+        self,
+        snapshot_store: Optional["SnapshotStore"] = None,
+        snapshot_interval: float = 30.0,
+        restore_batch_size: int = 200,
+        agent_class: str = "core.agents.morpho.agent.MorphoAgent",
+        tick_interval: float = 60.0,
+        tick_batch_size: int = 200,
+        performance_interval: float = 300.0
+    ):
+        """
+        Initialize agent manager
+
+        Args:
+            snapshot_store: Where agent state is saved for warm restarts;
+                agents live only in memory without one
+            snapshot_interval: Seconds between snapshots
+            restore_batch_size: Agents rebuilt between yields to the event loop
+            agent_class: Dotted path of the agent class, imported on first use
+            tick_interval: Seconds between agent decision rounds
+            tick_batch_size: Agents deciding concurrently, so their model
+                prompts can be batched together
+            performance_interval: Seconds between refreshes of the agents'
+                PnL, ROI, Sharpe and drawdown
+        """
+        self.agents: Dict[str, "MorphoAgent"] = {}
         self.logger = logging.getLogger(__name__)
+        self.snapshot_store = snapshot_store
+        self.snapshot_interval = snapshot_interval
+        self.restore_batch_size = restore_batch_size
+        self._snapshot_digests: Dict[str, bytes] = {}
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_lock = asyncio.Lock()
+        self.agent_class_path = agent_class
+        self.tick_interval = tick_interval
+        self.tick_batch_size = tick_batch_size
+        self.performance_interval = performance_interval
+        self._performance_updated = 0.0
+        self._agent_class = None
+        self.tick_stats: Dict[str, Any] = {"ticks": 0, "last_tick_ms": 0.0, "decisions": 0, "errors": 0}
+        self.snapshot_stats: Dict[str, Any] = {"restored": 0, "restore_failed": 0, "restore_ms": 0.0,
+                                               "snapshots": 0, "agents_written": 0}
+
+    @property
+    def agent_class(self):
+        # The agent stack (langchain, CDP) is imported on first use
+        if self._agent_class is None:
+            module, _, name = self.agent_class_path.rpartition(".")
+            self._agent_class = getattr(importlib.import_module(module), name)
+        return self._agent_class
 
-    async def initialize(self):
-        """Initialize the agent manager"""
+    async def initialize(self, restore: bool = True):
+        """
+        Initialize the agent manager, restoring agents from the last snapshot
+
+        Args:
+            restore: Load every stored agent; a shard worker passes False and
+                is handed its agents instead
+        """
         self.logger.info("Initializing agent manager")
+        if self.snapshot_store is not None:
+            if restore:
+                await self.restore_agents()
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def shutdown(self):
+        """Stop periodic snapshots and write a final one"""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            await asyncio.gather(self._snapshot_task, return_exceptions=True)
+            self._snapshot_task = None
+        if self.snapshot_store is not None:
+            await self.save_snapshots()
+
+    async def restore_agents(self) -> int:
+        """
+        Rebuild agents from their snapshots (warm start)
+
+        Agents are rebuilt from saved state instead of running initialize()
+        for each one: no wallet or market data round trips, so thousands
+        restore in seconds. Wallets connect on each agent's first trade.
+
+        Returns:
+            Number of agents restored
+        """
+        started = time.perf_counter()
+        snapshots = await self.snapshot_store.load_all()
+        restored = 0
+        for count, (agent_id, snapshot) in enumerate(snapshots.items(), 1):
+            try:
+                self.agents[agent_id] = self.agent_class.from_snapshot(snapshot, settings)
+                self._snapshot_digests[agent_id] = self._digest(snapshot)
+                restored += 1
+            except Exception as e:
+                self.snapshot_stats["restore_failed"] += 1
+                self.logger.error(f"Error restoring agent {agent_id}: {str(e)}")
+            if count % self.restore_batch_size == 0:
+                # Keep the event loop (health checks, sockets) responsive
+                await asyncio.sleep(0)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.snapshot_stats.update(restored=restored, restore_ms=round(elapsed_ms, 1))
+        self.logger.info(f"Restored {restored}/{len(snapshots)} agents in {elapsed_ms:.0f}ms")
+        return restored
+
+    async def save_snapshots(self) -> int:
+        """
+        Save the state of agents that changed since the last snapshot
+
+        Returns:
+            Number of agents written
+        """
+        async with self._snapshot_lock:
+            changed: Dict[str, Dict[str, Any]] = {}
+            digests: Dict[str, bytes] = {}
+            for agent_id, agent in list(self.agents.items()):
+                try:
+                    snapshot = agent.snapshot()
+                except Exception as e:
+                    self.logger.error(f"Error snapshotting agent {agent_id}: {str(e)}")
+                    continue
+                digest = digests[agent_id] = self._digest(snapshot)
+                if self._snapshot_digests.get(agent_id) != digest:
+                    changed[agent_id] = snapshot
+            removed = [agent_id for agent_id in self._snapshot_digests if agent_id not in self.agents]
+            if changed or removed:
+                await self.snapshot_store.save(changed, removed)
+            for agent_id in removed:
+                self._snapshot_digests.pop(agent_id, None)
+            self._snapshot_digests.update((agent_id, digests[agent_id]) for agent_id in changed)
+            self.snapshot_stats["snapshots"] += 1
+            self.snapshot_stats["agents_written"] += len(changed)
+            return len(changed)
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.save_snapshots()
+            except Exception as e:
+                self.logger.error(f"Error saving agent snapshots: {str(e)}")
+
+    @staticmethod
+    def _digest(snapshot: Dict[str, Any]) -> bytes:
+        return hashlib.blake2b(json.dumps(snapshot, sort_keys=True).encode(), digest_size=16).digest()
 
     async def run_agents(self):
         """Run all active agents"""
         while True:
-            for agent_id, agent in self.agents.items():
+            await self.run_once()
+            await asyncio.sleep(self.tick_interval)
+
+    async def run_once(self) -> Dict[str, Dict[str, Any]]:
+        """
+        One decision round over every agent
+
+        Returns:
+            The decisions that were acted on (anything but "hold"), by agent id
+        """
+        started = time.perf_counter()
+        acted: Dict[str, Dict[str, Any]] = {}
+        agents = list(self.agents.items())
+        for start in range(0, len(agents), self.tick_batch_size):
+            batch = agents[start:start + self.tick_batch_size]
+            decisions = await asyncio.gather(*(self._decide(agent_id, agent) for agent_id, agent in batch))
+            for (agent_id, agent), decision in zip(batch, decisions):
+                if decision is None or decision.get("action") == "hold":
+                    continue
                 try:
-                    await agent.analyze_market()
-                    decision = await agent.make_decision()
-                    if decision.get("action") != "hold":
-                        await agent.execute_trade(decision)
+                    await agent.execute_trade(decision)
+                    acted[agent_id] = decision
                 except Exception as e:
+                    self.tick_stats["errors"] += 1
                     self.logger.error(f"Error in agent {agent_id}: {str(e)}")
-            await asyncio.sleep(60)
+        if time.monotonic() - self._performance_updated >= self.performance_interval:
+            self._performance_updated = time.monotonic()
+            await self.update_performance()
+        self.tick_stats["ticks"] += 1
+        self.tick_stats["decisions"] += len(acted)
+        self.tick_stats["last_tick_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return acted
+
+    async def update_performance(self) -> None:
+        """Recompute every agent's performance metrics from its equity series"""
+        agents = list(self.agents.values())
+        for start in range(0, len(agents), self.tick_batch_size):
+            # The first call flushes the tick's buffered metrics for all of them
+            await asyncio.gather(
+                *(agent.update_performance_metrics() for agent in agents[start:start + self.tick_batch_size])
+            )
+
+    async def _decide(self, agent_id: str, agent: "MorphoAgent") -> Optional[Dict[str, Any]]:
+        try:
+            await agent.analyze_market()
+            return await agent.make_decision()
+        except Exception as e:
+            self.tick_stats["errors"] += 1
+            self.logger.error(f"Error in agent {agent_id}: {str(e)}")
+            return None
+
+    def release_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove an agent that is moving to another manager
+
+        Unlike dropping it from `agents`, its stored snapshot is kept for the
+        new owner.
+
+        Returns:
+            The agent's current snapshot, None if it is not here
+        """
+        agent = self.agents.pop(agent_id, None)
+        if agent is None:
+            return None
+        self._snapshot_digests.pop(agent_id, None)
+        return agent.snapshot()
+
+    def adopt_agent(self, agent_id: str, snapshot: Dict[str, Any]) -> None:
+        """Take over an agent from its snapshot (see release_agent)"""
+        self.agents[agent_id] = self.agent_class.from_snapshot(snapshot, settings)
+        # Not marked as saved: the next snapshot writes the handed-over state
+        self._snapshot_digests.pop(agent_id, None)
 
     async def add_agent(self, agent_id: str, strategy_params: dict) -> bool:
         """Add and initialize a new agent"""
         try:
-            agent = MorphoAgent(strategy_params=strategy_params, settings=settings)
+            agent = self.agent_class(strategy_params=strategy_params, settings=settings)
             if await agent.initialize():
                 self.agents[agent_id] = agent
                 return True
@@ -38,7 +245,7 @@ class AgentManager:
             self.logger.error(f"Error adding agent: {str(e)}")
             return False
 
-    def get_agent(self, agent_id: str) -> Optional[MorphoAgent]:
+    def get_agent(self, agent_id: str) -> Optional["MorphoAgent"]:
         """Get agent by ID
         
         Args:
@@ -48,3 +255,6 @@ class AgentManager:
             The agent if found, None otherwise
         """
         return self.agents.get(agent_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"agents": len(self.agents), **self.tick_stats, **self.snapshot_stats}
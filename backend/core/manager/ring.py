@@ -0,0 +1,71 @@
+from bisect import bisect
+from typing import Dict, Iterable, List, Optional
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of agent ids onto workers.
+
+    Each node is placed on the ring at `replicas` points; a key belongs to
+    the first node point at or after its own hash. Adding or removing a node
+    only moves the keys of the ring segments it gains or loses, about 1/N of
+    them, and every other key stays where it was.
+
+    Example:
+        ring = HashRing(["worker-0", "worker-1"])
+        owner = ring.node_for("vault-42")
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        """
+        Args:
+            nodes: Initial node names
+            replicas: Ring points per node; more evens out the shard sizes
+        """
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for replica in range(self.replicas):
+            self._owners.setdefault(_hash(f"{node}#{replica}"), node)
+        self._points = sorted(self._owners)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+        self._points = sorted(self._owners)
+
+    def node_for(self, key: str) -> Optional[str]:
+        """The node that owns `key`, None on an empty ring"""
+        if not self._points:
+            return None
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Owner of each key"""
+        return {key: self.node_for(key) for key in keys}
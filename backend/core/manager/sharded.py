@@ -0,0 +1,479 @@
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from core.manager.ring import HashRing
+from core.manager.worker import run_worker
+
+if TYPE_CHECKING:
+    from services.agent_snapshots import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLost(ConnectionError):
+    """The worker owning a request died before answering it"""
+
+
+class _Worker:
+    """Supervisor-side handle of one worker process"""
+
+    def __init__(self, worker_id: str, process, conn):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.pid: Optional[int] = None
+        self.ready = asyncio.Event()
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.last_heartbeat = time.monotonic()
+        self.stats: Dict[str, Any] = {}
+        self.restarts: Deque[float] = deque()
+        self.lost = False
+        self.stopping = False
+
+
+class RemoteAgent:
+    """
+    Stand-in for an agent living in a worker process.
+
+    Any public method is forwarded to the agent and awaited there, so
+    `await agent.execute_deposit(params)` works as it does in-process.
+    Arguments and results cross the process boundary pickled.
+    """
+
+    def __init__(self, manager: "ShardedAgentManager", agent_id: str):
+        self._manager = manager
+        self.agent_id = agent_id
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self._manager.call(self.agent_id, name, *args, **kwargs)
+        return call
+
+
+class ShardedAgentManager:
+    """
+    AgentManager whose agents run in worker processes.
+
+    Agent decision rounds (market analysis, risk metrics, Monte Carlo) are
+    CPU work; here they run on other cores instead of the API event loop.
+    Agents are sharded across `workers` processes by consistent hashing of
+    their id (HashRing), and the API process only supervises:
+
+    - Commands (add, call, adopt, release, stats) and events (ready,
+      heartbeat, decision) travel over one Pipe per worker.
+    - A worker that exits or misses heartbeats for `heartbeat_timeout` is
+      restarted under the same ring name, so no other agent moves; its
+      agents are rebuilt from their last stored snapshot.
+    - A worker that keeps crashing (`max_restarts` within `restart_window`)
+      leaves the ring and its agents are spread over the rest.
+    - add_worker/remove_worker resize the pool; only agents whose owner
+      changes move, handed over as snapshots (release on the old worker,
+      adopt on the new one) so no state is lost.
+
+    Workers save their own shard to the snapshot store; the API process
+    only reads it (at startup and to recover a crashed worker).
+
+    Example:
+        manager = ShardedAgentManager(workers=4, snapshot_store=store)
+        await manager.initialize()
+        asyncio.create_task(manager.run_agents())  # supervision
+        await manager.get_agent(vault_id).execute_deposit(params)
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        snapshot_store: Optional["SnapshotStore"] = None,
+        agent_class: str = "core.agents.morpho.agent.MorphoAgent",
+        tick_interval: float = 60.0,
+        heartbeat_interval: float = 5.0,
+        heartbeat_timeout: float = 30.0,
+        start_timeout: float = 120.0,
+        request_timeout: float = 120.0,
+        max_restarts: int = 5,
+        restart_window: float = 300.0,
+        worker_snapshots: bool = True
+    ):
+        """
+        Args:
+            workers: Worker processes to start
+            snapshot_store: Where workers save agent state; read at startup
+                and when a worker is recovered
+            agent_class: Dotted path of the agent class workers build
+            tick_interval: Seconds between agent decision rounds
+            heartbeat_interval: Seconds between worker heartbeats
+            heartbeat_timeout: Silence after which a worker is restarted
+            start_timeout: Seconds a worker may take to report ready
+            request_timeout: Default seconds to wait for a command reply
+            max_restarts, restart_window: Crash budget before a worker is
+                taken out of the ring
+            worker_snapshots: Let workers write their shard to the snapshot
+                store (AGENT_SNAPSHOT_BACKEND)
+        """
+        self.worker_count = workers
+        self.snapshot_store = snapshot_store
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.start_timeout = start_timeout
+        self.request_timeout = request_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.options = {
+            "agent_class": agent_class,
+            "tick_interval": tick_interval,
+            "heartbeat_interval": heartbeat_interval,
+            "snapshots": worker_snapshots
+        }
+        self.ring = HashRing()
+        self.workers: Dict[str, _Worker] = {}
+        # agent id -> owning worker, and the params of agents added here (to
+        # rebuild an agent that never reached the snapshot store)
+        self.placement: Dict[str, str] = {}
+        self._strategy_params: Dict[str, dict] = {}
+        # agent id -> snapshot (None: rebuild from params) of agents waiting
+        # for a worker to take them
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], Any]] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._topology_lock = asyncio.Lock()
+        self._next_id = 0
+        self._next_worker = 0
+        self._stopping = False
+        self._stats = {"restarts": 0, "moved": 0, "recovered": 0, "lost": 0}
+
+    async def initialize(self):
+        """Start the workers and hand each its shard of the stored agents"""
+        self._loop = asyncio.get_running_loop()
+        async with self._topology_lock:
+            started = await asyncio.gather(
+                *(self._start_worker(self._new_worker_id()) for _ in range(self.worker_count))
+            )
+            for worker_id in started:
+                self.ring.add(worker_id)
+            snapshots = await self.snapshot_store.load_all() if self.snapshot_store is not None else {}
+            await self._adopt(snapshots)
+        logger.info(f"Started {len(self.workers)} agent workers with {len(self.placement)} agents")
+
+    async def shutdown(self):
+        """Stop the workers; each writes a final snapshot of its shard"""
+        self._stopping = True
+        await asyncio.gather(*(self._stop_worker(worker) for worker in list(self.workers.values())))
+        self.workers.clear()
+
+    async def run_agents(self):
+        """Supervise the workers (the agents themselves tick inside them)"""
+        while not self._stopping:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.check_workers()
+            except Exception as e:
+                logger.error(f"Error supervising agent workers: {str(e)}")
+
+    async def check_workers(self) -> List[str]:
+        """
+        Restart workers that died or stopped sending heartbeats, and retry
+        handing over agents that are still pending
+
+        Returns:
+            Ids of the workers that were replaced or removed
+        """
+        now = time.monotonic()
+        failed = [
+            worker for worker in self.workers.values()
+            if worker.lost or not worker.process.is_alive() or now - worker.last_heartbeat > self.heartbeat_timeout
+        ]
+        for worker in failed:
+            await self._recover_worker(worker)
+        if self._pending:
+            async with self._topology_lock:
+                await self._place_pending()
+        return [worker.worker_id for worker in failed]
+
+    async def add_agent(self, agent_id: str, strategy_params: dict) -> bool:
+        """Add and initialize a new agent on the worker that owns its id"""
+        worker_id = self.ring.node_for(agent_id)
+        if worker_id is None:
+            logger.error("Error adding agent: no agent workers running")
+            return False
+        try:
+            success = await self.request(worker_id, "add", agent_id=agent_id, strategy_params=strategy_params)
+        except Exception as e:
+            logger.error(f"Error adding agent: {str(e)}")
+            return False
+        if success:
+            self.placement[agent_id] = worker_id
+            self._strategy_params[agent_id] = strategy_params
+        return success
+
+    def get_agent(self, agent_id: str) -> Optional[RemoteAgent]:
+        """Get agent by ID (a proxy to its worker), None if unknown"""
+        if agent_id not in self.placement:
+            return None
+        return RemoteAgent(self, agent_id)
+
+    async def call(self, agent_id: str, method: str, *args, **kwargs) -> Any:
+        """Call `method` of an agent in its worker and return the result"""
+        worker_id = self.placement.get(agent_id)
+        if worker_id is None:
+            raise KeyError(f"Agent {agent_id} not found")
+        return await self.request(worker_id, "call", agent_id=agent_id, method=method, args=args, kwargs=kwargs)
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], Any]) -> None:
+        """Call `listener(worker_id, event)` for every decision event from a worker"""
+        self._listeners.append(listener)
+
+    async def add_worker(self) -> str:
+        """Start one more worker and move its share of the agents to it"""
+        async with self._topology_lock:
+            worker_id = await self._start_worker(self._new_worker_id())
+            self.ring.add(worker_id)
+            await self._rebalance()
+        return worker_id
+
+    async def remove_worker(self, worker_id: str) -> None:
+        """Move a worker's agents to the others, then stop it"""
+        async with self._topology_lock:
+            if worker_id in self.ring and len(self.ring) == 1:
+                raise ValueError("Cannot remove the last agent worker")
+            self.ring.remove(worker_id)
+            await self._rebalance()
+            worker = self.workers.pop(worker_id, None)
+        if worker is not None:
+            await self._stop_worker(worker)
+
+    async def request(self, worker_id: str, cmd: str, timeout: Optional[float] = None, **args) -> Any:
+        """
+        Send a command to a worker and wait for its reply
+
+        Raises:
+            WorkerLost: If the worker dies before replying
+            RuntimeError: If the command failed in the worker
+        """
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            raise WorkerLost(f"Agent worker {worker_id} is not running")
+        return await self._request(worker, cmd, timeout, **args)
+
+    async def _request(self, worker: _Worker, cmd: str, timeout: Optional[float] = None, **args) -> Any:
+        worker_id = worker.worker_id
+        if worker.lost:
+            raise WorkerLost(f"Agent worker {worker_id} is not running")
+        self._next_id += 1
+        request_id = self._next_id
+        future = self._loop.create_future()
+        worker.pending[request_id] = future
+        try:
+            worker.conn.send({"id": request_id, "cmd": cmd, **args})
+            return await asyncio.wait_for(future, timeout or self.request_timeout)
+        except (BrokenPipeError, EOFError, OSError) as e:
+            raise WorkerLost(f"Agent worker {worker_id} is not running: {str(e)}") from e
+        finally:
+            worker.pending.pop(request_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self._stats,
+            "agents": len(self.placement),
+            "pending": len(self._pending),
+            "workers": {
+                worker_id: {
+                    "pid": worker.pid,
+                    "alive": worker.process.is_alive() and not worker.lost,
+                    "agents": sum(1 for owner in self.placement.values() if owner == worker_id),
+                    "heartbeat_age": round(now - worker.last_heartbeat, 1),
+                    "restarts": len(worker.restarts),
+                    **worker.stats
+                }
+                for worker_id, worker in self.workers.items()
+            }
+        }
+
+    def _new_worker_id(self) -> str:
+        worker_id = f"worker-{self._next_worker}"
+        self._next_worker += 1
+        return worker_id
+
+    async def _start_worker(self, worker_id: str, restarts: Iterable[float] = ()) -> str:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=run_worker,
+            args=(worker_id, child_conn, self.options),
+            name=f"agent-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(worker_id, process, parent_conn)
+        worker.restarts.extend(restarts)
+        self.workers[worker_id] = worker
+        threading.Thread(target=self._read_events, args=(worker,), name=f"agent-{worker_id}-events", daemon=True).start()
+        try:
+            await asyncio.wait_for(worker.ready.wait(), self.start_timeout)
+        except asyncio.TimeoutError:
+            worker.lost = True
+        if worker.lost:
+            logger.error(f"Agent worker {worker_id} failed to start")
+        return worker_id
+
+    async def _stop_worker(self, worker: _Worker) -> None:
+        worker.stopping = True
+        if worker.process.is_alive() and not worker.lost:
+            try:
+                await self._request(worker, "stop", timeout=self.heartbeat_timeout)
+            except Exception as e:
+                logger.warning(f"Agent worker {worker.worker_id} did not stop cleanly: {str(e)}")
+        await asyncio.to_thread(worker.process.join, self.heartbeat_timeout)
+        if worker.process.is_alive():
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join)
+        worker.conn.close()
+
+    def _read_events(self, worker: _Worker) -> None:
+        # One thread per worker: Connection.recv blocks
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                message = None
+            try:
+                if message is None:
+                    self._loop.call_soon_threadsafe(self._on_disconnect, worker)
+                    return
+                self._loop.call_soon_threadsafe(self._on_event, worker, message)
+            except RuntimeError:
+                # The event loop closed under us (interpreter shutdown)
+                return
+
+    def _on_event(self, worker: _Worker, message: Dict[str, Any]) -> None:
+        event = message["event"]
+        worker.last_heartbeat = time.monotonic()
+        if event == "reply":
+            future = worker.pending.get(message["id"])
+            if future is not None and not future.done():
+                if message["ok"]:
+                    future.set_result(message.get("result"))
+                else:
+                    future.set_exception(RuntimeError(message["error"]))
+        elif event == "heartbeat":
+            worker.stats = message["stats"]
+        elif event == "ready":
+            worker.pid = message["pid"]
+            worker.ready.set()
+        elif event == "decision":
+            for listener in self._listeners:
+                try:
+                    listener(worker.worker_id, message)
+                except Exception as e:
+                    logger.error(f"Error in agent event listener: {str(e)}")
+
+    def _on_disconnect(self, worker: _Worker) -> None:
+        worker.lost = True
+        # Don't keep _start_worker waiting for a worker that died starting
+        worker.ready.set()
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(WorkerLost(f"Agent worker {worker.worker_id} exited"))
+        if not worker.stopping:
+            logger.error(f"Agent worker {worker.worker_id} (pid {worker.pid}) exited")
+
+    async def _recover_worker(self, worker: _Worker) -> None:
+        async with self._topology_lock:
+            if self.workers.get(worker.worker_id) is not worker or self._stopping:
+                return
+            logger.warning(f"Recovering agent worker {worker.worker_id} (pid {worker.pid})")
+            worker.lost = worker.stopping = True
+            if worker.process.is_alive():
+                worker.process.kill()
+            await asyncio.to_thread(worker.process.join)
+            worker.conn.close()
+
+            now = time.monotonic()
+            restarts = [at for at in worker.restarts if now - at < self.restart_window] + [now]
+            if len(restarts) > self.max_restarts and len(self.workers) > 1:
+                logger.error(f"Agent worker {worker.worker_id} keeps failing, removing it from the ring")
+                del self.workers[worker.worker_id]
+                self.ring.remove(worker.worker_id)
+                self._stats["lost"] += 1
+            else:
+                await self._start_worker(worker.worker_id, restarts)
+                self._stats["restarts"] += 1
+
+            # The dead worker's agents come back from their last snapshot.
+            # They stay pending until a worker has taken them, so a failed
+            # hand-over is retried on the next supervision pass.
+            orphans = [agent_id for agent_id, owner in self.placement.items() if owner == worker.worker_id]
+            snapshots = await self.snapshot_store.load_all() if self.snapshot_store is not None else {}
+            for agent_id in orphans:
+                del self.placement[agent_id]
+                if agent_id in snapshots:
+                    self._pending[agent_id] = snapshots[agent_id]
+                elif agent_id in self._strategy_params:
+                    self._pending[agent_id] = None
+                else:
+                    logger.error(f"Agent {agent_id} was lost with worker {worker.worker_id}: no snapshot")
+            await self._place_pending()
+            self._stats["recovered"] += sum(1 for agent_id in orphans if agent_id in self.placement)
+
+    async def _place_pending(self) -> None:
+        """Retry handing over agents no worker has taken yet"""
+        await self._adopt({agent_id: snapshot for agent_id, snapshot in self._pending.items() if snapshot is not None})
+        for agent_id in [agent_id for agent_id, snapshot in self._pending.items() if snapshot is None]:
+            # Never snapshotted: rebuilt from the params it was added with
+            if await self.add_agent(agent_id, self._strategy_params[agent_id]):
+                self._pending.pop(agent_id, None)
+
+    async def _adopt(self, snapshots: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Hand agents to the workers that own them, one batch per worker
+
+        Agents a worker could not take are kept in `_pending` with their
+        snapshot and handed over again by the next supervision pass.
+        """
+        shards: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for agent_id, snapshot in snapshots.items():
+            shards.setdefault(self.ring.node_for(agent_id), {})[agent_id] = snapshot
+        results = await asyncio.gather(
+            *(self.request(worker_id, "adopt", agents=shard) for worker_id, shard in shards.items()),
+            return_exceptions=True
+        )
+        for (worker_id, shard), result in zip(shards.items(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Agent worker {worker_id} could not take {len(shard)} agents: {str(result)}")
+                self._pending.update(shard)
+                continue
+            self.placement.update((agent_id, worker_id) for agent_id in shard)
+            for agent_id in shard:
+                self._pending.pop(agent_id, None)
+
+    async def _rebalance(self) -> None:
+        """Move the agents whose ring owner changed, keeping their state"""
+        moves: Dict[str, List[str]] = {}
+        for agent_id, owner in self.placement.items():
+            if self.ring.node_for(agent_id) != owner:
+                moves.setdefault(owner, []).append(agent_id)
+        if not moves:
+            return
+        released = await asyncio.gather(
+            *(self.request(owner, "release", agent_ids=agent_ids) for owner, agent_ids in moves.items()),
+            return_exceptions=True
+        )
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        for (owner, agent_ids), result in zip(moves.items(), released):
+            if isinstance(result, Exception):
+                logger.error(f"Agent worker {owner} could not release {len(agent_ids)} agents: {str(result)}")
+                continue
+            snapshots.update(result)
+        for agent_id in snapshots:
+            del self.placement[agent_id]
+        await self._adopt(snapshots)
+        self._stats["moved"] += len(snapshots)
+        logger.info(f"Rebalanced {len(snapshots)} agents across {len(self.ring)} workers")
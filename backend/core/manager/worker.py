@@ -0,0 +1,161 @@
+"""
+Agent shard worker: the process side of ShardedAgentManager.
+
+The API process and each worker talk over one duplex multiprocessing Pipe.
+Messages are small pickled dicts:
+
+- commands (API -> worker): {"id": n, "cmd": name, **args}
+- replies (worker -> API): {"event": "reply", "id": n, "ok": bool, "result" | "error"}
+- events (worker -> API): "ready", "heartbeat" (shard stats) and
+  "decision" (an agent acted on a decision)
+"""
+from typing import Any, Dict
+import asyncio
+import inspect
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class AgentWorker:
+    """Runs one shard of agents in an AgentManager of its own and serves commands for them"""
+
+    def __init__(self, worker_id: str, conn, options: Dict[str, Any]):
+        """
+        Args:
+            worker_id: Name of this worker on the hash ring
+            conn: This end of the command/event pipe
+            options: agent_class, tick_interval, heartbeat_interval and
+                snapshots (save the shard to AGENT_SNAPSHOT_BACKEND)
+        """
+        self.worker_id = worker_id
+        self.conn = conn
+        self.options = options
+        self.manager = None
+        self._tasks = set()
+
+    async def run(self) -> None:
+        from config.settings import get_settings
+        from core.manager.agent import AgentManager
+        from services.agent_snapshots import create_snapshot_store
+
+        settings = get_settings()
+        store = create_snapshot_store(settings, shard=self.worker_id) if self.options.get("snapshots") else None
+        self.manager = AgentManager(
+            snapshot_store=store,
+            snapshot_interval=settings.AGENT_SNAPSHOT_INTERVAL,
+            agent_class=self.options["agent_class"],
+            tick_interval=self.options["tick_interval"]
+        )
+        # Import the agent stack before reporting ready, not on the first command
+        self.manager.agent_class
+        await self.manager.initialize(restore=False)
+
+        self._send({"event": "ready", "pid": os.getpid()})
+        background = [asyncio.create_task(self._heartbeat_loop()), asyncio.create_task(self._tick_loop())]
+        try:
+            await self._serve()
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            await self.manager.shutdown()
+
+    async def _serve(self) -> None:
+        while True:
+            try:
+                message = await asyncio.to_thread(self.conn.recv)
+            except (EOFError, OSError):
+                # The API process is gone; don't outlive it
+                logger.warning(f"Worker {self.worker_id} lost its supervisor, stopping")
+                return
+            if message["cmd"] == "stop":
+                self._reply(message["id"], True, None)
+                return
+            # Commands run concurrently so a slow add never delays a ping
+            task = asyncio.create_task(self._handle(message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, message: Dict[str, Any]) -> None:
+        try:
+            result = await getattr(self, f"_cmd_{message['cmd']}")(message)
+            self._reply(message["id"], True, result)
+        except Exception as e:
+            self._reply(message["id"], False, f"{type(e).__name__}: {str(e)}")
+
+    async def _cmd_adopt(self, message: Dict[str, Any]) -> int:
+        adopted = 0
+        for count, (agent_id, snapshot) in enumerate(message["agents"].items(), 1):
+            try:
+                self.manager.adopt_agent(agent_id, snapshot)
+                adopted += 1
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} could not adopt agent {agent_id}: {str(e)}")
+            if count % self.manager.restore_batch_size == 0:
+                await asyncio.sleep(0)
+        return adopted
+
+    async def _cmd_release(self, message: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        released = {}
+        for agent_id in message["agent_ids"]:
+            snapshot = self.manager.release_agent(agent_id)
+            if snapshot is not None:
+                released[agent_id] = snapshot
+        return released
+
+    async def _cmd_add(self, message: Dict[str, Any]) -> bool:
+        return await self.manager.add_agent(message["agent_id"], message["strategy_params"])
+
+    async def _cmd_call(self, message: Dict[str, Any]) -> Any:
+        agent = self.manager.get_agent(message["agent_id"])
+        if agent is None:
+            raise KeyError(f"Agent {message['agent_id']} is not on {self.worker_id}")
+        result = getattr(agent, message["method"])(*message.get("args", ()), **message.get("kwargs", {}))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _cmd_stats(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return self.manager.get_stats()
+
+    async def _heartbeat_loop(self) -> None:
+        # Sent from the event loop, so a worker stuck in a long computation
+        # misses heartbeats and is restarted
+        while True:
+            self._send({"event": "heartbeat", "stats": self.manager.get_stats()})
+            await asyncio.sleep(self.options["heartbeat_interval"])
+
+    async def _tick_loop(self) -> None:
+        while True:
+            acted = await self.manager.run_once()
+            for agent_id, decision in acted.items():
+                self._send({"event": "decision", "agent_id": agent_id, "decision": decision})
+            await asyncio.sleep(self.manager.tick_interval)
+
+    def _reply(self, request_id: int, ok: bool, payload: Any) -> None:
+        message = {"event": "reply", "id": request_id, "ok": ok}
+        message["result" if ok else "error"] = payload
+        try:
+            self._send(message)
+        except Exception as e:
+            # Most likely an unpicklable result; the caller still gets an answer
+            self._send({"event": "reply", "id": request_id, "ok": False, "error": f"{type(e).__name__}: {str(e)}"})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.conn.send(message)
+
+
+def run_worker(worker_id: str, conn, options: Dict[str, Any]) -> None:
+    """Process entry point (multiprocessing target)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - {worker_id} - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(AgentWorker(worker_id, conn, options).run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
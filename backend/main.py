@@ -6,13 +6,19 @@ backend_dir = os.path.dirname(os.path.abspath(__file__))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import asyncio
-from api.routes import strategy, position, market
-from api.middleware.auth import auth_middleware
-from core.manager.agent import AgentManager
+from api.routes import strategy, position, market, health
+from api.middleware.auth import require_user
+from core.container import get_container, reset_container
+from services.database import get_database_service, close_database_service
+from services.mongo import get_mongo_client, close_mongo_client
+from services.write_buffer import flush_all
+from services.metrics import stop_metrics_pipeline
+from services.cdp_executor import shutdown_cdp_executor
 from config.settings import get_settings
 from config.logging import setup_logging
 import logging
@@ -27,15 +33,46 @@ logging.basicConfig(
 # Setup logging
 setup_logging()
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Initialize services
-agent_manager = AgentManager()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    # One Motor client (and connection pool) for every service
+    get_mongo_client()
+    container = get_container()
+    container.build()
+    agent_manager = container.agent_manager
+
+    # Make sure DatabaseService lookups are index-backed before serving traffic
+    try:
+        await get_database_service().ensure_indexes(create=settings.DB_CREATE_INDEXES)
+    except Exception as e:
+        logger.error(f"Index verification failed: {str(e)}")
+
+    await agent_manager.initialize()
+    agents_task = asyncio.create_task(agent_manager.run_agents())
+
+    yield
+
+    agents_task.cancel()
+    await container.shutdown()
+    # Final agent snapshot, before the database client goes away
+    await agent_manager.shutdown()
+    # Write any buffered vault updates and metrics before closing the client
+    await close_database_service()
+    await flush_all()
+    await stop_metrics_pipeline()
+    close_mongo_client()
+    shutdown_cdp_executor()
+    reset_container()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Helenus AI Trading Agent",
     description="Automated trading agent for DeFi protocols",
-    version="0.0.1"
+    version="0.0.1",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -48,31 +85,23 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Add authentication middleware
-app.middleware("http")(auth_middleware)
+# Authentication is a route-level dependency: protected routers declare it,
+# public ones (market data, docs, WebSockets authenticated by ws_auth) skip it
+protected = [Depends(require_user)]
 
 # Include routers
-app.include_router(strategy.router, prefix="/api/strategy", tags=["strategy"])
-app.include_router(position.router, prefix="/api/position", tags=["position"])
+app.include_router(strategy.router, prefix="/api/strategy", tags=["strategy"], dependencies=protected)
+app.include_router(position.router, prefix="/api/position", tags=["position"], dependencies=protected)
 app.include_router(market.router, prefix="/api/market", tags=["market"])
+app.include_router(health.router, tags=["health"])
+app.include_router(health.detail_router, tags=["health"], dependencies=protected)
 app.include_router(
     websocket_router,
     prefix="/api/v1",
     tags=["websocket"]
 )
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize and start agent manager on app startup"""
-    await agent_manager.initialize()
-    asyncio.create_task(agent_manager.run_agents())
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on app shutdown"""
-    #await agent_manager.shutdown()
-
-@app.get("/")
+@app.get("/", dependencies=protected)
 async def root():
     return {
         "name": "Helenus AI Trading Agent",
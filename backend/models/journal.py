@@ -0,0 +1,37 @@
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+import uuid
+
+class StepStatus(str, Enum):
+    PLANNED = "planned"  # persisted before the action is sent
+    CONFIRMED = "confirmed"
+    FAILED = "failed"
+
+class JournalStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JournalStep(BaseModel):
+    index: int
+    action: str
+    params: Dict[str, Any]
+    idempotency_key: str
+    status: StepStatus = StepStatus.PLANNED
+    attempts: int = 0
+    tx_hash: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class StepJournalDB(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    strategy_id: str
+    params: Dict[str, Any]
+    status: JournalStatus = JournalStatus.RUNNING
+    steps: List[JournalStep] = Field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
@@ -15,7 +15,14 @@ class WSMessageType(str, Enum):
     MONITOR_UPDATE = "monitor_update"
     SYSTEM = "system"
     ERROR = "error"
+    PING = "ping"
     PONG = "pong"
+    SUBSCRIBE = "subscribe"
+    UNSUBSCRIBE = "unsubscribe"
+    POSITION_UPDATE = "position_update"
+    MARKET_UPDATE = "market_update"
+    STRATEGY_UPDATE = "strategy_update"
+    EMERGENCY = "emergency"
 
 class WSMessage(BaseModel):
     """WebSocket message model"""
@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
 from config.settings import get_settings
+from services.indexes import INDEXES, ensure_indexes, verify_indexes
 
 async def init_database():
     settings = get_settings()
@@ -8,20 +9,18 @@ async def init_database():
     db = client.helenus2
     
     # Create collections
-    await db.create_collection("vaults")
-    await db.create_collection("strategies")
-    await db.create_collection("positions")
-    await db.create_collection("wallets")
+    existing = await db.list_collection_names()
+    for collection in INDEXES:
+        if collection not in existing:
+            await db.create_collection(collection)
     
-    # Create indexes
-    await db.vaults.create_index("user_id")
-    await db.vaults.create_index("strategy_id")
-    await db.strategies.create_index("user_id")
-    await db.positions.create_index("vault_id")
-    await db.wallets.create_index("id")
-    await db.wallets.create_index("user_id")
+    # Create indexes (declared in services/indexes.py)
+    created = await ensure_indexes(db)
+    missing = await verify_indexes(db)
+    if missing:
+        raise RuntimeError(f"Indexes still missing after bootstrap: {', '.join(missing)}")
     
-    print("Database initialized successfully!")
+    print(f"Database initialized successfully! Created {len(created)} indexes.")
 
 if __name__ == "__main__":
     asyncio.run(init_database())
@@ -0,0 +1,164 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from pymongo import DeleteOne, ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore(ABC):
+    """Storage for agent state snapshots, keyed by agent id"""
+
+    @abstractmethod
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored snapshot"""
+
+    @abstractmethod
+    async def save(self, snapshots: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        """Write changed snapshots and drop those of removed agents"""
+
+
+class InMemorySnapshotStore(SnapshotStore):
+    """Process-local snapshot store, for tests"""
+
+    def __init__(self):
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.writes = 0
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return json.loads(json.dumps(self.snapshots))
+
+    async def save(self, snapshots: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        self.writes += len(snapshots)
+        self.snapshots.update(json.loads(json.dumps(snapshots)))
+        for agent_id in removed:
+            self.snapshots.pop(agent_id, None)
+
+
+class FileSnapshotStore(SnapshotStore):
+    """
+    Snapshots in JSON-lines files.
+
+    A file is rewritten whole and swapped in with os.replace, so a crash
+    mid-write leaves the previous snapshot intact. Processes that save
+    concurrently (agent workers) each pass a `shard` and write their own
+    `<path>.<shard>` file; load_all() merges the base file and every shard
+    file, keeping the most recently saved state of each agent. Removed
+    agents are kept as tombstones so a stale copy in another shard file
+    does not bring them back.
+    """
+
+    def __init__(self, path: str, shard: Optional[str] = None):
+        """
+        Args:
+            path: Base file; shards write next to it
+            shard: Name of the writing process (e.g. the worker id), None
+                when this process is the only writer
+        """
+        self.path = path
+        self.shard = shard
+        self.write_path = f"{path}.{shard}" if shard else path
+        # agent id -> (saved_at, state or None for a removed agent)
+        self._records: Optional[Dict[str, Tuple[float, Optional[Dict[str, Any]]]]] = None
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        merged = await asyncio.to_thread(self._read_all)
+        return {agent_id: state for agent_id, (_, state) in merged.items() if state is not None}
+
+    def _files(self) -> List[str]:
+        shards = sorted(
+            path for path in glob.glob(f"{glob.escape(self.path)}.*")
+            if not path.endswith(".tmp")
+        )
+        return [self.path, *shards]
+
+    def _read_all(self) -> Dict[str, Tuple[float, Optional[Dict[str, Any]]]]:
+        merged: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        for path in self._files():
+            for agent_id, record in self._read(path).items():
+                if agent_id not in merged or record[0] >= merged[agent_id][0]:
+                    merged[agent_id] = record
+        return merged
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Tuple[float, Optional[Dict[str, Any]]]]:
+        if not os.path.exists(path):
+            return {}
+        records = {}
+        with open(path, "r") as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["agent_id"]] = (record.get("saved_at", 0.0), record["state"])
+        return records
+
+    async def save(self, snapshots: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        if self._records is None:
+            self._records = await asyncio.to_thread(self._read, self.write_path)
+        saved_at = time.time()
+        self._records.update((agent_id, (saved_at, state)) for agent_id, state in snapshots.items())
+        for agent_id in removed:
+            if self.shard:
+                self._records[agent_id] = (saved_at, None)
+            else:
+                self._records.pop(agent_id, None)
+        await asyncio.to_thread(self._write, dict(self._records))
+
+    def _write(self, records: Dict[str, Tuple[float, Optional[Dict[str, Any]]]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.write_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.write_path}.tmp"
+        with open(tmp_path, "w") as file:
+            for agent_id, (saved_at, state) in records.items():
+                record = {"agent_id": agent_id, "state": state, "saved_at": saved_at}
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.write_path)
+
+
+class MongoSnapshotStore(SnapshotStore):
+    """Snapshots in the agent_snapshots collection, one document per agent"""
+
+    def __init__(self, db, collection: str = "agent_snapshots"):
+        self.snapshots = db[collection]
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        snapshots = {}
+        async for doc in self.snapshots.find({}, {"_id": 0, "agent_id": 1, "state": 1}):
+            snapshots[doc["agent_id"]] = doc["state"]
+        return snapshots
+
+    async def save(self, snapshots: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        now = datetime.now()
+        requests = [
+            ReplaceOne({"agent_id": agent_id}, {"agent_id": agent_id, "state": state, "updated_at": now}, upsert=True)
+            for agent_id, state in snapshots.items()
+        ]
+        requests.extend(DeleteOne({"agent_id": agent_id}) for agent_id in removed)
+        if requests:
+            await self.snapshots.bulk_write(requests, ordered=False)
+
+
+def create_snapshot_store(settings: Any, shard: Optional[str] = None) -> Optional[SnapshotStore]:
+    """
+    Snapshot store selected by AGENT_SNAPSHOT_BACKEND ("mongo", "file" or "none")
+
+    Args:
+        settings: Application settings
+        shard: Name of the calling agent worker; the file backend gives
+            each worker a file of its own
+    """
+    backend = (settings.AGENT_SNAPSHOT_BACKEND or "none").lower()
+    if backend == "mongo":
+        from services.mongo import get_mongo_client
+        return MongoSnapshotStore(get_mongo_client().helenus2)
+    if backend == "file":
+        return FileSnapshotStore(settings.AGENT_SNAPSHOT_PATH, shard=shard)
+    return None
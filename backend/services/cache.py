@@ -0,0 +1,139 @@
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncTTLCache(Generic[T]):
+    """
+    Async read-through cache with TTL expiry and LRU eviction.
+
+    `get_or_load` returns a cached value or awaits the loader once, even when
+    many callers miss on the same key at the same time. Invalidation bumps a
+    per-key generation, so a load that was already in flight when the key was
+    invalidated is returned to its caller but not stored.
+
+    Example:
+        cache = AsyncTTLCache(ttl=30, max_size=10_000)
+        vault = await cache.get_or_load(vault_id, lambda: load_vault(vault_id))
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize cache
+
+        Args:
+            ttl: Seconds an entry stays fresh
+            max_size: Maximum number of entries before least-recently-used eviction
+            clock: Monotonic time source in seconds
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[T, float]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Return a fresh cached value, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        """Store a value, evicting the least recently used entries if full"""
+        self._entries[key] = (value, self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key and discard any load for it that is in flight"""
+        self._entries.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        for key in list(self._entries) + list(self._loading):
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self._entries.clear()
+        self.invalidations += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        """
+        Return the cached value for key, loading it on a miss
+
+        Args:
+            key: Cache key
+            loader: Coroutine factory producing the value; None results are
+                returned but not cached
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        generation = self._generations.get(key, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._generations.get(key, 0) == generation:
+                self.set(key, value)
+            return value
+        finally:
+            self._loading.pop(key, None)
+            if not self._loading and len(self._generations) > self.max_size:
+                self._generations.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CdpExecutor:
+    """
+    Bounded thread pool for blocking CDP SDK calls.
+
+    Wallet.create/fetch and sign_and_execute_transaction(...).wait() do
+    blocking HTTP calls and on-chain waits. Running them here keeps the event
+    loop (and every WebSocket on it) responsive.
+
+    - At most `max_workers` calls run at once; the rest queue.
+    - Calls that pass the same `wallet_id` run one at a time, in order, so
+      nonces and balances of a wallet are never raced.
+    - A call that exceeds its timeout raises TimeoutError to the caller. The
+      worker thread cannot be interrupted, so the wallet stays locked until
+      the call actually returns.
+
+    Example:
+        executor = get_cdp_executor()
+        result = await executor.run(partial(morpho_borrow, wallet, **params), wallet_id=wallet.id)
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: float = 120.0):
+        """
+        Args:
+            max_workers: Threads available for CDP calls
+            timeout: Default seconds to wait for a call (None waits forever)
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._wallet_locks: Dict[str, asyncio.Lock] = {}
+        self._wallet_users: Dict[str, int] = {}
+
+        # Updated from worker threads
+        self._counter_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        wallet_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run `fn(*args)` on the CDP pool and wait for its result
+
+        Args:
+            fn: Blocking callable (use functools.partial for keyword arguments)
+            wallet_id: Serialize with other calls for this wallet
+            timeout: Seconds to wait; defaults to the executor's timeout
+
+        Raises:
+            TimeoutError: If the call did not finish in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        release = await self._lock_wallet(wallet_id) if wallet_id is not None else None
+        try:
+            future = self._submit(fn, args)
+        except BaseException:
+            if release is not None:
+                release()
+            raise
+        if release is not None:
+            # Released when the thread finishes, even if the caller gave up
+            future.add_done_callback(lambda _: release())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._counter_lock:
+                self._timeouts += 1
+            name = getattr(fn, "__name__", None) or getattr(getattr(fn, "func", None), "__name__", repr(fn))
+            logger.warning(f"CDP call {name} timed out after {timeout}s (wallet: {wallet_id})")
+            raise TimeoutError(f"CDP call {name} timed out after {timeout}s") from None
+
+    def _submit(self, fn: Callable[..., Any], args: tuple) -> asyncio.Future:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cdp")
+        with self._counter_lock:
+            self._submitted += 1
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._pool, self._call, fn, args, time.monotonic())
+
+    def _call(self, fn: Callable[..., Any], args: tuple, submitted_at: float) -> Any:
+        started = time.monotonic()
+        with self._counter_lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_time += started - submitted_at
+        failed = False
+        try:
+            return fn(*args)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._counter_lock:
+                self._running -= 1
+                self._run_time += time.monotonic() - started
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    async def _lock_wallet(self, wallet_id: str) -> Callable[[], None]:
+        lock = self._wallet_locks.get(wallet_id)
+        if lock is None:
+            lock = self._wallet_locks[wallet_id] = asyncio.Lock()
+        self._wallet_users[wallet_id] = self._wallet_users.get(wallet_id, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._unref_wallet(wallet_id)
+            raise
+
+        def release() -> None:
+            lock.release()
+            self._unref_wallet(wallet_id)
+        return release
+
+    def _unref_wallet(self, wallet_id: str) -> None:
+        self._wallet_users[wallet_id] -= 1
+        if not self._wallet_users[wallet_id]:
+            del self._wallet_users[wallet_id]
+            del self._wallet_locks[wallet_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and latency of CDP calls"""
+        with self._counter_lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self._max_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timeouts": self._timeouts,
+                "wallets_busy": len(self._wallet_locks),
+                "avg_wait_ms": self._wait_time / started * 1000 if started else 0.0,
+                "avg_run_ms": self._run_time / finished * 1000 if finished else 0.0
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the pool; queued calls are cancelled"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[CdpExecutor] = None
+
+
+def get_cdp_executor() -> CdpExecutor:
+    """Application-wide CDP executor"""
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = CdpExecutor(
+            max_workers=settings.CDP_EXECUTOR_WORKERS,
+            timeout=settings.CDP_CALL_TIMEOUT
+        )
+    return _executor
+
+
+def shutdown_cdp_executor() -> None:
+    """Stop the application-wide executor (shutdown and tests)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -1,16 +1,77 @@
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 from models.database import StrategyDB, VaultDB, PositionDB, WalletDB
-from typing import Optional, List
+from services.cache import AsyncTTLCache
+from services.indexes import ensure_indexes, verify_indexes
+from services.write_buffer import WriteBehindBuffer
+from services.mongo import get_mongo_client
+from typing import Optional, List, Dict, Any
+import asyncio
+import copy
 import logging
 
 logger = logging.getLogger(__name__)
 
 class DatabaseService:
-    def __init__(self, mongodb_url: str):
-        self.client = AsyncIOMotorClient(mongodb_url)
+    def __init__(
+        self,
+        mongodb_url: Optional[str] = None,
+        cache_ttl: float = 30.0,
+        cache_size: int = 10_000,
+        watch_changes: bool = False,
+        write_behind: bool = True,
+        write_window: float = 0.25,
+        write_max_age: float = 2.0,
+        client: Optional[AsyncIOMotorClient] = None
+    ):
+        """
+        Initialize database service
+
+        Args:
+            mongodb_url: MongoDB connection string
+            cache_ttl: Seconds a cached vault or wallet stays fresh
+            cache_size: Maximum cached documents per collection
+            watch_changes: Invalidate the cache from MongoDB change streams, so
+                writes made by other processes are seen before the TTL runs
+                out (requires a replica set)
+            write_behind: Buffer vault updates and write them in coalesced
+                batches instead of one update_one per call
+            write_window: Quiet period before a vault's buffered changes are written
+            write_max_age: Longest a buffered change may stay unwritten
+            client: Shared Motor client; a private one is created from
+                mongodb_url when omitted
+        """
+        self._owns_client = client is None
+        self.client = client if client is not None else AsyncIOMotorClient(mongodb_url)
         self.db = self.client.helenus2
+        # Read-through caches of validated models, keyed by document "id"
+        self.vault_cache: AsyncTTLCache[VaultDB] = AsyncTTLCache(ttl=cache_ttl, max_size=cache_size)
+        self.wallet_cache: AsyncTTLCache[WalletDB] = AsyncTTLCache(ttl=cache_ttl, max_size=cache_size)
+        self.watch_changes = watch_changes
+        self._watch_tasks: List[asyncio.Task] = []
+        self._watching = False
+        self.vault_writes: Optional[WriteBehindBuffer] = (
+            WriteBehindBuffer(self.db.vaults, window=write_window, max_age=write_max_age)
+            if write_behind else None
+        )
         
+    async def ensure_indexes(self, create: bool = True) -> List[str]:
+        """
+        Check that every declared index exists, creating missing ones if asked
+
+        Args:
+            create: Build missing indexes instead of only reporting them
+
+        Returns:
+            "collection.index" names still missing afterwards
+        """
+        if create:
+            await ensure_indexes(self.db)
+        missing = await verify_indexes(self.db)
+        if missing:
+            logger.warning(f"Missing MongoDB indexes, queries will scan: {', '.join(missing)}")
+        return missing
+
     async def create_strategy(self, strategy: StrategyDB) -> str:
         result = await self.db.strategies.insert_one(strategy.model_dump())
         return str(result.inserted_id)
@@ -20,32 +81,57 @@ class DatabaseService:
         return str(result.inserted_id)
         
     async def get_vault(self, vault_id: str) -> Optional[VaultDB]:
+        self._start_watching()
+        vault = await self.vault_cache.get_or_load(vault_id, lambda: self._load_vault(vault_id))
+        # Callers mutate the returned model, so hand out a copy
+        return vault.model_copy(deep=True) if vault else None
+
+    async def _load_vault(self, vault_id: str) -> Optional[VaultDB]:
+        # Buffered changes are applied on top of what the database returns; the
+        # overlay is read before and after the query in case a flush lands mid-read
+        before = self.vault_writes.overlay(vault_id) if self.vault_writes is not None else {}
         result = await self.db.vaults.find_one({"id": vault_id})
+        if result and self.vault_writes is not None:
+            result.update(before)
+            result.update(self.vault_writes.overlay(vault_id))
         return VaultDB(**result) if result else None
 
     async def update_vault_balance(self, vault_id: str, new_balance: float):
-        await self.db.vaults.update_one(
-            {"id": vault_id},
-            {"$set": {
-                "current_balance": new_balance,
-                "updated_at": datetime.now()
-            }}
-        )
+        await self._update_vault(vault_id, {"current_balance": new_balance})
 
     async def update_vault_settings(self, vault_id: str, new_settings: dict):
-        await self.db.vaults.update_one(
-            {"id": vault_id},
-            {"$set": {
-                "settings": new_settings,
-                "updated_at": datetime.now()
-            }}
-        )
+        await self._update_vault(vault_id, {"settings": new_settings})
+
+    async def _update_vault(self, vault_id: str, fields: Dict[str, Any]):
+        # Copied so later mutation by the caller can't reach the buffer or cache
+        fields = {**copy.deepcopy(fields), "updated_at": datetime.now()}
+        if self.vault_writes is None:
+            try:
+                await self.db.vaults.update_one({"id": vault_id}, {"$set": fields})
+            finally:
+                # After the write, so a read racing with it cannot re-cache the old document
+                self.vault_cache.invalidate(vault_id)
+            return
+
+        # Keep hot vaults in memory with the buffered change applied. Done before
+        # awaiting the buffer (which may flush) so concurrent updates land on the
+        # cache in the same order as in the buffer and none is overwritten
+        cached = self.vault_cache.get(vault_id)
+        self.vault_cache.invalidate(vault_id)
+        if cached is not None:
+            self.vault_cache.set(vault_id, cached.model_copy(update=fields))
+        await self.vault_writes.set(vault_id, fields)
 
     async def get_agent_wallet(self, wallet_id: str) -> Optional[WalletDB]:
         """
         Retrieve the wallet from the database.
         Expects the wallet document to include an "id" field.
         """
+        self._start_watching()
+        wallet = await self.wallet_cache.get_or_load(wallet_id, lambda: self._load_wallet(wallet_id))
+        return wallet.model_copy(deep=True) if wallet else None
+
+    async def _load_wallet(self, wallet_id: str) -> Optional[WalletDB]:
         wallet = await self.db.wallets.find_one({"id": wallet_id})
         return WalletDB(**wallet) if wallet else None
 
@@ -58,5 +144,94 @@ class DatabaseService:
           - private_key: the private key corresponding to the wallet
         """
         result = await self.db.wallets.insert_one(wallet_data)
+        if "id" in wallet_data:
+            self.wallet_cache.invalidate(wallet_data["id"])
         wallet_data["_id"] = str(result.inserted_id)
         return wallet_data
+
+    def _start_watching(self):
+        """Start the change-stream listeners on first use, if enabled"""
+        if self.watch_changes and not self._watching:
+            self._watching = True
+            self._watch_tasks = [
+                asyncio.create_task(self._watch(self.db.vaults, self.vault_cache)),
+                asyncio.create_task(self._watch(self.db.wallets, self.wallet_cache))
+            ]
+
+    async def _watch(self, collection, cache: AsyncTTLCache):
+        """Invalidate cached documents changed by any process"""
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+        while self._watching:
+            try:
+                async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        document = change.get("fullDocument") or {}
+                        if "id" in document:
+                            cache.invalidate(document["id"])
+                        else:
+                            # Deletes only carry the _id, so drop everything
+                            cache.clear()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Change stream on {collection.name} failed: {str(e)}")
+                cache.clear()
+                await asyncio.sleep(5)
+
+    async def stop_watching(self):
+        """Stop the change-stream listeners"""
+        self._watching = False
+        for task in self._watch_tasks:
+            task.cancel()
+        if self._watch_tasks:
+            await asyncio.gather(*self._watch_tasks, return_exceptions=True)
+            self._watch_tasks = []
+
+    async def close(self):
+        """Write buffered changes, stop change streams and close a private client"""
+        if self.vault_writes is not None:
+            await self.vault_writes.stop()
+        await self.stop_watching()
+        if self._owns_client:
+            self.client.close()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit-rate statistics for the vault and wallet caches"""
+        return {
+            "vaults": self.vault_cache.get_stats(),
+            "wallets": self.wallet_cache.get_stats()
+        }
+
+
+_database_service: Optional[DatabaseService] = None
+
+
+def get_database_service() -> DatabaseService:
+    """
+    Application-wide DatabaseService on the shared Motor client.
+
+    Sharing one instance also means one vault cache and one write-behind
+    buffer for the whole process.
+    """
+    global _database_service
+    if _database_service is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        _database_service = DatabaseService(
+            client=get_mongo_client(),
+            cache_ttl=settings.DB_CACHE_TTL,
+            cache_size=settings.DB_CACHE_SIZE,
+            watch_changes=settings.DB_CACHE_WATCH_CHANGES,
+            write_behind=settings.DB_WRITE_BEHIND,
+            write_window=settings.DB_WRITE_WINDOW,
+            write_max_age=settings.DB_WRITE_MAX_AGE
+        )
+    return _database_service
+
+
+async def close_database_service() -> None:
+    """Flush and release the application-wide DatabaseService"""
+    global _database_service
+    if _database_service is not None:
+        await _database_service.close()
+        _database_service = None
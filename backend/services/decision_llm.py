@@ -0,0 +1,346 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import math
+import time
+from services.cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Strategy parameters a decision depends on; anything else (wallet data,
+# vault ids) is left out of the cache key
+STRATEGY_FIELDS = ("strategy_id", "target_ltv", "max_leverage", "safety_buffer", "min_apy_spread", "initial_deposit")
+
+# Market snapshot fields and the bucket width each is rounded to. Snapshots
+# in the same buckets are the same question and share one answer.
+MARKET_BUCKETS = {"current_ltv": 0.01, "apy_spread": 0.0025, "risk_level": 0.05}
+
+ACTIONS = ("hold", "open_position", "adjust_position", "close_position")
+ADJUSTMENTS = ("increase", "decrease")
+
+
+def _bucket(value: Any, width: float) -> float:
+    return round(round(float(value or 0) / width) * width, 6)
+
+
+def decision_key(strategy: Dict[str, Any], market: Dict[str, Any]) -> Tuple:
+    """
+    Normalized (strategy params, bucketed market snapshot) cache key
+
+    Args:
+        strategy: Strategy parameters (see STRATEGY_FIELDS)
+        market: current_ltv, apy_spread, risk_level and has_position
+
+    Returns:
+        Hashable key; agents in near-identical situations get the same one
+    """
+    params = tuple(
+        (field, round(float(value), 6) if isinstance(value, (int, float)) else str(value))
+        for field in STRATEGY_FIELDS
+        if (value := strategy.get(field)) is not None
+    )
+    snapshot = tuple((field, _bucket(market.get(field), width)) for field, width in MARKET_BUCKETS.items())
+    return params, snapshot, ("has_position", bool(market.get("has_position")))
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
+
+
+def validate_decision(decision: Any, strategy: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check an untrusted decision against the strategy before it can reach a trade
+
+    Only the fields the action needs are kept. borrow_amount must be within
+    initial_deposit * target_ltv, target_leverage within [1, max_leverage]
+    and action_type "increase" or "decrease"; anything else turns the
+    decision into a hold.
+
+    Returns:
+        A clean decision ({"action", "reason", ...})
+    """
+    if not isinstance(decision, dict):
+        return {"action": "hold", "reason": "Decision is not an object"}
+    action = decision.get("action")
+    reason = str(decision.get("reason", ""))[:500]
+
+    def hold(problem: str) -> Dict[str, Any]:
+        return {"action": "hold", "reason": f"Rejected {action!r}: {problem}"}
+
+    if action not in ACTIONS:
+        return hold("unknown action")
+    if action == "open_position":
+        borrow_amount = _number(decision.get("borrow_amount"))
+        limit = float(strategy.get("initial_deposit") or 0) * float(strategy.get("target_ltv", 0))
+        if borrow_amount is None or not 0 < borrow_amount <= limit:
+            return hold(f"borrow_amount {decision.get('borrow_amount')!r} outside (0, {limit}]")
+        return {"action": action, "borrow_amount": borrow_amount, "reason": reason}
+    if action == "adjust_position":
+        action_type = decision.get("action_type")
+        if action_type not in ADJUSTMENTS:
+            return hold(f"action_type {action_type!r}")
+        target_leverage = _number(decision.get("target_leverage"))
+        max_leverage = float(strategy.get("max_leverage") or 1)
+        if target_leverage is None or not 1 <= target_leverage <= max_leverage:
+            return hold(f"target_leverage {decision.get('target_leverage')!r} outside [1, {max_leverage}]")
+        return {"action": action, "action_type": action_type, "target_leverage": target_leverage, "reason": reason}
+    return {"action": action, "reason": reason}
+
+
+def situation(key: Tuple) -> Dict[str, Any]:
+    """The prompt payload for a key: exactly what the model is asked about"""
+    params, snapshot, (_, has_position) = key
+    return {"strategy": dict(params), "market": {**dict(snapshot), "has_position": has_position}}
+
+
+class DecisionModel(ABC):
+    """Maps agent situations to decisions, many per call"""
+
+    @abstractmethod
+    async def decide(self, situations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One decision ({"action", "reason", ...}) per situation, in order"""
+
+
+class DeterministicDecisionModel(DecisionModel):
+    """
+    Local stand-in for the LLM: the strategy rules as a pure function.
+
+    The same situation always gets the same decision and no network is
+    involved, so tests and offline runs are reproducible.
+    """
+
+    def __init__(self, max_risk: float = 0.8):
+        self.max_risk = max_risk
+        self.calls = 0
+
+    async def decide(self, situations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        return [self._decide(item["strategy"], item["market"]) for item in situations]
+
+    def _decide(self, strategy: Dict[str, Any], market: Dict[str, Any]) -> Dict[str, Any]:
+        target_ltv = float(strategy.get("target_ltv", 0.75))
+        buffer = float(strategy.get("safety_buffer", 0.05))
+        min_spread = float(strategy.get("min_apy_spread", 0.02))
+        ltv, spread, risk = market["current_ltv"], market["apy_spread"], market["risk_level"]
+
+        if market["has_position"]:
+            if risk > self.max_risk or spread < 0:
+                return {"action": "close_position", "reason": f"risk {risk} or spread {spread} out of bounds"}
+            if ltv > target_ltv + buffer:
+                return {"action": "adjust_position", "action_type": "decrease",
+                        "target_leverage": self._leverage(target_ltv), "reason": f"LTV {ltv} above target"}
+            if ltv < target_ltv - buffer and spread >= min_spread:
+                return {"action": "adjust_position", "action_type": "increase",
+                        "target_leverage": self._leverage(target_ltv), "reason": f"LTV {ltv} below target"}
+            return {"action": "hold", "reason": "Position within bounds"}
+
+        if spread >= min_spread and risk <= self.max_risk:
+            return {"action": "open_position",
+                    "borrow_amount": round(float(strategy.get("initial_deposit", 0)) * target_ltv, 6),
+                    "reason": f"APY spread {spread} above {min_spread}"}
+        return {"action": "hold", "reason": "No opportunity"}
+
+    @staticmethod
+    def _leverage(ltv: float) -> float:
+        return round(1 / (1 - ltv), 4) if ltv < 1 else 1.0
+
+
+class ChatDecisionModel(DecisionModel):
+    """
+    Decisions from a chat model (ChatOpenAI), one request per batch.
+
+    All situations go into a single prompt as a numbered JSON list and the
+    model answers with a JSON list of decisions in the same order.
+    """
+
+    PROMPT = (
+        "You manage leveraged ETH/USDC positions on Morpho. For each numbered situation "
+        "below, choose one action from {actions}. Adjustments need action_type "
+        "(\"increase\" or \"decrease\") and target_leverage; open_position needs borrow_amount. "
+        "Reply with only a JSON array holding one object per situation, in order, each with "
+        "\"action\", \"reason\" and the fields its action needs.\n\nSituations:\n{situations}"
+    )
+
+    def __init__(self, model: str, temperature: float = 0.0):
+        self.model = model
+        self.temperature = temperature
+        self._llm = None
+
+    @property
+    def llm(self):
+        # langchain loads on first decision, not at import
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            self._llm = ChatOpenAI(model=self.model, temperature=self.temperature)
+        return self._llm
+
+    async def decide(self, situations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from langchain.schema import HumanMessage
+        prompt = self.PROMPT.format(
+            actions=", ".join(ACTIONS),
+            situations="\n".join(f"{i}. {json.dumps(item, sort_keys=True)}" for i, item in enumerate(situations, 1))
+        )
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        decisions = self._parse(response.content)
+        if len(decisions) != len(situations):
+            raise ValueError(f"Model answered {len(decisions)} of {len(situations)} situations")
+        # Model output drives on-chain calls: only decisions within the
+        # strategy's limits get through
+        return [validate_decision(decision, item["strategy"]) for decision, item in zip(decisions, situations)]
+
+    @staticmethod
+    def _parse(content: str) -> List[Any]:
+        start, end = content.find("["), content.rfind("]")
+        if start < 0 or end < start:
+            raise ValueError("Model reply holds no JSON array")
+        decisions = json.loads(content[start:end + 1])
+        if not isinstance(decisions, list):
+            raise ValueError("Model reply holds no JSON array")
+        return decisions
+
+
+class DecisionBatcher:
+    """
+    Merges concurrent decide() calls into one model call.
+
+    The first request of a batch waits up to `max_wait` seconds for others;
+    a batch is sent early once it holds `max_batch` requests.
+    """
+
+    def __init__(self, model: DecisionModel, max_batch: int = 32, max_wait: float = 0.02):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.model_calls = 0
+        self.prompts = 0
+        self.failures = 0
+        self.model_time = 0.0
+
+    async def decide(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        self.model_calls += 1
+        self.prompts += len(batch)
+        started = time.perf_counter()
+        try:
+            decisions = await self.model.decide([item for item, _ in batch])
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Decision model failed for a batch of {len(batch)}: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.model_time += time.perf_counter() - started
+        for (_, future), decision in zip(batch, decisions):
+            if not future.done():
+                future.set_result(decision)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model_calls": self.model_calls,
+            "prompts": self.prompts,
+            "avg_batch": round(self.prompts / self.model_calls, 2) if self.model_calls else 0.0,
+            "failures": self.failures,
+            "avg_model_ms": round(self.model_time * 1000 / self.model_calls, 1) if self.model_calls else 0.0
+        }
+
+
+class DecisionLLM:
+    """
+    Agent decisions through a prompt cache and a batching layer.
+
+    Each request is reduced to decision_key(): the strategy parameters that
+    matter plus a bucketed market snapshot. Agents asking the same question
+    within `cache_ttl` share one answer, concurrent identical questions
+    share one in-flight request, and the distinct questions of a tick are
+    batched into few model calls. Model traffic then follows the number of
+    distinct situations, not the number of agents.
+
+    Example:
+        llm = get_decision_llm()
+        decision = await llm.decide(strategy, {"current_ltv": 0.6, "apy_spread": 0.03,
+                                               "risk_level": 0.2, "has_position": True})
+    """
+
+    def __init__(
+        self,
+        model: DecisionModel,
+        cache_ttl: float = 300.0,
+        cache_size: int = 10_000,
+        max_batch: int = 32,
+        max_wait: float = 0.02
+    ):
+        """
+        Args:
+            model: What answers the prompts
+            cache_ttl: Seconds a decision is reused for the same situation
+            cache_size: Cached situations before LRU eviction
+            max_batch, max_wait: Batching limits (see DecisionBatcher)
+        """
+        self.model = model
+        self.cache: AsyncTTLCache[Dict[str, Any]] = AsyncTTLCache(ttl=cache_ttl, max_size=cache_size)
+        self.batcher = DecisionBatcher(model, max_batch=max_batch, max_wait=max_wait)
+
+    async def decide(self, strategy: Dict[str, Any], market: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Decision for an agent's situation
+
+        Returns:
+            A copy of the decision, safe for the caller to modify
+        """
+        key = decision_key(strategy, market)
+        decision = await self.cache.get_or_load(key, lambda: self.batcher.decide(situation(key)))
+        return dict(decision)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"cache": self.cache.get_stats(), **self.batcher.get_stats()}
+
+
+_decision_llm: Optional[DecisionLLM] = None
+
+
+def get_decision_llm() -> DecisionLLM:
+    """Process-wide decision LLM, built from settings on first use"""
+    global _decision_llm
+    if _decision_llm is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        if (settings.DECISION_MODEL or "openai").lower() == "deterministic":
+            model: DecisionModel = DeterministicDecisionModel()
+        else:
+            model = ChatDecisionModel(settings.LLM_MODEL)
+        _decision_llm = DecisionLLM(
+            model,
+            cache_ttl=settings.DECISION_CACHE_TTL,
+            max_batch=settings.DECISION_BATCH_SIZE,
+            max_wait=settings.DECISION_BATCH_WAIT_MS / 1000
+        )
+    return _decision_llm
+
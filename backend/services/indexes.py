@@ -0,0 +1,179 @@
+from typing import Any, Dict, List, Tuple
+from datetime import datetime
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes every helenus2 collection needs. Lookups by "id" back get_vault and
+# get_agent_wallet; the user_id+status compounds back per-user listings.
+# TTL indexes go here too, as IndexModel(..., expireAfterSeconds=N).
+INDEXES: Dict[str, List[IndexModel]] = {
+    "vaults": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_status"),
+        IndexModel([("strategy_id", ASCENDING)], name="strategy_id"),
+    ],
+    "wallets": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_status"),
+    ],
+    "strategies": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_id_status"),
+    ],
+    "positions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("vault_id", ASCENDING), ("status", ASCENDING)], name="vault_id_status"),
+    ],
+    "agent_snapshots": [
+        IndexModel([("agent_id", ASCENDING)], name="agent_id_unique", unique=True),
+    ],
+    "step_journals": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("strategy_id", ASCENDING), ("status", ASCENDING)], name="strategy_id_status"),
+    ],
+    # Raw samples live in the agent_metrics time-series collection, which
+    # expires them itself (METRICS_RAW_RETENTION)
+    "agent_metric_rollups": [
+        IndexModel(
+            [("agent_id", ASCENDING), ("metric", ASCENDING), ("resolution", ASCENDING), ("bucket", ASCENDING)],
+            name="agent_metric_bucket",
+            unique=True
+        ),
+    ],
+}
+
+# Filters DatabaseService issues, used to check that each one is index-backed.
+# Add new service queries here alongside the index that serves them.
+SERVICE_QUERIES: List[Tuple[str, Dict[str, Any]]] = [
+    ("vaults", {"id": "vault-id"}),     # get_vault, update_vault_balance, update_vault_settings
+    ("wallets", {"id": "wallet-id"}),   # get_agent_wallet
+    ("agent_metric_rollups", {"agent_id": "vault-id", "metric": "equity", "resolution": "1h",
+                              "bucket": {"$gte": datetime(2025, 1, 1)}}),  # MongoMetricsStore.get_rollups
+    ("step_journals", {"strategy_id": "vault-id", "status": "running"}),  # MongoJournalStore.load_open
+    ("step_journals", {"id": "journal-id"}),  # MongoJournalStore.save_step, finish
+    ("agent_snapshots", {"agent_id": "vault-id"}),  # MongoSnapshotStore.save
+]
+
+# Options that must match for an existing index to count as the declared one
+_INDEX_OPTIONS = ("unique", "expireAfterSeconds", "sparse")
+
+# IndexOptionsConflict, IndexKeySpecsConflict: the server will not hold the
+# declared index next to an existing one on the same keys
+_CONFLICT_CODES = (85, 86)
+
+
+def _keys(index: IndexModel) -> List[Tuple[str, Any]]:
+    return list(index.document["key"].items())
+
+
+def query_is_indexed(collection: str, query: Dict[str, Any]) -> bool:
+    """True if a declared index on the collection has the query's fields as a key prefix"""
+    fields = set(query)
+    for index in INDEXES.get(collection, []):
+        prefix = [field for field, _ in _keys(index)][:len(fields)]
+        if set(prefix) == fields:
+            return True
+    return False
+
+
+def _matches(info: Dict[str, Any], index: IndexModel) -> bool:
+    """True if an index_information() entry is the declared index"""
+    declared = index.document
+    if list(info["key"]) != _keys(index):
+        return False
+    return all(info.get(option) == declared.get(option) for option in _INDEX_OPTIONS)
+
+
+async def verify_indexes(db) -> List[str]:
+    """
+    Compare the declared indexes with the database
+
+    Args:
+        db: Motor database
+
+    Returns:
+        "collection.index" names that are missing or have different options
+    """
+    missing = []
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        for index in indexes:
+            if not any(_matches(info, index) for info in existing.values()):
+                missing.append(f"{collection}.{index.document['name']}")
+    return missing
+
+
+async def _has_duplicates(collection, index: IndexModel) -> bool:
+    """True if documents share a key of `index`, which would fail a unique build"""
+    fields = [field for field, _ in _keys(index)]
+    pipeline = [
+        {"$group": {"_id": {field: f"${field}" for field in fields}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1},
+    ]
+    async for _ in collection.aggregate(pipeline):
+        return True
+    return False
+
+
+async def _replace_index(collection, name: str, index: IndexModel, legacy: List[str]) -> None:
+    """
+    Build `index` in place of the `legacy` indexes on the same keys
+
+    The new index is built first and the legacy ones dropped only once it
+    exists, so a failed build (duplicate keys under a new unique index)
+    leaves the collection indexed as before. Servers that refuse two
+    indexes on one key pattern get the legacy index dropped right before
+    the build, after checking the build can succeed.
+    """
+    try:
+        await collection.create_indexes([index])
+    except OperationFailure as e:
+        if e.code not in _CONFLICT_CODES:
+            raise
+        if index.document.get("unique") and await _has_duplicates(collection, index):
+            raise OperationFailure(f"Duplicate keys in {name}, keeping {', '.join(legacy)}") from e
+        for legacy_name in legacy:
+            await collection.drop_index(legacy_name)
+        await collection.create_indexes([index])
+        return
+    for legacy_name in legacy:
+        logger.warning(f"Dropping index {legacy_name}, replaced by {name}")
+        await collection.drop_index(legacy_name)
+
+
+async def ensure_indexes(db) -> List[str]:
+    """
+    Create any declared index that is missing
+
+    An existing index on the same keys with different options (for example
+    the non-unique wallets "id" index created by older init scripts) is
+    replaced by the declared one, which is built before the old one is
+    dropped (see _replace_index).
+
+    Args:
+        db: Motor database
+
+    Returns:
+        "collection.index" names that were created
+    """
+    created = []
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        for index in indexes:
+            if any(_matches(info, index) for info in existing.values()):
+                continue
+            name = f"{collection}.{index.document['name']}"
+            legacy = [legacy_name for legacy_name, info in existing.items() if list(info["key"]) == _keys(index)]
+            try:
+                await _replace_index(db[collection], name, index, legacy)
+            except OperationFailure as e:
+                logger.error(f"Failed to create index {name}: {str(e)}")
+                raise
+            created.append(name)
+    if created:
+        logger.info(f"Created indexes: {', '.join(created)}")
+    return created
@@ -0,0 +1,534 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import math
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions and their bucket width in seconds
+RESOLUTIONS: Dict[str, int] = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Metric the PnL/ROI/Sharpe/drawdown queries read by default
+EQUITY_METRIC = "equity"
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the rollup bucket containing timestamp"""
+    width = RESOLUTIONS[resolution]
+    seconds = (timestamp - _EPOCH).total_seconds()
+    return _EPOCH + timedelta(seconds=seconds - seconds % width)
+
+
+def numeric_fields(value: Any, prefix: str, max_depth: int = 3) -> Iterable[Tuple[str, float]]:
+    """Yield (dotted name, value) for every numeric leaf of a metric value"""
+    if isinstance(value, bool):
+        return
+    if isinstance(value, (int, float)):
+        if math.isfinite(value):
+            yield prefix, float(value)
+    elif isinstance(value, dict) and max_depth > 0:
+        for key, item in value.items():
+            yield from numeric_fields(item, f"{prefix}.{key}", max_depth - 1)
+
+
+class Rollup:
+    """Aggregate of the samples of one metric in one bucket"""
+    __slots__ = ("count", "sum", "min", "max", "first", "last", "first_ts", "last_ts")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.first = self.last = 0.0
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+
+    def add(self, value: float, timestamp: datetime) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.first_ts is None or timestamp < self.first_ts:
+            self.first, self.first_ts = value, timestamp
+        if self.last_ts is None or timestamp >= self.last_ts:
+            self.last, self.last_ts = value, timestamp
+
+    def merge(self, other: "Rollup") -> None:
+        if not other.count:
+            return
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.first_ts is None or other.first_ts < self.first_ts:
+            self.first, self.first_ts = other.first, other.first_ts
+        if self.last_ts is None or other.last_ts >= self.last_ts:
+            self.last, self.last_ts = other.last, other.last_ts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Rollup":
+        rollup = cls()
+        for name in cls.__slots__:
+            setattr(rollup, name, data[name])
+        return rollup
+
+
+RollupKey = Tuple[str, str, str, datetime]  # (agent_id, metric, resolution, bucket)
+
+
+class PartialRollupWrite(Exception):
+    """Some rollups were merged and some were not; `failed` holds the latter"""
+
+    def __init__(self, failed: Dict[RollupKey, "Rollup"], message: str):
+        super().__init__(message)
+        self.failed = failed
+
+
+class MetricsStore(ABC):
+    """Storage for raw metric samples and their rollups"""
+
+    @abstractmethod
+    async def insert_samples(self, samples: List[Dict[str, Any]]) -> None:
+        """Append raw samples ({"ts", "meta": {"agent_id", "metric"}, "value"})"""
+
+    @abstractmethod
+    async def merge_rollups(self, rollups: Dict[RollupKey, Rollup]) -> None:
+        """
+        Fold partial rollups into the stored ones
+
+        Merges add to the stored counts and sums, so they are not idempotent.
+
+        Raises:
+            PartialRollupWrite: If only some rollups were merged
+        """
+
+    @abstractmethod
+    async def get_rollups(
+        self,
+        agent_id: str,
+        metric: str,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Tuple[datetime, Rollup]]:
+        """Stored rollups for a metric, oldest bucket first"""
+
+
+class InMemoryMetricsStore(MetricsStore):
+    """Process-local metrics store, for tests and single-process development"""
+
+    def __init__(self):
+        self.samples: List[Dict[str, Any]] = []
+        self.rollups: Dict[RollupKey, Rollup] = {}
+
+    async def insert_samples(self, samples: List[Dict[str, Any]]) -> None:
+        self.samples.extend(samples)
+
+    async def merge_rollups(self, rollups: Dict[RollupKey, Rollup]) -> None:
+        for key, partial in rollups.items():
+            self.rollups.setdefault(key, Rollup()).merge(partial)
+
+    async def get_rollups(self, agent_id, metric, resolution, start=None, end=None):
+        return sorted(
+            (bucket, rollup)
+            for (a, m, r, bucket), rollup in self.rollups.items()
+            if a == agent_id and m == metric and r == resolution
+            and (start is None or bucket >= start) and (end is None or bucket < end)
+        )
+
+
+class MongoMetricsStore(MetricsStore):
+    """
+    Metrics in MongoDB.
+
+    Raw samples go to a time-series collection (timeField "ts", metaField
+    "meta") that expires them after raw_retention seconds; rollups live in a
+    regular collection keyed by agent, metric, resolution and bucket, so
+    performance queries read a few hundred rollup documents rather than every
+    tick.
+    """
+
+    def __init__(
+        self,
+        db,
+        samples_collection: str = "agent_metrics",
+        rollups_collection: str = "agent_metric_rollups",
+        raw_retention: int = 7 * 86400
+    ):
+        """
+        Initialize Mongo metrics store
+
+        Args:
+            db: Motor database
+            samples_collection: Time-series collection for raw samples
+            rollups_collection: Collection for rollups
+            raw_retention: Seconds raw samples are kept
+        """
+        self.db = db
+        self.samples = db[samples_collection]
+        self.rollups = db[rollups_collection]
+        self.samples_collection = samples_collection
+        self.raw_retention = raw_retention
+        self._ready = False
+
+    async def ensure_collections(self) -> None:
+        """Create the time-series collection if it does not exist"""
+        if self._ready:
+            return
+        try:
+            await self.db.create_collection(
+                self.samples_collection,
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+                expireAfterSeconds=self.raw_retention
+            )
+            logger.info(f"Created time-series collection {self.samples_collection}")
+        except CollectionInvalid:
+            pass
+        self._ready = True
+
+    async def insert_samples(self, samples: List[Dict[str, Any]]) -> None:
+        await self.ensure_collections()
+        await self.samples.insert_many(samples, ordered=False)
+
+    async def merge_rollups(self, rollups: Dict[RollupKey, Rollup]) -> None:
+        keys = list(rollups)
+        operations = []
+        for (agent_id, metric, resolution, bucket), partial in rollups.items():
+            missing_first = {"$eq": [{"$type": "$first_ts"}, "missing"]}
+            missing_last = {"$eq": [{"$type": "$last_ts"}, "missing"]}
+            operations.append(UpdateOne(
+                {"agent_id": agent_id, "metric": metric, "resolution": resolution, "bucket": bucket},
+                [{"$set": {
+                    "count": {"$add": [{"$ifNull": ["$count", 0]}, partial.count]},
+                    "sum": {"$add": [{"$ifNull": ["$sum", 0]}, partial.sum]},
+                    "min": {"$min": ["$min", partial.min]},
+                    "max": {"$max": ["$max", partial.max]},
+                    "first": {"$cond": [
+                        {"$or": [missing_first, {"$lt": [partial.first_ts, "$first_ts"]}]},
+                        partial.first, "$first"
+                    ]},
+                    "first_ts": {"$min": ["$first_ts", partial.first_ts]},
+                    "last": {"$cond": [
+                        {"$or": [missing_last, {"$gte": [partial.last_ts, "$last_ts"]}]},
+                        partial.last, "$last"
+                    ]},
+                    "last_ts": {"$max": ["$last_ts", partial.last_ts]}
+                }}],
+                upsert=True
+            ))
+        if not operations:
+            return
+        try:
+            await self.rollups.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: every operation without a write error was applied
+            failed = {keys[error["index"]] for error in e.details.get("writeErrors", [])}
+            raise PartialRollupWrite(
+                {key: rollups[key] for key in failed},
+                f"{len(failed)} of {len(operations)} rollup merges failed"
+            ) from e
+
+    async def get_rollups(self, agent_id, metric, resolution, start=None, end=None):
+        query: Dict[str, Any] = {"agent_id": agent_id, "metric": metric, "resolution": resolution}
+        if start or end:
+            query["bucket"] = {}
+            if start:
+                query["bucket"]["$gte"] = start
+            if end:
+                query["bucket"]["$lt"] = end
+        cursor = self.rollups.find(query, {"_id": 0}).sort("bucket", 1)
+        return [(doc["bucket"], Rollup.from_dict(doc)) async for doc in cursor]
+
+
+def compute_performance(
+    rollups: List[Tuple[datetime, Rollup]],
+    resolution: str,
+    risk_free_rate: float = 0.0
+) -> Dict[str, float]:
+    """
+    PnL, ROI, annualised Sharpe ratio and maximum drawdown of an equity series
+
+    Period returns are taken between consecutive bucket closes. Drawdown
+    compares each bucket's low with the highest high of the buckets before it,
+    so a drop within the bucket that set the peak is only seen at a finer
+    resolution.
+
+    Args:
+        rollups: Equity rollups, oldest first
+        resolution: Resolution of the rollups
+        risk_free_rate: Annual risk-free rate subtracted from returns
+
+    Returns:
+        Dict with pnl, roi, sharpe_ratio and max_drawdown (a fraction)
+    """
+    if not rollups:
+        return {"pnl": 0.0, "roi": 0.0, "sharpe_ratio": 0.0, "max_drawdown": 0.0}
+
+    start_value = rollups[0][1].first
+    end_value = rollups[-1][1].last
+    pnl = end_value - start_value
+    roi = pnl / start_value if start_value else 0.0
+
+    periods_per_year = 365 * 86400 / RESOLUTIONS[resolution]
+    closes = [start_value] + [rollup.last for _, rollup in rollups]
+    returns = [
+        current / previous - 1 - risk_free_rate / periods_per_year
+        for previous, current in zip(closes, closes[1:]) if previous
+    ]
+    sharpe = 0.0
+    if len(returns) > 1:
+        mean = sum(returns) / len(returns)
+        std = math.sqrt(sum((r - mean) ** 2 for r in returns) / (len(returns) - 1))
+        if std > 0:
+            sharpe = mean / std * math.sqrt(periods_per_year)
+
+    peak = start_value
+    max_drawdown = 0.0
+    for _, rollup in rollups:
+        if peak > 0:
+            max_drawdown = max(max_drawdown, (peak - rollup.min) / peak)
+        peak = max(peak, rollup.max)
+
+    return {"pnl": pnl, "roi": roi, "sharpe_ratio": sharpe, "max_drawdown": max_drawdown}
+
+
+class MetricsPipeline:
+    """
+    Batched metrics ingestion with incremental rollups.
+
+    record() is synchronous and cheap: samples are buffered and folded into
+    1m/1h/1d rollups in memory. A background task writes raw samples with one
+    insert_many and the touched rollups with one bulk_write every
+    flush_interval seconds, or as soon as batch_size samples are waiting.
+
+    Example:
+        pipeline = MetricsPipeline(MongoMetricsStore(db))
+        pipeline.record(vault_id, "equity", 1050.0)
+        stats = await pipeline.get_performance(vault_id, resolution="1h")
+    """
+
+    def __init__(
+        self,
+        store: MetricsStore,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_buffer: int = 50_000,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        """
+        Initialize metrics pipeline
+
+        Args:
+            store: Where samples and rollups are written
+            batch_size: Buffered samples that trigger an early flush
+            flush_interval: Seconds between background flushes
+            max_buffer: Samples kept while the store is unreachable; older
+                raw samples are dropped beyond this (rollups are kept)
+            clock: UTC time source for samples without a timestamp
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.clock = clock
+        self._samples: List[Dict[str, Any]] = []
+        self._rollups: Dict[RollupKey, Rollup] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, agent_id: str, metric: str, value: float, timestamp: Optional[datetime] = None) -> None:
+        """
+        Buffer one sample
+
+        Args:
+            agent_id: Series owner (the agent's vault id)
+            metric: Metric name, e.g. "equity"
+            value: Sample value
+            timestamp: UTC sample time, now if omitted
+        """
+        timestamp = timestamp or self.clock()
+        value = float(value)
+        self._samples.append({"ts": timestamp, "meta": {"agent_id": agent_id, "metric": metric}, "value": value})
+        for resolution in RESOLUTIONS:
+            key = (agent_id, metric, resolution, bucket_start(timestamp, resolution))
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                rollup = self._rollups[key] = Rollup()
+            rollup.add(value, timestamp)
+        self.recorded += 1
+
+        if len(self._samples) > self.max_buffer:
+            overflow = len(self._samples) - self.max_buffer
+            del self._samples[:overflow]
+            self.dropped += overflow
+        self._start()
+        if len(self._samples) >= self.batch_size:
+            self._wakeup.set()
+
+    def _start(self):
+        if self._running:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Flushed explicitly or by the next record() made inside the loop
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background flusher and write what is buffered"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while self._running:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in metrics flush loop: {str(e)}")
+
+    async def flush(self) -> int:
+        """
+        Write buffered samples and rollups
+
+        Returns:
+            Number of raw samples written
+        """
+        async with self._flush_lock:
+            samples, self._samples = self._samples, []
+            rollups, self._rollups = self._rollups, {}
+            if not samples and not rollups:
+                return 0
+            try:
+                await self.store.merge_rollups(rollups)
+            except PartialRollupWrite as e:
+                # Only the failed merges are retried; the rest are stored and
+                # merging them again would count them twice
+                logger.error(f"Failed to write metric rollups: {str(e)}")
+                self._requeue_rollups(e.failed)
+            except Exception as e:
+                logger.error(f"Failed to write metric rollups: {str(e)}")
+                self._requeue_rollups(rollups)
+                self._samples[:0] = samples
+                return 0
+            try:
+                if samples:
+                    await self.store.insert_samples(samples)
+            except Exception as e:
+                # Rollups are already stored; keep the raw samples for the next try
+                logger.error(f"Failed to write metric samples: {str(e)}")
+                self._samples[:0] = samples
+                return 0
+            self.written += len(samples)
+            return len(samples)
+
+    def _requeue_rollups(self, rollups: Dict[RollupKey, Rollup]) -> None:
+        for key, partial in rollups.items():
+            partial.merge(self._rollups.get(key, Rollup()))
+            self._rollups[key] = partial
+
+    async def get_series(
+        self,
+        agent_id: str,
+        metric: str,
+        resolution: str = "1h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Downsampled series for a metric
+
+        Returns:
+            One dict per bucket with bucket, count, mean, min, max, first and last
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        await self.flush()
+        return [
+            {
+                "bucket": bucket,
+                "count": rollup.count,
+                "mean": rollup.sum / rollup.count if rollup.count else 0.0,
+                "min": rollup.min,
+                "max": rollup.max,
+                "first": rollup.first,
+                "last": rollup.last
+            }
+            for bucket, rollup in await self.store.get_rollups(agent_id, metric, resolution, start, end)
+        ]
+
+    async def get_performance(
+        self,
+        agent_id: str,
+        metric: str = EQUITY_METRIC,
+        resolution: str = "1h",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        risk_free_rate: float = 0.0
+    ) -> Dict[str, float]:
+        """PnL, ROI, Sharpe ratio and max drawdown of an agent's equity from rollups"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        await self.flush()
+        rollups = await self.store.get_rollups(agent_id, metric, resolution, start, end)
+        return compute_performance(rollups, resolution, risk_free_rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pipeline statistics"""
+        return {
+            "buffered": len(self._samples),
+            "pending_rollups": len(self._rollups),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped
+        }
+
+
+_pipeline: Optional[MetricsPipeline] = None
+
+
+def get_metrics_pipeline() -> MetricsPipeline:
+    """Process-wide metrics pipeline, built from settings on first use"""
+    global _pipeline
+    if _pipeline is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        if (settings.METRICS_BACKEND or "mongo").lower() == "memory":
+            store: MetricsStore = InMemoryMetricsStore()
+        else:
+            from services.mongo import get_mongo_client
+            store = MongoMetricsStore(get_mongo_client().helenus2, raw_retention=settings.METRICS_RAW_RETENTION)
+        _pipeline = MetricsPipeline(store, flush_interval=settings.METRICS_FLUSH_INTERVAL)
+    return _pipeline
+
+
+async def stop_metrics_pipeline() -> None:
+    """Flush and stop the process-wide pipeline, if one was created"""
+    if _pipeline is not None:
+        await _pipeline.stop()
@@ -0,0 +1,162 @@
+from typing import Any, Dict, Optional, Tuple
+from collections import defaultdict
+import logging
+import threading
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection-pool counters fed by PyMongo's CMAP events.
+
+    PyMongo calls listeners from its own threads, so counters are guarded by
+    a lock. Utilization is connections checked out over maxPoolSize.
+    """
+
+    def __init__(self, max_pool_size: int = 100):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple, int] = defaultdict(int)
+        self._in_use: Dict[Tuple, int] = defaultdict(int)
+        self._waiting: Dict[Tuple, int] = defaultdict(int)
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            for counters in (self._open, self._in_use, self._waiting):
+                counters.pop(event.address, None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._open[event.address] += 1
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._open[event.address] = max(0, self._open[event.address] - 1)
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._waiting[event.address] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._waiting[event.address] = max(0, self._waiting[event.address] - 1)
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._waiting[event.address] = max(0, self._waiting[event.address] - 1)
+            self._in_use[event.address] += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._in_use[event.address] = max(0, self._in_use[event.address] - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics, overall and per server"""
+        with self._lock:
+            servers = {
+                f"{host}:{port}": {
+                    "open": self._open[(host, port)],
+                    "in_use": self._in_use[(host, port)],
+                    "waiting": self._waiting[(host, port)],
+                    "utilization": self._in_use[(host, port)] / self.max_pool_size if self.max_pool_size else 0.0
+                }
+                for host, port in set(self._open) | set(self._in_use) | set(self._waiting)
+            }
+            in_use = sum(self._in_use.values())
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open": sum(self._open.values()),
+                "in_use": in_use,
+                "waiting": sum(self._waiting.values()),
+                "peak_utilization": max((s["utilization"] for s in servers.values()), default=0.0),
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "pool_clears": self.pool_clears,
+                "servers": servers
+            }
+
+
+_client: Optional[AsyncIOMotorClient] = None
+_pool_metrics: Optional[PoolMetrics] = None
+
+
+def create_mongo_client(settings: Any, pool_metrics: Optional[PoolMetrics] = None) -> AsyncIOMotorClient:
+    """Build a Motor client with the pool limits and timeouts from settings"""
+    return AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        event_listeners=[pool_metrics] if pool_metrics else None
+    )
+
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    """
+    Application-wide Motor client.
+
+    Every service shares this client and therefore one connection pool and
+    one set of server-monitoring threads. It is created on first use and
+    closed by close_mongo_client() when the app shuts down.
+    """
+    global _client, _pool_metrics
+    if _client is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        _pool_metrics = PoolMetrics(max_pool_size=settings.MONGO_MAX_POOL_SIZE)
+        _client = create_mongo_client(settings, _pool_metrics)
+        logger.info(
+            f"MongoDB client created (pool {settings.MONGO_MIN_POOL_SIZE}-{settings.MONGO_MAX_POOL_SIZE})"
+        )
+    return _client
+
+
+async def get_database() -> AsyncIOMotorDatabase:
+    """FastAPI dependency yielding the application database"""
+    return get_mongo_client().helenus2
+
+
+def close_mongo_client() -> None:
+    """Close the application-wide client"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+        logger.info("MongoDB client closed")
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection-pool metrics of the application-wide client"""
+    if _pool_metrics is None:
+        return {"max_pool_size": 0, "open": 0, "in_use": 0, "waiting": 0, "servers": {}}
+    return _pool_metrics.get_stats()
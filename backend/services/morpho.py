@@ -3,6 +3,7 @@ from decimal import Decimal
 import logging
 from datetime import datetime, timedelta
 from cdp_langchain.utils import CdpAgentkitWrapper
+from services.step_journal import StepFailed, StepJournal, get_step_journal
 from models.strategy import (
     StrategyCreate,
     StrategyState,
@@ -15,8 +16,9 @@ logger = logging.getLogger(__name__)
 class MorphoService:
     """Service for interacting with Morpho protocol"""
     
-    def __init__(self, cdp_wrapper: CdpAgentkitWrapper):
+    def __init__(self, cdp_wrapper: CdpAgentkitWrapper, journal: Optional[StepJournal] = None):
         self.cdp_wrapper = cdp_wrapper
+        self.journal = journal or get_step_journal()
         self.ETH_ADDRESS = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
         self.USDC_ADDRESS = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
         self.MORPHO_MARKETS = {
@@ -63,83 +65,95 @@ class MorphoService:
         target_leverage: Decimal,
         max_slippage: Decimal
     ) -> Dict[str, Any]:
-        """Execute the leveraged looping strategy"""
+        """
+        Execute the leveraged looping strategy
+
+        Every deposit, borrow and swap goes through the step journal. If a
+        step fails (or the process dies mid-loop) the journal stays open, and
+        the next call resumes from the last confirmed step with the
+        parameters the run was started with instead of looping from scratch.
+        """
+        market = self.MORPHO_MARKETS["ETH-USDC"]
+        params = {
+            "initial_collateral": str(initial_collateral),
+            "target_leverage": str(target_leverage),
+            "max_slippage": str(max_slippage)
+        }
         try:
-            # 1. Initial deposit
-            deposit_result = await self.cdp_wrapper.execute_action(
-                "morpho_deposit",
-                {
-                    "token": self.ETH_ADDRESS,
-                    "amount": str(initial_collateral),
-                    "market": self.MORPHO_MARKETS["ETH-USDC"]["address"]
-                }
-            )
-            
-            if not deposit_result.success:
-                raise Exception(f"Initial deposit failed: {deposit_result.error}")
-                
-            current_collateral = initial_collateral
-            current_debt = Decimal("0")
-            loops_executed = 0
-            
-            # 2. Execute leverage loops
-            while current_debt / current_collateral < target_leverage and loops_executed < 10:
-                # Calculate safe borrow amount
-                max_borrow = (current_collateral * self.MORPHO_MARKETS["ETH-USDC"]["ltv"]) - current_debt
-                borrow_amount = max_borrow * Decimal("0.95")  # 95% of max to be safe
-                
-                # Execute borrow
-                borrow_result = await self.cdp_wrapper.execute_action(
-                    "morpho_borrow",
-                    {
-                        "market": self.MORPHO_MARKETS["ETH-USDC"]["address"],
-                        "amount": str(borrow_amount),
-                        "max_slippage": str(max_slippage)
-                    }
-                )
-                
-                if not borrow_result.success:
-                    break
-                    
-                current_debt += borrow_amount
-                
-                # Convert USDC to ETH and deposit
-                swap_result = await self.cdp_wrapper.execute_action(
-                    "swap",
-                    {
-                        "token_in": self.USDC_ADDRESS,
-                        "token_out": self.ETH_ADDRESS,
-                        "amount_in": str(borrow_amount),
-                        "max_slippage": str(max_slippage)
-                    }
-                )
-                
-                if not swap_result.success:
-                    break
-                    
-                eth_received = Decimal(str(swap_result.data["amount_out"]))
-                current_collateral += eth_received
-                
-                # Deposit new ETH collateral
-                await self.cdp_wrapper.execute_action(
+            async with self.journal.open(strategy_id, params, self.cdp_wrapper.execute_action) as run:
+                initial_collateral = Decimal(run.params["initial_collateral"])
+                target_leverage = Decimal(run.params["target_leverage"])
+                max_slippage = run.params["max_slippage"]
+
+                # 1. Initial deposit
+                await run.step(
                     "morpho_deposit",
                     {
                         "token": self.ETH_ADDRESS,
-                        "amount": str(eth_received),
-                        "market": self.MORPHO_MARKETS["ETH-USDC"]["address"]
+                        "amount": str(initial_collateral),
+                        "market": market["address"]
                     }
                 )
-                
-                loops_executed += 1
-                
-            return {
-                "success": True,
-                "loops_executed": loops_executed,
-                "final_collateral": current_collateral,
-                "final_debt": current_debt,
-                "achieved_leverage": current_debt / current_collateral
-            }
-            
+
+                current_collateral = initial_collateral
+                current_debt = Decimal("0")
+                loops_executed = 0
+
+                # 2. Execute leverage loops
+                while current_debt / current_collateral < target_leverage and loops_executed < 10:
+                    # Calculate safe borrow amount
+                    max_borrow = (current_collateral * market["ltv"]) - current_debt
+                    borrow_amount = max_borrow * Decimal("0.95")  # 95% of max to be safe
+
+                    # Execute borrow
+                    await run.step(
+                        "morpho_borrow",
+                        {
+                            "market": market["address"],
+                            "amount": str(borrow_amount),
+                            "max_slippage": max_slippage
+                        }
+                    )
+                    current_debt += borrow_amount
+
+                    # Convert USDC to ETH and deposit
+                    swap_result = await run.step(
+                        "swap",
+                        {
+                            "token_in": self.USDC_ADDRESS,
+                            "token_out": self.ETH_ADDRESS,
+                            "amount_in": str(borrow_amount),
+                            "max_slippage": max_slippage
+                        }
+                    )
+                    eth_received = Decimal(str(swap_result["amount_out"]))
+                    current_collateral += eth_received
+
+                    # Deposit new ETH collateral
+                    await run.step(
+                        "morpho_deposit",
+                        {
+                            "token": self.ETH_ADDRESS,
+                            "amount": str(eth_received),
+                            "market": market["address"]
+                        }
+                    )
+
+                    loops_executed += 1
+
+                result = {
+                    "loops_executed": loops_executed,
+                    "final_collateral": current_collateral,
+                    "final_debt": current_debt,
+                    "achieved_leverage": current_debt / current_collateral
+                }
+                await run.complete({key: str(value) for key, value in result.items()})
+                return {"success": True, **result, "resumed": run.resumed, "replayed_steps": run.replayed}
+
+        except StepFailed as e:
+            logger.error(f"Leverage loop for {strategy_id} stopped: {str(e)}")
+            # Not final: the next call resumes at this step
+            return {"success": False, "error": str(e), "resumable": not e.final}
         except Exception as e:
             logger.error(f"Error executing leverage loop: {str(e)}")
             return {"success": False, "error": str(e)}
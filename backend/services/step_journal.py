@@ -0,0 +1,282 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+from models.journal import JournalStatus, JournalStep, StepJournalDB, StepStatus
+
+logger = logging.getLogger(__name__)
+
+# (action, params) -> result with .success, .data and .error, like
+# CdpAgentkitWrapper.execute_action
+Executor = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class StepFailed(Exception):
+    """A journaled step did not succeed; `final` once it is out of attempts"""
+
+    def __init__(self, step: JournalStep, final: bool):
+        super().__init__(f"Step {step.index} ({step.action}) failed: {step.error}")
+        self.step = step
+        self.final = final
+
+
+class JournalStore(ABC):
+    """Storage for step journals"""
+
+    @abstractmethod
+    async def load_open(self, strategy_id: str) -> Optional[StepJournalDB]:
+        """The strategy's running journal, if it has one"""
+
+    @abstractmethod
+    async def create(self, journal: StepJournalDB) -> None:
+        """Persist a new journal"""
+
+    @abstractmethod
+    async def save_step(self, journal_id: str, step: JournalStep) -> None:
+        """Write one step (in place, by index)"""
+
+    @abstractmethod
+    async def finish(self, journal_id: str, status: JournalStatus, result: Dict[str, Any]) -> None:
+        """Close a journal"""
+
+
+class InMemoryJournalStore(JournalStore):
+    """Process-local journal store, for tests and single-process development"""
+
+    def __init__(self):
+        self.journals: Dict[str, Dict[str, Any]] = {}
+
+    async def load_open(self, strategy_id: str) -> Optional[StepJournalDB]:
+        for journal in self.journals.values():
+            if journal["strategy_id"] == strategy_id and journal["status"] == JournalStatus.RUNNING:
+                return StepJournalDB.model_validate(journal)
+        return None
+
+    async def create(self, journal: StepJournalDB) -> None:
+        self.journals[journal.id] = journal.model_dump()
+
+    async def save_step(self, journal_id: str, step: JournalStep) -> None:
+        steps = self.journals[journal_id]["steps"]
+        if step.index < len(steps):
+            steps[step.index] = step.model_dump()
+        else:
+            steps.append(step.model_dump())
+
+    async def finish(self, journal_id: str, status: JournalStatus, result: Dict[str, Any]) -> None:
+        self.journals[journal_id].update(status=status, result=result, updated_at=datetime.now())
+
+
+class MongoJournalStore(JournalStore):
+    """
+    Journals in the step_journals collection.
+
+    Each step is written with a single $set on its array slot, so a save
+    costs one small update however long the journal is.
+    """
+
+    def __init__(self, db, collection: str = "step_journals"):
+        self.journals = db[collection]
+
+    async def load_open(self, strategy_id: str) -> Optional[StepJournalDB]:
+        doc = await self.journals.find_one(
+            {"strategy_id": strategy_id, "status": JournalStatus.RUNNING.value},
+            {"_id": 0}
+        )
+        return StepJournalDB.model_validate(doc) if doc else None
+
+    async def create(self, journal: StepJournalDB) -> None:
+        await self.journals.insert_one(journal.model_dump())
+
+    async def save_step(self, journal_id: str, step: JournalStep) -> None:
+        await self.journals.update_one(
+            {"id": journal_id},
+            {"$set": {f"steps.{step.index}": step.model_dump(), "updated_at": datetime.now()}}
+        )
+
+    async def finish(self, journal_id: str, status: JournalStatus, result: Dict[str, Any]) -> None:
+        await self.journals.update_one(
+            {"id": journal_id},
+            {"$set": {"status": status.value, "result": result, "updated_at": datetime.now()}}
+        )
+
+
+class JournalRun:
+    """
+    One execution, or resumption, of a strategy's journaled steps.
+
+    Steps are numbered in the order step() is called. Code driving a run must
+    compute each step's params only from earlier step results (and the run's
+    params), so a resumed run asks for the same steps in the same order.
+    """
+
+    def __init__(self, journal: StepJournalDB, store: JournalStore, execute: Executor, max_attempts: int):
+        self.journal = journal
+        self.store = store
+        self.execute = execute
+        self.max_attempts = max_attempts
+        self.resumed = bool(journal.steps)
+        self.replayed = 0
+        self.executed = 0
+        self._cursor = 0
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Parameters the run was started with"""
+        return self.journal.params
+
+    async def step(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run `action` once, or return its journaled result
+
+        A confirmed step is not executed again. A step that failed, or was in
+        flight when the process died, is executed again with its original
+        params and idempotency key (passed as params["idempotency_key"]).
+
+        Returns:
+            The action's result data
+
+        Raises:
+            StepFailed: If the action did not succeed
+        """
+        index = self._cursor
+        self._cursor += 1
+        if index < len(self.journal.steps):
+            step = self.journal.steps[index]
+            if step.action != action:
+                raise RuntimeError(
+                    f"Journal {self.journal.id} step {index} is {step.action}, resumed run asked for {action}"
+                )
+            if step.status == StepStatus.CONFIRMED:
+                self.replayed += 1
+                return step.result or {}
+            logger.info(f"Retrying {step.status.value} step {index} ({action}) of journal {self.journal.id}")
+        else:
+            step = JournalStep(
+                index=index,
+                action=action,
+                params=params,
+                idempotency_key=f"{self.journal.id}:{index}"
+            )
+            self.journal.steps.append(step)
+
+        step.status = StepStatus.PLANNED
+        step.attempts += 1
+        step.updated_at = datetime.now()
+        await self.store.save_step(self.journal.id, step)
+
+        self.executed += 1
+        try:
+            outcome = await self.execute(action, {**step.params, "idempotency_key": step.idempotency_key})
+            if not outcome.success:
+                raise Exception(outcome.error)
+        except Exception as e:
+            step.status = StepStatus.FAILED
+            step.error = str(e)
+            step.updated_at = datetime.now()
+            await self.store.save_step(self.journal.id, step)
+            raise StepFailed(step, final=step.attempts >= self.max_attempts) from e
+
+        step.status = StepStatus.CONFIRMED
+        step.result = dict(outcome.data or {})
+        step.tx_hash = step.result.get("tx_hash")
+        step.error = None
+        step.updated_at = datetime.now()
+        await self.store.save_step(self.journal.id, step)
+        return step.result
+
+    async def complete(self, result: Dict[str, Any]) -> None:
+        self.journal.status = JournalStatus.COMPLETED
+        await self.store.finish(self.journal.id, JournalStatus.COMPLETED, result)
+
+
+class StepJournal:
+    """
+    Crash-safe execution of multi-step on-chain sequences.
+
+    Every step is persisted as planned before it is sent and as confirmed
+    (with its tx hash and result) or failed after. Opening a strategy whose
+    last run did not finish resumes that run: confirmed steps are replayed
+    from the journal without touching the chain, and execution continues at
+    the first unconfirmed step. After `max_attempts` failures of one step, or
+    on any other error in the run, the journal is closed as failed and the
+    next open starts a new run. A cancelled run stays open and is resumed.
+
+    Example:
+        async with journal.open(strategy_id, params, wrapper.execute_action) as run:
+            await run.step("morpho_deposit", {...})
+            swap = await run.step("swap", {...})
+            await run.complete({"loops_executed": 1})
+    """
+
+    def __init__(self, store: JournalStore, max_attempts: int = 3):
+        """
+        Args:
+            store: Where journals are persisted
+            max_attempts: Tries per step before the journal is failed
+        """
+        self.store = store
+        self.max_attempts = max_attempts
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {"runs": 0, "resumed": 0, "replayed_steps": 0, "executed_steps": 0, "failed_steps": 0}
+
+    @asynccontextmanager
+    async def open(self, strategy_id: str, params: Dict[str, Any], execute: Executor) -> AsyncIterator[JournalRun]:
+        """
+        Start a run for `strategy_id`, or resume its unfinished one
+
+        Runs of one strategy are serialized. `params` is only used for a new
+        run; a resumed run keeps the params it was started with.
+        """
+        lock = self._locks.setdefault(strategy_id, asyncio.Lock())
+        async with lock:
+            journal = await self.store.load_open(strategy_id)
+            if journal is None:
+                journal = StepJournalDB(strategy_id=strategy_id, params=params)
+                await self.store.create(journal)
+            else:
+                self._stats["resumed"] += 1
+                logger.info(f"Resuming journal {journal.id} of {strategy_id} at step {len(journal.steps)}")
+            self._stats["runs"] += 1
+
+            run = JournalRun(journal, self.store, execute, self.max_attempts)
+            try:
+                yield run
+            except StepFailed as e:
+                self._stats["failed_steps"] += 1
+                if e.final:
+                    logger.error(f"Journal {journal.id} of {strategy_id} failed: {str(e)}")
+                    await self.store.finish(journal.id, JournalStatus.FAILED, {"error": str(e)})
+                raise
+            except Exception as e:
+                # Not a failed action but a bug or a journal that no longer
+                # matches the code (a mismatched step, a missing result
+                # field): resuming would fail the same way, so close it
+                logger.error(f"Journal {journal.id} of {strategy_id} aborted: {type(e).__name__}: {str(e)}")
+                await self.store.finish(journal.id, JournalStatus.FAILED, {"error": f"{type(e).__name__}: {str(e)}"})
+                raise
+            finally:
+                self._stats["replayed_steps"] += run.replayed
+                self._stats["executed_steps"] += run.executed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+
+_journal: Optional[StepJournal] = None
+
+
+def get_step_journal() -> StepJournal:
+    """Process-wide step journal, built from settings on first use"""
+    global _journal
+    if _journal is None:
+        from config.settings import get_settings
+        settings = get_settings()
+        if (settings.JOURNAL_BACKEND or "mongo").lower() == "memory":
+            store: JournalStore = InMemoryJournalStore()
+        else:
+            from services.mongo import get_mongo_client
+            store = MongoJournalStore(get_mongo_client().helenus2)
+        _journal = StepJournal(store, max_attempts=settings.JOURNAL_MAX_ATTEMPTS)
+    return _journal
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from services.database import DatabaseService
+from utils.vault_factory import vault_salt
+
+if TYPE_CHECKING:
+    from utils.vault_factory import VaultFactoryClient
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DEPLOYED = "deployed"
+FAILED = "failed"
+
+
+class VaultDeployer:
+    """
+    Counterfactual vault deployment, off the deposit path.
+
+    A vault's deposit address is its CREATE2 address
+    (VaultFactory.computeVaultAddress), known after one eth_call. assign()
+    records it on the vault and returns at once; the contract is deployed by
+    a background task, and funds sent to the address before then stay there.
+    Deployment is idempotent: an address that already has code is marked
+    deployed without a transaction, so a vault left pending by a restart is
+    finished the next time it is assigned.
+
+    Example:
+        deployer = VaultDeployer(factory_client, db)
+        address = await deployer.assign(vault, agent_address, user_address)
+        await deployer.wait_deployed(vault.id)  # only where code must exist
+    """
+
+    def __init__(
+        self,
+        factory_client: "VaultFactoryClient",
+        db: DatabaseService,
+        concurrency: int = 16,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0
+    ):
+        """
+        Args:
+            factory_client: Client of the VaultFactory contract
+            db: Database service holding the vault records
+            concurrency: Deployments in flight at once
+            max_attempts: Tries per vault before it is marked failed
+            retry_delay: Seconds before a failed deployment is retried (doubles each time)
+        """
+        self.factory_client = factory_client
+        self.db = db
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._slots = asyncio.Semaphore(concurrency)
+        self._jobs: Dict[str, asyncio.Future] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stats = {"assigned": 0, "deployed": 0, "already_deployed": 0, "retries": 0, "failed": 0}
+        self._assign_time = 0.0
+        self._deploy_time = 0.0
+
+    async def assign(self, vault: Any, agent_address: str, user_address: str) -> str:
+        """
+        Deposit address of `vault`, deploying its contract in the background
+
+        Args:
+            vault: Vault record (its settings are updated in place)
+            agent_address: Agent wallet allowed to operate the vault
+            user_address: Owner of the vault
+
+        Returns:
+            The vault's contract address (possibly not deployed yet)
+        """
+        settings = dict(vault.settings or {})
+        address = settings.get("deposit_address")
+        if address and settings.get("contract_status", DEPLOYED) == DEPLOYED:
+            return address
+
+        if not address:
+            started = time.perf_counter()
+            address = await self.factory_client.compute_vault_address(
+                agent_address, user_address, vault_salt(vault.id)
+            )
+            settings.update(deposit_address=address, contract_status=PENDING)
+            vault.settings = settings
+            await self.db.update_vault_settings(vault.id, settings)
+            self._assign_time += time.perf_counter() - started
+            self._stats["assigned"] += 1
+            logger.info(f"Vault {vault.id} assigned deposit address {address}")
+
+        self._schedule(vault.id, address, agent_address, user_address)
+        return address
+
+    async def wait_deployed(self, vault_id: str, timeout: Optional[float] = None) -> str:
+        """
+        Wait for the vault's contract to be deployed
+
+        Raises:
+            KeyError: If the vault is neither deployed nor being deployed
+            TimeoutError: If it did not finish in time
+        """
+        job = self._jobs.get(vault_id)
+        if job is None:
+            vault = await self.db.get_vault(vault_id)
+            settings = (vault.settings or {}) if vault is not None else {}
+            if settings.get("deposit_address") and settings.get("contract_status", DEPLOYED) == DEPLOYED:
+                return settings["deposit_address"]
+            raise KeyError(f"No deployment scheduled for vault {vault_id}")
+        try:
+            return await asyncio.wait_for(asyncio.shield(job), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Vault {vault_id} not deployed after {timeout}s") from None
+
+    def _schedule(self, vault_id: str, address: str, agent_address: str, user_address: str) -> None:
+        if vault_id in self._jobs:
+            return
+        self._jobs[vault_id] = asyncio.get_running_loop().create_future()
+        self._tasks[vault_id] = asyncio.create_task(
+            self._deploy(vault_id, address, agent_address, user_address)
+        )
+
+    async def _deploy(self, vault_id: str, address: str, agent_address: str, user_address: str) -> None:
+        job = self._jobs[vault_id]
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    async with self._slots:
+                        started = time.perf_counter()
+                        if await self.factory_client.is_deployed(address):
+                            self._stats["already_deployed"] += 1
+                        else:
+                            deployed = await self.factory_client.deploy_vault(
+                                agent_address, user_address, salt=vault_salt(vault_id)
+                            )
+                            if deployed != address:
+                                raise Exception(f"Vault deployed at {deployed}, expected {address}")
+                            self._deploy_time += time.perf_counter() - started
+                            self._stats["deployed"] += 1
+                    await self._set_status(vault_id, DEPLOYED)
+                    logger.info(f"Vault contract deployed at {address} for vault {vault_id}")
+                    job.set_result(address)
+                    return
+                except Exception as e:
+                    if attempt == self.max_attempts:
+                        raise
+                    self._stats["retries"] += 1
+                    logger.warning(f"Deploying vault {vault_id} failed (attempt {attempt}): {str(e)}")
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error(f"Vault deployment error for vault {vault_id}: {str(e)}")
+            try:
+                await self._set_status(vault_id, FAILED)
+            except Exception as status_error:
+                logger.error(f"Failed to mark vault {vault_id} failed: {str(status_error)}")
+            job.set_exception(e)
+            # Retrieved here so a deployment nobody waited on is not reported
+            job.exception()
+        finally:
+            # The vault record has the outcome; a later assign() retries a failure
+            self._tasks.pop(vault_id, None)
+            self._jobs.pop(vault_id, None)
+
+    async def _set_status(self, vault_id: str, status: str) -> None:
+        vault = await self.db.get_vault(vault_id)
+        if vault is None:
+            return
+        settings = {**(vault.settings or {}), "contract_status": status}
+        await self.db.update_vault_settings(vault_id, settings)
+
+    async def shutdown(self) -> None:
+        """Cancel deployments in flight; their vaults stay pending"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "pending": len(self._jobs),
+            "avg_assign_ms": round(self._assign_time / self._stats["assigned"] * 1000, 2) if self._stats["assigned"] else 0.0,
+            "avg_deploy_ms": round(self._deploy_time / self._stats["deployed"] * 1000, 2) if self._stats["deployed"] else 0.0
+        }
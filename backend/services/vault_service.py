@@ -2,47 +2,76 @@ import os
 import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from datetime import datetime
 import uuid
 from models.database import VaultDB
 from config.settings import get_settings
-from services.database import DatabaseService
+from services.database import DatabaseService, get_database_service
 from core.manager.strategy import StrategyManager
 from core.manager.agent import AgentManager
 from models.vault import Vault, VaultCreate, VaultStatus
 from models.wallet import WalletDB
-from cdp_agentkit_core.actions.morpho.deposit import MorphoDepositInput
-from cdp import Wallet
 from models.websocket import WSMessage, WSMessageType
-from utils.vault_factory import VaultFactoryClient
-from web3 import Web3
+
+if TYPE_CHECKING:
+    from services.vault_deployer import VaultDeployer
+    from utils.vault_factory import VaultFactoryClient
 
 logger = logging.getLogger(__name__)
 
 class VaultService:
-    def __init__(self, manager=None):
+    def __init__(
+        self,
+        manager=None,
+        db: Optional[DatabaseService] = None,
+        agent_manager: Optional[AgentManager] = None,
+        strategy_manager: Optional[StrategyManager] = None,
+        factory_client: Optional["VaultFactoryClient"] = None,
+        deployer: Optional["VaultDeployer"] = None
+    ):
+        """
+        Initialize vault service
+
+        Args:
+            manager: Connection manager instance
+            db, agent_manager, strategy_manager, factory_client, deployer:
+                Shared instances (see core.container); built here when omitted
+        """
         settings = get_settings()
-        self.db = DatabaseService(settings.MONGODB_URL)
-        self.agent_manager = AgentManager()
-        self.strategy_manager = StrategyManager(self.agent_manager)
+        self.db = db or get_database_service()
+        self.agent_manager = agent_manager or AgentManager()
+        self.strategy_manager = strategy_manager or StrategyManager(self.agent_manager)
         self.manager = manager  # Connection manager instance
 
-        ## Load required environment variables:
-        # rpc_url = os.environ.get("WEB3_PROVIDER_URI")
-        # factory_address = os.environ.get("VAULT_FACTORY_ADDRESS")
-        # deployer_private_key = os.environ.get("CDP_API_KEY_PRIVATE_KEY")
-
-        # Load required environment variables from settings
-        rpc_url = settings.WEB3_PROVIDER_URI
-        factory_address = settings.VAULT_FACTORY_ADDRESS
-        deployer_private_key = settings.DEPLOYER_PRIVATE_KEY
-        
-        if not rpc_url or not factory_address or not deployer_private_key:
-            raise Exception("Missing required environment variables for VaultFactory deployment")
-        
-        # Initialize the VaultFactoryClient using settings
-        self.factory_client = VaultFactoryClient(rpc_url, factory_address, deployer_private_key)
+        if factory_client is None:
+            ## Load required environment variables:
+            # rpc_url = os.environ.get("WEB3_PROVIDER_URI")
+            # factory_address = os.environ.get("VAULT_FACTORY_ADDRESS")
+            # deployer_private_key = os.environ.get("CDP_API_KEY_PRIVATE_KEY")
+
+            # Load required environment variables from settings
+            rpc_url = settings.WEB3_PROVIDER_URI
+            factory_address = settings.VAULT_FACTORY_ADDRESS
+            deployer_private_key = settings.DEPLOYER_PRIVATE_KEY
+            
+            if not rpc_url or not factory_address or not deployer_private_key:
+                raise Exception("Missing required environment variables for VaultFactory deployment")
+            
+            # Initialize the VaultFactoryClient using settings
+            from utils.vault_factory import VaultFactoryClient
+            factory_client = VaultFactoryClient(rpc_url, factory_address, deployer_private_key)
+        self.factory_client = factory_client
+
+        if deployer is None:
+            from services.vault_deployer import VaultDeployer
+            deployer = VaultDeployer(
+                factory_client,
+                self.db,
+                concurrency=settings.VAULT_DEPLOY_CONCURRENCY,
+                max_attempts=settings.VAULT_DEPLOY_ATTEMPTS
+            )
+        self.deployer = deployer
 
     async def create_vault(self, data: Dict[str, Any], user_id: str) -> Optional[Vault]:
         # Create a vault record (implementation placeholder)
@@ -65,8 +94,12 @@ class VaultService:
             logger.error(f"Failed to create vault: {str(e)}")
             return None
 
+    async def get_vault(self, vault_id: str) -> Optional[VaultDB]:
+        """Get a vault record by id"""
+        return await self.db.get_vault(vault_id)
+
     async def handle_deposit(self, user_id: str, vault_id: str, amount: float, token: str, user_wallet_address: str, slippage: float = 0.01) -> Dict[str, Any]:
-        """Handle user deposit to CDP wallet and Morpho, deploying the vault contract if needed."""
+        """Handle user deposit to CDP wallet and Morpho, assigning the vault contract address if needed."""
         try:
             wallet = await self.db.get_agent_wallet(user_id)
             if not wallet:
@@ -84,13 +117,13 @@ class VaultService:
             if not user_wallet_address:
                 raise Exception("User wallet address must be provided")
 
-            # If vault contract not deployed, deploy it.
+            # Counterfactual (CREATE2) address: deployment runs in the background
             deposit_address = vault.settings.get("deposit_address") if vault.settings else None
-            if not deposit_address:
-                agent_wallet_address = agent.strategy_params.get("wallet_data", {}).get("address")
+            if not deposit_address or vault.settings.get("contract_status") != "deployed":
+                agent_wallet_address = wallet.address
                 if not agent_wallet_address or not user_wallet_address:
                     raise Exception("Missing wallet addresses for deployment")
-                deposit_address = await self.deploy_vault_contract(vault, agent_wallet_address, user_wallet_address)
+                deposit_address = await self.deployer.assign(vault, agent_wallet_address, user_wallet_address)
 
             # Prepare deposit input parameters (include vault contract address)
             deposit_input = {
@@ -124,11 +157,8 @@ class VaultService:
         Update the vault record with the deployed contract address.
         """
         try:
-            # Run the blocking deployment code in a different thread to avoid blocking the event loop.
-            loop = asyncio.get_event_loop()
-            vault_contract_address = await loop.run_in_executor(
-                None,
-                self.factory_client.deploy_vault,
+            # Pipelined: concurrent deployments share the nonce manager and receipt poller
+            vault_contract_address = await self.factory_client.deploy_vault(
                 agent_wallet_address,
                 user_wallet_address
             )
@@ -3,15 +3,15 @@ import uuid
 import logging
 from datetime import datetime
 from config.settings import get_settings
-from services.database import DatabaseService
+from services.cdp_executor import get_cdp_executor
+from services.database import DatabaseService, get_database_service
 from models.wallet import Wallet as WalletModel, WalletDB
-from cdp import Cdp, Wallet
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 class WalletService:
-    def __init__(self):
+    def __init__(self, db: Optional[DatabaseService] = None):
         # Get CDP credentials from environment variables
         settings = get_settings()
         self.api_key_name = settings.CDP_API_KEY_NAME
@@ -20,7 +20,8 @@ class WalletService:
         if not self.api_key_name or not self.api_key_private_key:
             raise ValueError("CDP API credentials not properly configured in environment variables")
         
-        # Configure CDP SDK
+        # Configure CDP SDK (imported here: it is slow to import)
+        from cdp import Cdp
         try:
             Cdp.configure(self.api_key_name, self.api_key_private_key)
             logger.info("CDP SDK has been successfully configured with CDP API key")
@@ -29,7 +30,7 @@ class WalletService:
             raise
             
         self.network_id = settings.NETWORK_ID
-        self.db = DatabaseService(settings.MONGODB_URL)
+        self.db = db or get_database_service()
         #self.wallet = None
 
     async def create_agent_wallet(self, user_id: str) -> WalletModel:
@@ -44,19 +45,22 @@ class WalletService:
         Returns:
             WalletModel: The created wallet as a domain model.
         """
+        from cdp import Wallet
         try:
             logger.info(f"Creating wallet for user: {user_id}")
             logger.info(f"Network ID: {self.network_id}")
+            executor = get_cdp_executor()
             
-            # Create wallet using CDP SDK
-            wallet = Wallet.create(self.network_id)
+            # Create wallet using CDP SDK (blocking calls run on the CDP pool)
+            wallet = await executor.run(Wallet.create, self.network_id)
             logger.info(f"Wallet created: {wallet}")
             
             # Export the wallet data
             wallet_data = wallet.export_data()
             logger.info(f"wallet_data: {wallet_data}")
-            fetched_data = Wallet.fetch(wallet.id)
+            fetched_data = await executor.run(Wallet.fetch, wallet.id, wallet_id=wallet.id)
             logger.info(f"fetched_data: {fetched_data}")
+            address = await executor.run(lambda: str(wallet.default_address), wallet_id=wallet.id)
             # imported_wallet = Wallet.import_data(fetched_data)
         
             # logger.info(f"imported_wallet: {imported_wallet.default_address}")
@@ -70,7 +74,7 @@ class WalletService:
                 user_id=user_id,
                 cdp_wallet_id=str(wallet.id),  # External wallet ID from CDP
                 #address=str(imported_wallet.default_address),    # Wallet address
-                address=str(wallet.default_address),    # Wallet address
+                address=address,    # Wallet address
                 created_at=now,
                 updated_at=now,
                 status="active",
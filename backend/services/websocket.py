@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 from models.websocket import WSMessageType, WSMessage
 from services.vault_service import VaultService
 from core.manager.agent import AgentManager
@@ -27,10 +27,24 @@ class WebSocketService:
             service = WebSocketService(vault_service, agent_manager, monitor)
             response = await service.process_strategy_selection(data, user_id)
     """
-    def __init__(self, vault_service: VaultService, agent_manager: AgentManager, monitor: StrategyMonitor):
+    def __init__(
+        self,
+        vault_service: VaultService,
+        agent_manager: AgentManager,
+        monitor: StrategyMonitor,
+        wallet_service_factory: Callable[[], WalletService] = WalletService
+    ):
         self.vault_service = vault_service
         self.agent_manager = agent_manager
         self.monitor = monitor
+        # WalletService configures the CDP SDK, so build it once, on first use
+        self.wallet_service_factory = wallet_service_factory
+        self._wallet_service: Optional[WalletService] = None
+
+    def _get_wallet_service(self) -> WalletService:
+        if self._wallet_service is None:
+            self._wallet_service = self.wallet_service_factory()
+        return self._wallet_service
 
     async def handle_message(self, message_type: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         """Main message handler that routes to specific handlers"""
@@ -81,7 +95,7 @@ class WebSocketService:
             
             # Step 2: Create agent wallet (automatic wallet creation)
             try:
-                wallet_service = WalletService()
+                wallet_service = self._get_wallet_service()
                 wallet_data = await wallet_service.create_agent_wallet(user_id)
                 logger.info(f"User ID: {user_id}")
                 logger.info(f"Agent wallet created: {wallet_data}")
@@ -104,7 +118,11 @@ class WebSocketService:
             if not success:
                 raise Exception("Failed to initialize agent")
                 
-            # Step 4: Start monitoring
+            # Step 4: Reserve the vault's deposit address (deployed in the background)
+            if data.get("user_wallet_address") and wallet_data.address:
+                await self.vault_service.deployer.assign(vault, wallet_data.address, data["user_wallet_address"])
+
+            # Step 5: Start monitoring
             await self.monitor.start_monitoring(vault.id)
             
             return {
@@ -131,6 +149,7 @@ class WebSocketService:
             vault_id=data["vault_id"],
             amount=data["amount"],
             token=data["token_address"],
+            user_wallet_address=data.get("user_wallet_address"),
             slippage=data.get("slippage", 0.01)
         )
         return {
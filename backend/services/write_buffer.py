@@ -0,0 +1,237 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+import weakref
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Every live buffer, so shutdown can flush them all without tracking owners
+_buffers: "weakref.WeakSet[WriteBehindBuffer]" = weakref.WeakSet()
+
+
+class _Pending:
+    __slots__ = ("fields", "first_write", "last_write", "attempts", "retry_at")
+
+    def __init__(self, now: float):
+        self.fields: Dict[str, Any] = {}
+        self.first_write = now
+        self.last_write = now
+        self.attempts = 0  # failed writes so far
+        self.retry_at = now
+
+
+class WriteBehindBuffer:
+    """
+    Coalescing write-behind buffer for `$set` updates to one collection.
+
+    Updates to the same document are merged in memory and written together
+    with a single unordered bulk_write, so an agent tick that touches a vault's
+    balance and settings costs one write instead of several round trips. A
+    document is flushed once it has been quiet for `window` seconds, or once
+    its oldest unwritten change is `max_age` seconds old, whichever comes first.
+
+    Unwritten changes are visible through `overlay()`, which readers apply to
+    documents they load so they never observe an older value than was set.
+
+    A document whose write fails is retried with exponential backoff and
+    dropped (and logged) after `max_attempts` failed writes. Changes set
+    while it waits are merged over it, so a retry never writes an older
+    value than the latest one.
+
+    Example:
+        buffer = WriteBehindBuffer(db.vaults)
+        await buffer.set("vault-1", {"current_balance": 150.0})
+        ...
+        await buffer.stop()  # flushes anything left
+    """
+
+    def __init__(
+        self,
+        collection,
+        key_field: str = "id",
+        window: float = 0.25,
+        max_age: float = 2.0,
+        max_pending: int = 1000,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize write-behind buffer
+
+        Args:
+            collection: Motor collection the updates go to
+            key_field: Field identifying a document
+            window: Quiet period after which a document's changes are written
+            max_age: Longest a change may stay unwritten
+            max_pending: Number of buffered documents that triggers an
+                immediate flush
+            max_attempts: Failed writes after which a document's changes
+                are dropped
+            retry_backoff: Delay before the first retry, doubled per failure
+            max_backoff: Longest delay between retries
+            clock: Monotonic time source in seconds
+        """
+        self.collection = collection
+        self.key_field = key_field
+        self.window = window
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self._pending: Dict[Any, _Pending] = {}
+        self._flushing: Dict[Any, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.writes = 0
+        self.flushes = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.dropped = 0
+        _buffers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def set(self, key: Any, fields: Dict[str, Any]) -> None:
+        """
+        Buffer a `$set` of fields on the document identified by key
+
+        Args:
+            key: Value of key_field for the document
+            fields: Fields to set; later values for a field replace earlier ones
+        """
+        now = self.clock()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending(now)
+        else:
+            self.coalesced += 1
+        pending.fields.update(fields)
+        pending.last_write = now
+        self.writes += 1
+
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        else:
+            self._start()
+
+    def overlay(self, key: Any) -> Dict[str, Any]:
+        """Fields set for key that may not have reached the database yet"""
+        fields = dict(self._flushing.get(key, {}))
+        pending = self._pending.get(key)
+        if pending is not None:
+            fields.update(pending.fields)
+        return fields
+
+    def _start(self):
+        if not self._running:
+            self._running = True
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background flusher and write everything still buffered"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(force=True)
+
+    async def _flush_loop(self):
+        """Flush documents whose window or max age has passed"""
+        while self._running:
+            try:
+                await asyncio.sleep(min(self.window, self.max_age))
+                await self.flush(due_only=True)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in write-behind flush loop: {str(e)}")
+
+    def _due(self, pending: _Pending, now: float) -> bool:
+        return now - pending.last_write >= self.window or now - pending.first_write >= self.max_age
+
+    async def flush(self, due_only: bool = False, force: bool = False) -> int:
+        """
+        Write buffered changes with one unordered bulk_write
+
+        Args:
+            due_only: Only write documents whose window or max age has passed
+            force: Also write documents still backing off after a failed
+                write (the final flush on stop)
+
+        Returns:
+            Number of documents written
+        """
+        async with self._flush_lock:
+            now = self.clock()
+            keys = [
+                k for k, p in self._pending.items()
+                if (force or p.retry_at <= now) and (not due_only or self._due(p, now))
+            ]
+            if not keys:
+                return 0
+            batch = {key: self._pending.pop(key) for key in keys}
+            self._flushing = {key: pending.fields for key, pending in batch.items()}
+            operations = [
+                UpdateOne({self.key_field: key}, {"$set": pending.fields})
+                for key, pending in batch.items()
+            ]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+                failed_keys: List[Any] = []
+            except BulkWriteError as e:
+                failed_keys = [keys[error["index"]] for error in e.details.get("writeErrors", [])]
+                logger.error(f"Write-behind flush failed for {len(failed_keys)} documents: {str(e)}")
+            except Exception as e:
+                failed_keys = keys
+                logger.error(f"Write-behind flush failed: {str(e)}")
+            finally:
+                self._flushing = {}
+
+            # Put failed changes back, under anything newer set meanwhile
+            for key in failed_keys:
+                retry = batch[key]
+                retry.attempts += 1
+                newer = self._pending.get(key)
+                if retry.attempts >= self.max_attempts:
+                    self.dropped += 1
+                    logger.error(
+                        f"Dropping write-behind changes to {self.key_field}={key} "
+                        f"({', '.join(retry.fields)}) after {retry.attempts} failed writes"
+                    )
+                    # Changes set since the failed batch still get their own attempts
+                    continue
+                if newer is not None:
+                    retry.fields.update(newer.fields)
+                    retry.last_write = newer.last_write
+                retry.retry_at = now + min(self.retry_backoff * 2 ** (retry.attempts - 1), self.max_backoff)
+                self._pending[key] = retry
+            self.failed += len(failed_keys)
+            self.flushes += 1
+            return len(keys) - len(failed_keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer statistics"""
+        return {
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
+
+
+async def flush_all() -> None:
+    """Stop every live buffer, writing what it still holds (call on shutdown)"""
+    for buffer in list(_buffers):
+        await buffer.stop()
@@ -0,0 +1,8 @@
+import os
+
+# Settings are read at import time; give unit tests a config that lets the
+# application modules import without a real .env.
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "helenus_test")
+os.environ.setdefault("VAULT_FACTORY_ADDRESS", "0x" + "00" * 19 + "01")
+os.environ.setdefault("DEPLOYER_PRIVATE_KEY", "0x" + "11" * 32)
@@ -0,0 +1,67 @@
+import json
+from web3 import Web3
+from utils.abi_registry import ABI_DIR, AbiRegistry, get_abi_registry
+
+AGENT = Web3.to_checksum_address("0x" + "aa" * 20)
+USER = Web3.to_checksum_address("0x" + "bb" * 20)
+FACTORY = Web3.to_checksum_address("0x" + "11" * 20)
+
+
+def test_abis_are_loaded_once_on_first_use(monkeypatch):
+    registry = AbiRegistry()
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda path, *args: opened.append(path) or real_open(path, *args))
+
+    assert opened == []
+    for _ in range(3):
+        registry.get("metamorpho")
+    assert registry.abi("metamorpho") == json.load(real_open(f"{ABI_DIR}/metamorpho.json"))
+    assert len([path for path in opened if path.endswith("metamorpho.json")]) == 1
+
+
+def test_selectors_and_encoding_match_web3():
+    factory = get_abi_registry().get("vault_factory")
+    contract = Web3().eth.contract(address=FACTORY, abi=factory.abi)
+
+    assert factory.function("deployVault").selector == Web3.keccak(text="deployVault(address,address)")[:4]
+    assert factory.encode("deployVault", AGENT, USER) == bytes.fromhex(
+        contract.functions.deployVault(AGENT, USER)._encode_transaction_data()[2:]
+    )
+    salt = b"\x01" * 32
+    assert factory.encode("deployVaultDeterministic", AGENT, USER, salt) == bytes.fromhex(
+        contract.functions.deployVaultDeterministic(AGENT, USER, salt)._encode_transaction_data()[2:]
+    )
+    # Tuple parameters are spelled out in signatures
+    morpho = get_abi_registry().get("metamorpho")
+    assert morpho.function("accrueInterest").signature == "accrueInterest((address,address,address,address,uint256))"
+
+
+def test_logs_are_decoded_by_topic():
+    factory = get_abi_registry().get("vault_factory")
+    vault = Web3.to_checksum_address("0x" + "cc" * 20)
+    log = {
+        "address": FACTORY,
+        "topics": [
+            Web3.keccak(text="VaultDeployed(address,address,address)"),
+            bytes(12) + bytes.fromhex(AGENT[2:]),
+            bytes(12) + bytes.fromhex(USER[2:])
+        ],
+        "data": bytes(12) + bytes.fromhex(vault[2:])
+    }
+    assert factory.decode_log(log) == {
+        "event": "VaultDeployed",
+        "address": FACTORY,
+        "args": {"vaultAddress": vault, "agent": AGENT, "user": USER}
+    }
+    assert factory.decode_log({**log, "topics": [Web3.keccak(text="Other()")]}) is None
+
+
+def test_contracts_are_shared_per_web3_and_address():
+    registry = AbiRegistry()
+    web3, other = Web3(), Web3()
+
+    contract = registry.contract(web3, "vault_factory", FACTORY.lower())
+    assert registry.contract(web3, "vault_factory", FACTORY) is contract
+    assert registry.contract(other, "vault_factory", FACTORY) is not contract
+    assert registry.contract(web3, "metamorpho", FACTORY) is not contract
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import signal
+import pytest
+from core.manager.ring import HashRing
+from core.manager.sharded import ShardedAgentManager
+from services.agent_snapshots import InMemorySnapshotStore
+
+
+class FakeAgent:
+    """Agent with countable state; workers import it from this module"""
+
+    def __init__(self, strategy_params, settings):
+        self.strategy_params = strategy_params
+        self.ticks = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot, settings):
+        agent = cls(snapshot["strategy_params"], settings)
+        agent.ticks = snapshot["ticks"]
+        return agent
+
+    def snapshot(self):
+        return {"strategy_params": self.strategy_params, "ticks": self.ticks}
+
+    async def initialize(self):
+        return True
+
+    async def analyze_market(self):
+        self.ticks += 1
+
+    async def make_decision(self):
+        return {"action": "rebalance" if self.strategy_params.get("active") else "hold"}
+
+    async def execute_trade(self, decision):
+        return True
+
+    async def update_performance_metrics(self):
+        pass
+
+    def pid(self):
+        return os.getpid()
+
+
+def test_ring_moves_only_the_keys_of_the_changed_node():
+    keys = [f"vault-{i}" for i in range(4000)]
+    ring = HashRing([f"worker-{i}" for i in range(4)])
+    before = ring.assign(keys)
+    shards = [list(before.values()).count(f"worker-{i}") for i in range(4)]
+    assert min(shards) > 0.7 * len(keys) / 4
+
+    ring.add("worker-4")
+    grown = ring.assign(keys)
+    moved = [key for key in keys if grown[key] != before[key]]
+    assert all(grown[key] == "worker-4" for key in moved)
+    assert 0.1 * len(keys) < len(moved) < 0.3 * len(keys)
+
+    ring.remove("worker-4")
+    assert ring.assign(keys) == before
+    ring.remove("worker-1")
+    shrunk = ring.assign(keys)
+    assert all(shrunk[key] == before[key] for key in keys if before[key] != "worker-1")
+
+
+def _manager(store, workers=2):
+    return ShardedAgentManager(
+        workers=workers,
+        snapshot_store=store,
+        agent_class=f"{__name__}.FakeAgent",
+        tick_interval=0.05,
+        heartbeat_interval=0.1,
+        heartbeat_timeout=5,
+        worker_snapshots=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_agents_run_sharded_across_worker_processes():
+    store = InMemorySnapshotStore()
+    store.snapshots = {f"vault-{i}": {"strategy_params": {"vault_id": f"vault-{i}"}, "ticks": 0} for i in range(40)}
+    manager = _manager(store)
+    decisions = []
+    manager.add_listener(lambda worker_id, event: decisions.append(event["agent_id"]))
+    await manager.initialize()
+    try:
+        assert len(manager.placement) == 40
+        pids = {worker_id: worker.pid for worker_id, worker in manager.workers.items()}
+        assert len(set(pids.values())) == 2 and os.getpid() not in pids.values()
+        for agent_id in ("vault-1", "vault-2", "vault-3"):
+            assert await manager.get_agent(agent_id).pid() == pids[manager.ring.node_for(agent_id)]
+        assert manager.get_agent("vault-404") is None
+
+        # A new agent is initialized on its owner and ticks there
+        assert await manager.add_agent("vault-new", {"vault_id": "vault-new", "active": True})
+        await asyncio.sleep(0.3)
+        assert "vault-new" in decisions
+        assert await manager.call("vault-new", "snapshot") != {}
+
+        # Growing the pool moves only the new worker's share, state included
+        before = dict(manager.placement)
+        ticks = (await manager.call("vault-7", "snapshot"))["ticks"]
+        new_worker = await manager.add_worker()
+        moved = [agent_id for agent_id in before if manager.placement[agent_id] != before[agent_id]]
+        assert moved and all(manager.placement[agent_id] == new_worker for agent_id in moved)
+        assert manager.get_stats()["moved"] == len(moved)
+        for agent_id in moved:
+            assert await manager.get_agent(agent_id).pid() == manager.workers[new_worker].pid
+        assert (await manager.call("vault-7", "snapshot"))["ticks"] >= ticks > 0
+
+        await manager.remove_worker(new_worker)
+        assert manager.placement == before
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_dead_worker_is_restarted_with_its_agents():
+    store = InMemorySnapshotStore()
+    store.snapshots = {f"vault-{i}": {"strategy_params": {"vault_id": f"vault-{i}"}, "ticks": 0} for i in range(20)}
+    manager = _manager(store)
+    await manager.initialize()
+    try:
+        victim = manager.placement["vault-0"]
+        old_pid = manager.workers[victim].pid
+        os.kill(old_pid, signal.SIGKILL)
+        await asyncio.to_thread(manager.workers[victim].process.join, 5)
+
+        assert await manager.check_workers() == [victim]
+        worker = manager.workers[victim]
+        assert worker.pid != old_pid
+        assert len(manager.placement) == 20
+        assert await manager.get_agent("vault-0").pid() == worker.pid
+        stats = manager.get_stats()
+        assert stats["restarts"] == 1 and stats["recovered"] > 0
+        assert await manager.check_workers() == []
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_orphans_wait_for_a_failed_hand_over_to_be_retried():
+    store = InMemorySnapshotStore()
+    store.snapshots = {f"vault-{i}": {"strategy_params": {"vault_id": f"vault-{i}"}, "ticks": 0} for i in range(20)}
+    manager = _manager(store)
+    await manager.initialize()
+    request = manager.request
+    refusing = [True]
+
+    async def refuse_adopt(worker_id, cmd, timeout=None, **args):
+        if cmd == "adopt" and refusing[0]:
+            raise RuntimeError("adopt failed")
+        return await request(worker_id, cmd, timeout, **args)
+
+    manager.request = refuse_adopt
+    try:
+        victim = manager.placement["vault-0"]
+        orphans = {agent_id for agent_id, owner in manager.placement.items() if owner == victim}
+        os.kill(manager.workers[victim].pid, signal.SIGKILL)
+        await asyncio.to_thread(manager.workers[victim].process.join, 5)
+
+        assert await manager.check_workers() == [victim]
+        assert manager.get_agent("vault-0") is None
+        assert manager.get_stats()["pending"] == len(orphans)
+
+        # A later supervision pass hands them over
+        refusing[0] = False
+        assert await manager.check_workers() == []
+        assert manager.get_stats()["pending"] == 0
+        assert {agent_id for agent_id, owner in manager.placement.items() if owner == victim} == orphans
+        assert await manager.get_agent("vault-0").pid() == manager.workers[victim].pid
+    finally:
+        await manager.shutdown()
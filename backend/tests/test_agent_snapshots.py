@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from core.agents.morpho import agent as agent_module
+from core.agents.morpho.agent import MorphoAgent
+from core.manager.agent import AgentManager
+from services import database
+from services.agent_snapshots import FileSnapshotStore, InMemorySnapshotStore
+
+
+@pytest.fixture(autouse=True)
+def no_wallets(monkeypatch):
+    """Count CDP wallet connections instead of making them"""
+    created = []
+
+    def fake_wrapper(**kwargs):
+        created.append(kwargs)
+        return object()
+
+    monkeypatch.setattr(agent_module, "CdpAgentkitWrapper", fake_wrapper)
+
+    async def no_initialize(self):
+        raise AssertionError("warm restore must not run initialize()")
+
+    monkeypatch.setattr(MorphoAgent, "initialize", no_initialize)
+    return created
+
+
+def _agent(vault_id):
+    agent = MorphoAgent(
+        strategy_params={"vault_id": vault_id, "strategy_id": "leverage", "wallet_data": {"wallet_id": "w-1"}},
+        settings=None
+    )
+    agent.current_position = {"id": f"{vault_id}-position", "ltv": 0.61}
+    agent.last_rebalance = datetime(2025, 5, 1, 12, 30)
+    agent.position_manager.open_position("current", agent.current_position)
+    agent.performance_monitor.metrics["market_analysis"] = {"apy_spread": 0.031}
+    return agent
+
+
+def test_snapshot_round_trip_without_connecting_the_wallet(no_wallets):
+    agent = _agent("vault-1")
+    restored = MorphoAgent.from_snapshot(agent.snapshot(), settings=None)
+
+    assert restored.snapshot() == agent.snapshot()
+    assert restored.last_rebalance == datetime(2025, 5, 1, 12, 30)
+    assert restored.position_manager.get_position("current")["ltv"] == 0.61
+    assert no_wallets == []
+
+
+@pytest.mark.asyncio
+async def test_manager_restores_agents_from_file(tmp_path, no_wallets):
+    path = str(tmp_path / "snapshots.jsonl")
+    manager = AgentManager(snapshot_store=FileSnapshotStore(path))
+    manager.agents = {f"vault-{i}": _agent(f"vault-{i}") for i in range(3)}
+    await manager.shutdown()
+
+    restarted = AgentManager(snapshot_store=FileSnapshotStore(path))
+    await restarted.initialize()
+    try:
+        assert sorted(restarted.agents) == ["vault-0", "vault-1", "vault-2"]
+        assert restarted.get_agent("vault-2").current_position == {"id": "vault-2-position", "ltv": 0.61}
+        assert restarted.snapshot_stats["restored"] == 3
+        assert no_wallets == []
+    finally:
+        await restarted.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_only_changed_agents_are_written():
+    store = InMemorySnapshotStore()
+    manager = AgentManager(snapshot_store=store)
+    manager.agents = {f"vault-{i}": _agent(f"vault-{i}") for i in range(10)}
+
+    assert await manager.save_snapshots() == 10
+    assert await manager.save_snapshots() == 0
+
+    manager.agents["vault-3"].current_position["ltv"] = 0.7
+    del manager.agents["vault-9"]
+    assert await manager.save_snapshots() == 1
+    assert store.writes == 11
+    assert store.snapshots["vault-3"]["current_position"]["ltv"] == 0.7
+    assert "vault-9" not in store.snapshots
+
+
+@pytest.mark.asyncio
+async def test_thousands_of_agents_warm_start_in_seconds(no_wallets):
+    snapshot = _agent("template").snapshot()
+    store = InMemorySnapshotStore()
+    store.snapshots = {
+        f"vault-{i}": {**snapshot, "strategy_params": {**snapshot["strategy_params"], "vault_id": f"vault-{i}"}}
+        for i in range(2000)
+    }
+    manager = AgentManager(snapshot_store=store)
+
+    started = time.perf_counter()
+    assert await manager.restore_agents() == 2000
+    assert time.perf_counter() - started < 5
+    assert no_wallets == []
+    # Restored state is already saved
+    assert await manager.save_snapshots() == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_shards_write_their_own_files(tmp_path):
+    path = str(tmp_path / "snapshots.jsonl")
+    first, second = FileSnapshotStore(path, shard="worker-0"), FileSnapshotStore(path, shard="worker-1")
+    await asyncio.gather(
+        first.save({"vault-1": {"ticks": 1}, "vault-2": {"ticks": 1}}),
+        second.save({"vault-3": {"ticks": 1}, "vault-4": {"ticks": 1}})
+    )
+    assert await FileSnapshotStore(path).load_all() == {f"vault-{i}": {"ticks": 1} for i in range(1, 5)}
+
+    # vault-2 moved to worker-1; the stale copy in worker-0's file loses
+    await second.save({"vault-2": {"ticks": 2}})
+    await first.save({"vault-1": {"ticks": 2}})
+    # A removed agent stays removed although worker-0 still holds it
+    await second.save({}, removed=["vault-1"])
+    assert await FileSnapshotStore(path).load_all() == {
+        "vault-2": {"ticks": 2}, "vault-3": {"ticks": 1}, "vault-4": {"ticks": 1}
+    }
+    assert sorted(os.listdir(tmp_path)) == ["snapshots.jsonl.worker-0", "snapshots.jsonl.worker-1"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_leaves_out_wallet_data(monkeypatch, no_wallets):
+    exported = {"wallet_id": "cdp-1", "seed": "s3cret"}
+    agent = MorphoAgent(
+        strategy_params={"vault_id": "vault-1", "wallet_data": {"id": "wal-1", **exported}},
+        settings=None
+    )
+    snapshot = agent.snapshot()
+    assert "s3cret" not in json.dumps(snapshot)
+    assert snapshot["wallet_id"] == "wal-1"
+
+    class Database:
+        async def get_agent_wallet(self, wallet_id):
+            assert wallet_id == "wal-1"
+            return SimpleNamespace(wallet_data=exported)
+
+    monkeypatch.setattr(database, "get_database_service", lambda: Database())
+    restored = MorphoAgent.from_snapshot(json.loads(json.dumps(snapshot)), settings=None)
+    assert restored.snapshot() == snapshot
+    await restored.connect_wallet()
+    assert json.loads(no_wallets[0]["cdp_wallet_data"]) == exported
@@ -0,0 +1,110 @@
+import time
+import pytest
+from jose import jwt
+from fastapi import HTTPException
+from starlette.requests import Request
+from api.middleware import auth
+from api.middleware.auth import TokenCache, auth_middleware, validate_token
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _token(sub="user-1", exp=None):
+    claims = {"sub": sub}
+    if exp is not None:
+        claims["exp"] = exp
+    return jwt.encode(claims, auth.settings.JWT_SECRET, algorithm=auth.settings.ALGORITHM)
+
+
+def _request(token):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/vaults",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "query_string": b"",
+    })
+
+
+def test_cache_respects_exp_and_size():
+    clock = FakeClock(1000.0)
+    cache = TokenCache(max_size=2, max_ttl=300.0, clock=clock)
+
+    cache.put("a", {"sub": "a", "exp": 1010})
+    cache.put("b", {"sub": "b"})
+    assert cache.get("a") == {"sub": "a", "exp": 1010}
+
+    clock.now = 1010.0
+    assert cache.get("a") is None
+    assert cache.get("b") == {"sub": "b"}
+
+    cache.put("c", {"sub": "c"})
+    cache.put("d", {"sub": "d"})
+    assert cache.get("b") is None
+    assert cache.get_stats()["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_token_reuses_verification(monkeypatch):
+    auth.token_cache.clear()
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    token = _token(exp=int(time.time()) + 60)
+    for _ in range(5):
+        assert (await validate_token(token))["sub"] == "user-1"
+    assert len(calls) == 1
+
+    with pytest.raises(HTTPException):
+        await validate_token(token[:-2] + "xx")
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_not_served_from_cache(monkeypatch):
+    clock = FakeClock(time.time())
+    monkeypatch.setattr(auth, "token_cache", TokenCache(clock=clock))
+    token = _token(exp=int(clock.now) + 5)
+    await validate_token(token)
+
+    clock.now += 10
+    # The stale entry is dropped and the token goes back to jwt.decode
+    def reject(*args, **kwargs):
+        raise auth.JWTError("Signature has expired.")
+
+    monkeypatch.setattr(auth.jwt, "decode", reject)
+    with pytest.raises(HTTPException) as exc:
+        await validate_token(token)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_benchmark_middleware_overhead():
+    token = _token(exp=int(time.time()) + 600)
+    rounds = 2000
+
+    async def call_next(request):
+        return request.state.user
+
+    async def run(clear_cache):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            if clear_cache:
+                auth.token_cache.clear()
+            await auth_middleware(_request(token), call_next)
+        return (time.perf_counter() - started) / rounds * 1e6
+
+    uncached = await run(clear_cache=True)
+    cached = await run(clear_cache=False)
+    print(f"\nauth_middleware overhead: {uncached:.1f}us/request uncached, {cached:.1f}us/request cached")
+    assert cached < uncached
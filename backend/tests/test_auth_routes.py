@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from api.middleware import auth
+from api.middleware.auth import PUBLIC_PATH_PREFIXES, PathPolicy, public_paths, require_user
+
+
+def _app():
+    public = APIRouter()
+    private = APIRouter()
+
+    @public.get("/price")
+    async def price():
+        return {"price": 1}
+
+    @private.get("/")
+    async def strategies(user: dict = Depends(require_user)):
+        return {"sub": user["sub"]}
+
+    app = FastAPI()
+    app.include_router(public, prefix="/api/market")
+    app.include_router(private, prefix="/api/strategy", dependencies=[Depends(require_user)])
+    return app
+
+
+def test_policy_matches_prefixes_only():
+    assert public_paths.is_public("/docs")
+    assert public_paths.is_public("/api/market/price/ETH")
+    assert public_paths.is_public("/api/v1/ws/agent/abc")
+    assert not public_paths.is_public("/api/strategy/")
+    assert not public_paths.is_public("/")
+    assert not public_paths.is_public("/x/docs")
+    assert not PathPolicy(()).is_public("/docs")
+    assert set(PUBLIC_PATH_PREFIXES) == set(public_paths.prefixes)
+
+
+def test_route_dependencies_protect_only_private_routes():
+    client = TestClient(_app())
+    assert client.get("/api/market/price").json() == {"price": 1}
+
+    assert client.get("/api/strategy/").status_code == 401
+    assert client.get("/api/strategy/", headers={"Authorization": "Basic abc"}).status_code == 401
+    assert client.get("/api/strategy/", headers={"Authorization": "Bearer"}).status_code == 401
+    assert client.get("/api/strategy/", headers={"Authorization": "Bearer not-a-jwt"}).status_code == 401
+
+    token = jwt.encode({"sub": "user-1"}, auth.settings.JWT_SECRET, algorithm=auth.settings.ALGORITHM)
+    response = client.get("/api/strategy/", headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == {"sub": "user-1"}
+
+
+def test_only_liveness_is_public_among_health_routes():
+    from main import app
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    for path in ("/health/db", "/health/cdp", "/health/vaults", "/health/agents"):
+        assert client.get(path).status_code == 401, path
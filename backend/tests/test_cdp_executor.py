@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+import pytest
+from services import cdp_executor
+from services.cdp_executor import CdpExecutor
+
+
+class Recorder:
+    """Blocking call that records which calls overlapped"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.order = []
+
+    def __call__(self, name, seconds=0.05):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.order.append(name)
+        time.sleep(seconds)
+        with self.lock:
+            self.active -= 1
+        return name
+
+
+@pytest.fixture
+def executor():
+    executor = CdpExecutor(max_workers=4, timeout=5)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_does_not_block_the_loop(executor):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    assert await executor.run(time.sleep, 0.2) is None
+    task.cancel()
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_calls_for_one_wallet_run_in_order(executor):
+    recorder = Recorder()
+    results = await asyncio.gather(*[
+        executor.run(recorder, f"tx{i}", wallet_id="wallet-a") for i in range(5)
+    ])
+    assert results == recorder.order == [f"tx{i}" for i in range(5)]
+    assert recorder.max_active == 1
+    assert executor.get_stats()["wallets_busy"] == 0
+
+    recorder = Recorder()
+    await asyncio.gather(*[executor.run(recorder, i, wallet_id=f"wallet-{i}") for i in range(4)])
+    assert recorder.max_active > 1
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded_and_reports_queue_depth():
+    executor = CdpExecutor(max_workers=2)
+    recorder = Recorder()
+    await asyncio.gather(*[executor.run(recorder, i) for i in range(6)])
+    stats = executor.get_stats()
+    executor.shutdown(wait=True)
+
+    assert recorder.max_active == 2
+    assert stats["max_queued"] >= 4
+    assert (stats["submitted"], stats["completed"], stats["queued"], stats["running"]) == (6, 6, 0, 0)
+    assert stats["avg_wait_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_keeps_the_wallet_locked_until_the_call_returns(executor):
+    recorder = Recorder()
+    with pytest.raises(TimeoutError):
+        await executor.run(recorder, "slow", 0.3, wallet_id="wallet-a", timeout=0.05)
+    assert executor.get_stats()["timeouts"] == 1
+
+    # The slow call is still running on its thread: the next one must wait
+    assert await executor.run(recorder, "next", 0, wallet_id="wallet-a") == "next"
+    assert recorder.max_active == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_raised_and_counted(executor):
+    def fail():
+        raise ValueError("rejected")
+
+    with pytest.raises(ValueError):
+        await executor.run(fail, wallet_id="wallet-a")
+    stats = executor.get_stats()
+    assert (stats["failed"], stats["wallets_busy"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_bound_tools_use_the_shared_executor(monkeypatch):
+    from cdp_agentkit_core.actions import CdpAction
+    from cdp_langchain.utils import CdpAgentkitWrapper
+    from pydantic import BaseModel
+    from core.agents.morpho.tools import ToolRegistry
+
+    class Params(BaseModel):
+        seconds: float
+
+    def wait(seconds: float) -> None:
+        time.sleep(seconds)
+
+    monkeypatch.setattr(cdp_executor, "_executor", None)
+    tools = ToolRegistry([
+        CdpAction(name="wait", description="", args_schema=Params, func=wait)
+    ]).bind(CdpAgentkitWrapper.model_construct(wallet=None))
+    await tools.arun("wait", {"seconds": 0})
+    assert cdp_executor.get_cdp_executor().get_stats()["completed"] == 1
+    cdp_executor.shutdown_cdp_executor()
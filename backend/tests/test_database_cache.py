@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from services.cache import AsyncTTLCache
+from services.database import DatabaseService
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = {d["id"]: dict(d) for d in documents}
+        self.finds = 0
+
+    async def find_one(self, query):
+        self.finds += 1
+        await asyncio.sleep(0)
+        document = self.documents.get(query["id"])
+        return dict(document) if document else None
+
+    async def update_one(self, query, update):
+        await asyncio.sleep(0)
+        self.documents[query["id"]].update(update["$set"])
+
+
+class FakeDB:
+    def __init__(self):
+        self.vaults = FakeCollection([{
+            "id": "v1", "user_id": "u1", "strategy_id": "s1",
+            "initial_deposit": 100.0, "current_balance": 100.0, "settings": {}
+        }])
+        self.wallets = FakeCollection([{
+            "id": "u1", "user_id": "u1", "cdp_wallet_id": "w1", "address": "0xabc"
+        }])
+
+
+def _service():
+    service = DatabaseService("mongodb://localhost:27017", write_behind=False)
+    service.db = FakeDB()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_hot_lookups_are_served_from_memory():
+    service = _service()
+    for _ in range(10):
+        assert (await service.get_vault("v1")).current_balance == 100.0
+        assert (await service.get_agent_wallet("u1")).cdp_wallet_id == "w1"
+    assert service.db.vaults.finds == 1
+    assert service.db.wallets.finds == 1
+    assert service.get_cache_stats()["vaults"]["hit_rate"] == 0.9
+
+    # Misses are not cached
+    assert await service.get_vault("missing") is None
+    assert await service.get_vault("missing") is None
+    assert service.db.vaults.finds == 3
+
+
+@pytest.mark.asyncio
+async def test_updates_invalidate_and_copies_are_isolated():
+    service = _service()
+    vault = await service.get_vault("v1")
+    vault.settings["deposit_address"] = "0xdead"
+    assert (await service.get_vault("v1")).settings == {}
+
+    await service.update_vault_balance("v1", 150.0)
+    assert (await service.get_vault("v1")).current_balance == 150.0
+    await service.update_vault_settings("v1", {"deposit_address": "0xbeef"})
+    assert (await service.get_vault("v1")).settings == {"deposit_address": "0xbeef"}
+    assert service.db.vaults.finds == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    service = _service()
+    vaults = await asyncio.gather(*(service.get_vault("v1") for _ in range(20)))
+    assert all(v.id == "v1" for v in vaults)
+    assert service.db.vaults.finds == 1
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_stored():
+    cache = AsyncTTLCache(ttl=30)
+    release = asyncio.Event()
+
+    async def stale_load():
+        await release.wait()
+        return "old"
+
+    load = asyncio.create_task(cache.get_or_load("k", stale_load))
+    await asyncio.sleep(0)
+    cache.invalidate("k")
+    release.set()
+    assert await load == "old"
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = AsyncTTLCache(ttl=10, max_size=2, clock=lambda: now[0])
+
+    async def load(value):
+        return value
+
+    await cache.get_or_load("a", lambda: load(1))
+    await cache.get_or_load("b", lambda: load(2))
+    await cache.get_or_load("a", lambda: load(1))
+    await cache.get_or_load("c", lambda: load(3))
+    assert cache.get("b") is None and cache.get("a") == 1
+    assert cache.get_stats()["evictions"] == 1
+
+    now[0] = 11.0
+    assert cache.get("a") is None
@@ -0,0 +1,110 @@
+import os
+import uuid
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from services.indexes import INDEXES, SERVICE_QUERIES, ensure_indexes, query_is_indexed, verify_indexes
+
+MONGODB_TEST_URL = os.getenv("MONGODB_TEST_URL")
+
+
+class FakeCollection:
+    def __init__(self, indexes, one_index_per_key=False, duplicates=False):
+        self.indexes = indexes
+        self.one_index_per_key = one_index_per_key  # like servers raising IndexOptionsConflict
+        self.duplicates = duplicates
+        self.dropped = []
+        self.events = []
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+        self.events.append(("drop", name))
+        del self.indexes[name]
+
+    async def create_indexes(self, models):
+        for model in models:
+            document = model.document
+            info = {"key": list(document["key"].items())}
+            info.update({k: v for k, v in document.items() if k not in ("key", "name")})
+            if self.one_index_per_key and any(other["key"] == info["key"] for other in self.indexes.values()):
+                raise OperationFailure("Index already exists with different options", code=85)
+            if self.duplicates and info.get("unique"):
+                raise OperationFailure("E11000 duplicate key error", code=11000)
+            self.events.append(("create", document["name"]))
+            self.indexes[document["name"]] = info
+
+    async def aggregate(self, pipeline):
+        if self.duplicates:
+            yield {"_id": {"id": "dup"}, "count": 2}
+
+
+def _winning_stages(plan):
+    stages = [plan["stage"]]
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            stages += _winning_stages(plan[child])
+    for child in plan.get("inputStages", []):
+        stages += _winning_stages(child)
+    return stages
+
+
+def test_every_service_query_has_a_declared_index():
+    for collection, query in SERVICE_QUERIES:
+        assert query_is_indexed(collection, query), (collection, query)
+    assert not query_is_indexed("vaults", {"status": "active"})
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_rebuilds_legacy_non_unique_id_index():
+    legacy = {"_id_": {"key": [("_id", 1)]}, "id_1": {"key": [("id", 1)]}}
+    db = {name: FakeCollection(dict(legacy) if name == "wallets" else {}) for name in INDEXES}
+
+    assert "wallets.id_unique" in await verify_indexes(db)
+    created = await ensure_indexes(db)
+    assert db["wallets"].dropped == ["id_1"]
+    # Built before the legacy index goes
+    assert db["wallets"].events[:2] == [("create", "id_unique"), ("drop", "id_1")]
+    assert await verify_indexes(db) == []
+    assert len(created) == sum(len(indexes) for indexes in INDEXES.values())
+    assert await ensure_indexes(db) == []
+
+
+@pytest.mark.asyncio
+async def test_failed_unique_build_keeps_the_legacy_index():
+    legacy = {"_id_": {"key": [("_id", 1)]}, "id_1": {"key": [("id", 1)]}}
+    for one_index_per_key in (False, True):
+        wallets = FakeCollection(dict(legacy), one_index_per_key=one_index_per_key, duplicates=True)
+        db = {name: wallets if name == "wallets" else FakeCollection({}) for name in INDEXES}
+        with pytest.raises(OperationFailure):
+            await ensure_indexes(db)
+        assert wallets.indexes == legacy and wallets.dropped == []
+
+
+@pytest.mark.asyncio
+async def test_server_with_one_index_per_key_swaps_after_checking_the_build():
+    legacy = {"_id_": {"key": [("_id", 1)]}, "id_1": {"key": [("id", 1)]}}
+    wallets = FakeCollection(dict(legacy), one_index_per_key=True)
+    db = {name: wallets if name == "wallets" else FakeCollection({}) for name in INDEXES}
+    await ensure_indexes(db)
+    assert wallets.events[:2] == [("drop", "id_1"), ("create", "id_unique")]
+    assert await verify_indexes(db) == []
+
+
+@pytest.mark.skipif(not MONGODB_TEST_URL, reason="MONGODB_TEST_URL not set")
+@pytest.mark.asyncio
+async def test_service_queries_are_index_backed_in_explain():
+    client = AsyncIOMotorClient(MONGODB_TEST_URL)
+    db = client[f"helenus_test_{uuid.uuid4().hex[:8]}"]
+    try:
+        await ensure_indexes(db)
+        for collection, query in SERVICE_QUERIES:
+            explain = await db[collection].find(query).explain()
+            stages = _winning_stages(explain["queryPlanner"]["winningPlan"])
+            assert "IXSCAN" in stages or "IDHACK" in stages or "EXPRESS_IXSCAN" in stages, (collection, query, stages)
+            assert "COLLSCAN" not in stages, (collection, query, stages)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
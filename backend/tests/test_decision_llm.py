@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from core.agents.morpho import agent as agent_module
+from core.agents.morpho.agent import MorphoAgent
+from services.decision_llm import (
+    ChatDecisionModel,
+    DecisionLLM,
+    DeterministicDecisionModel,
+    decision_key,
+    validate_decision,
+)
+
+STRATEGY = {"strategy_id": "leverage", "target_ltv": 0.75, "max_leverage": 3.0, "safety_buffer": 0.05,
+            "min_apy_spread": 0.02, "initial_deposit": 10}
+
+
+def _market(ltv=0.5, spread=0.03, risk=0.2, has_position=True):
+    return {"current_ltv": ltv, "apy_spread": spread, "risk_level": risk, "has_position": has_position}
+
+
+def test_near_identical_situations_share_a_key():
+    base = decision_key(STRATEGY, _market())
+    assert decision_key({**STRATEGY, "wallet_data": {"id": "w-2"}}, _market(ltv=0.5012, spread=0.0304)) == base
+    assert decision_key(STRATEGY, _market(ltv=0.55)) != base
+    assert decision_key({**STRATEGY, "target_ltv": 0.7}, _market()) != base
+    assert decision_key(STRATEGY, _market(has_position=False)) != base
+
+
+@pytest.mark.asyncio
+async def test_stand_in_model_is_deterministic():
+    model = DeterministicDecisionModel()
+    llm = DecisionLLM(model)
+    assert (await llm.decide(STRATEGY, _market(ltv=0.5)))["action_type"] == "increase"
+    assert (await llm.decide(STRATEGY, _market(ltv=0.9)))["action_type"] == "decrease"
+    assert (await llm.decide(STRATEGY, _market(risk=0.95)))["action"] == "close_position"
+    assert (await llm.decide(STRATEGY, _market(ltv=0.75)))["action"] == "hold"
+    opened = await llm.decide(STRATEGY, _market(ltv=0, has_position=False))
+    assert opened == {"action": "open_position", "borrow_amount": 7.5, "reason": opened["reason"]}
+    assert await DecisionLLM(DeterministicDecisionModel()).decide(STRATEGY, _market(ltv=0.5)) == \
+        await llm.decide(STRATEGY, _market(ltv=0.5))
+
+
+@pytest.mark.asyncio
+async def test_many_agents_cost_one_model_call_per_distinct_situation_batch():
+    model = DeterministicDecisionModel()
+    llm = DecisionLLM(model, max_batch=32, max_wait=0.01)
+    # 1,000 agents in 40 distinct situations
+    markets = [_market(ltv=0.40 + (i % 40) * 0.01) for i in range(1000)]
+
+    decisions = await asyncio.gather(*(llm.decide(STRATEGY, market) for market in markets))
+    assert len(decisions) == 1000
+    stats = llm.get_stats()
+    assert stats["prompts"] == 40
+    assert stats["model_calls"] == model.calls == 2
+
+    # The next tick is answered from the cache
+    await asyncio.gather(*(llm.decide(STRATEGY, market) for market in markets))
+    assert model.calls == 2
+    assert llm.get_stats()["cache"]["hits"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_chat_model_answers_a_batch_in_one_request():
+    prompts = []
+
+    class FakeChat:
+        async def ainvoke(self, messages):
+            prompts.append(messages[0].content)
+            return SimpleNamespace(content='Here you go:\n[{"action": "hold", "reason": "a"}, '
+                                           '{"action": "yolo", "reason": "b"}]')
+
+    model = ChatDecisionModel("gpt-4o")
+    model._llm = FakeChat()
+    llm = DecisionLLM(model, max_wait=0.01)
+    first, second = await asyncio.gather(llm.decide(STRATEGY, _market(ltv=0.5)), llm.decide(STRATEGY, _market(ltv=0.6)))
+
+    assert len(prompts) == 1 and "1. " in prompts[0] and "2. " in prompts[0]
+    assert first == {"action": "hold", "reason": "a"}
+    assert second["action"] == "hold"
+
+
+@pytest.mark.parametrize("decision, expected", [
+    ({"action": "open_position", "borrow_amount": 7.5, "reason": "r", "max_slippage": 0.5},
+     {"action": "open_position", "borrow_amount": 7.5, "reason": "r"}),
+    ({"action": "open_position", "borrow_amount": 7.6}, "hold"),
+    ({"action": "open_position", "borrow_amount": "7"}, "hold"),
+    ({"action": "open_position"}, "hold"),
+    ({"action": "adjust_position", "action_type": "decrease", "target_leverage": 2, "reason": "r"},
+     {"action": "adjust_position", "action_type": "decrease", "target_leverage": 2.0, "reason": "r"}),
+    ({"action": "adjust_position", "action_type": "increase", "target_leverage": 50}, "hold"),
+    ({"action": "adjust_position", "action_type": "double", "target_leverage": 2}, "hold"),
+    ({"action": "adjust_position", "action_type": "increase", "target_leverage": float("nan")}, "hold"),
+    ({"action": "close_position", "repay_amount": 10 ** 9, "reason": "r"}, {"action": "close_position", "reason": "r"}),
+    ({"action": "yolo"}, "hold"),
+    (["open_position"], "hold"),
+])
+def test_model_decisions_are_held_to_the_strategy_limits(decision, expected):
+    validated = validate_decision(decision, STRATEGY)
+    if expected == "hold":
+        assert validated["action"] == "hold" and validated["reason"]
+    else:
+        assert validated == expected
+
+
+@pytest.mark.asyncio
+async def test_chat_model_decisions_are_validated():
+    class FakeChat:
+        async def ainvoke(self, messages):
+            return SimpleNamespace(content='[{"action": "open_position", "borrow_amount": 1000000, "reason": "all in"}]')
+
+    model = ChatDecisionModel("gpt-4o")
+    model._llm = FakeChat()
+    decision = await DecisionLLM(model, max_wait=0).decide(STRATEGY, _market(ltv=0, has_position=False))
+    assert decision["action"] == "hold"
+
+
+@pytest.mark.asyncio
+async def test_agents_decide_through_the_shared_llm(monkeypatch):
+    monkeypatch.setattr(agent_module, "CdpAgentkitWrapper", lambda **kwargs: object())
+    model = DeterministicDecisionModel()
+    llm = DecisionLLM(model, max_wait=0.01)
+    agents = []
+    for i in range(50):
+        agent = MorphoAgent(strategy_params={"vault_id": f"vault-{i}", "strategy_id": "leverage"}, settings=None)
+        agent._decision_llm = llm
+        agent.market_data = {"apy_spread": 0.03, "risk_metrics": {"total_risk": 0.2}}
+        agents.append(agent)
+
+    decisions = await asyncio.gather(*(agent.make_decision() for agent in agents))
+    assert {decision["action"] for decision in decisions} == {"open_position"}
+    assert model.calls == 1
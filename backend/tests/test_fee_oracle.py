@@ -0,0 +1,90 @@
+from collections import Counter
+from types import SimpleNamespace
+import pytest
+from web3 import Web3
+from utils.fee_oracle import FeeOracle
+
+GWEI = 10 ** 9
+
+
+class FakeEth:
+    def __init__(self, base_fee=10 * GWEI, rewards=None):
+        self.head = 100
+        self.base_fee = base_fee
+        self.rewards = rewards if rewards is not None else [[1 * GWEI, 2 * GWEI, 5 * GWEI]] * 4
+        self.calls = Counter()
+        self.gas_price = 30 * GWEI
+        self.max_priority_fee = 3 * GWEI
+
+    def get_block_number(self):
+        self.calls["get_block_number"] += 1
+        return self.head
+
+    def fee_history(self, count, head, percentiles):
+        self.calls["fee_history"] += 1
+        assert percentiles == [10, 50, 90]
+        return {"baseFeePerGas": [self.base_fee] * (len(self.rewards) + 1), "reward": self.rewards}
+
+    def estimate_gas(self, tx):
+        self.calls["estimate_gas"] += 1
+        return 100000
+
+
+def _oracle(eth, **kwargs):
+    return FeeOracle(SimpleNamespace(eth=eth), **kwargs), eth
+
+
+@pytest.mark.asyncio
+async def test_speed_tiers_follow_fee_history():
+    oracle, _ = _oracle(FakeEth())
+    slow, standard, fast = [await oracle.fees(speed) for speed in ("slow", "standard", "fast")]
+
+    assert slow == {"maxFeePerGas": int(12.5 * GWEI) + GWEI, "maxPriorityFeePerGas": GWEI}
+    assert standard == {"maxFeePerGas": 22 * GWEI, "maxPriorityFeePerGas": 2 * GWEI}
+    assert fast == {"maxFeePerGas": 25 * GWEI, "maxPriorityFeePerGas": 5 * GWEI}
+    with pytest.raises(ValueError):
+        await oracle.fees("instant")
+
+
+@pytest.mark.asyncio
+async def test_fee_history_is_fetched_once_per_block():
+    oracle, eth = _oracle(FakeEth(), ttl=0)
+    for _ in range(5):
+        await oracle.fees()
+    assert eth.calls["fee_history"] == 1
+
+    eth.head += 1
+    eth.base_fee = 20 * GWEI
+    assert (await oracle.fees())["maxFeePerGas"] == 42 * GWEI
+    assert eth.calls["fee_history"] == 2
+
+    # Within the TTL not even the block number is read
+    oracle, eth = _oracle(FakeEth(), ttl=60)
+    for _ in range(5):
+        await oracle.fees()
+    assert (eth.calls["get_block_number"], eth.calls["fee_history"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_fallbacks_without_rewards_or_base_fee():
+    oracle, _ = _oracle(FakeEth(rewards=[]))
+    assert (await oracle.fees())["maxPriorityFeePerGas"] == 3 * GWEI
+
+    oracle, _ = _oracle(FakeEth(base_fee=0))
+    assert await oracle.fees("fast") == {"gasPrice": 30 * GWEI}
+
+
+@pytest.mark.asyncio
+async def test_gas_is_estimated_once_per_shape():
+    oracle, eth = _oracle(FakeEth(), gas_margin=1.5)
+    factory = Web3.to_checksum_address("0x" + "11" * 20)
+    for agent in range(5):
+        tx = {"to": factory, "data": "0xabcdef01" + f"{agent:064x}"}
+        assert await oracle.gas_limit(tx) == 150000
+    assert eth.calls["estimate_gas"] == 1
+
+    await oracle.gas_limit({"to": factory, "data": "0x12345678"})
+    oracle.forget_gas((factory, "0x12345678"))
+    await oracle.gas_limit({"to": factory, "data": "0x12345678"})
+    assert eth.calls["estimate_gas"] == 3
+    assert oracle.get_stats()["gas_hits"] == 4
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must only load on first use, not when the app is imported
+DEFERRED = ["cdp", "cdp_langchain", "cdp_agentkit_core", "langchain", "langchain_openai", "langgraph", "web3"]
+
+# Cold `import main` took ~3.5s while it pulled in the agent stack; ~0.9s since
+IMPORT_BUDGET_US = int(os.getenv("IMPORT_TIME_BUDGET_US", "2500000"))
+
+
+def importtime(module):
+    """Run `python -X importtime -c "import <module>"` and parse its report
+
+    Returns:
+        dict: top-level package -> cumulative import time (us) of the module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_main_import_defers_heavy_sdks():
+    timings = importtime("main")
+    loaded = [name for name in DEFERRED if name in timings]
+    print(f"\nimport main: {timings['main'] / 1000:.0f}ms")
+    assert loaded == []
+    assert timings["main"] < IMPORT_BUDGET_US
+
+
+def test_agent_components_import_without_agent_stack():
+    timings = importtime("core.agents.morpho.components.performance_monitor")
+    assert [name for name in DEFERRED if name in timings] == []
@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from models.websocket import WSMessage, WSMessageType
+from api.websocket.queue import MessageQueue, OVERFLOW_DROP_NEW, OVERFLOW_DROP_OLDEST
+
+
+def _message(message_type, **data):
+    return WSMessage(type=message_type, data=data)
+
+
+@pytest.mark.asyncio
+async def test_high_priority_lane_is_served_first():
+    queue = MessageQueue(num_workers=1)
+    handled = []
+
+    async def handler(message):
+        handled.append((message.type.value, message.data["n"]))
+
+    for message_type in ("market_update", "position_update", "emergency"):
+        queue.register_handler(message_type, handler)
+
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=1))
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=2))
+    await queue.put_message(_message(WSMessageType.POSITION_UPDATE, n=3))
+    await queue.put_message(_message(WSMessageType.EMERGENCY, n=4))
+
+    await queue.start()
+    await queue.join()
+    await queue.stop()
+
+    assert [n for _, n in handled[:2]] in ([3, 4], [4, 3])
+    assert [n for _, n in handled[2:]] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_put_message_rejects_when_full_instead_of_blocking():
+    queue = MessageQueue(max_size=2)
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE))
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE))
+    with pytest.raises(asyncio.QueueFull):
+        await asyncio.wait_for(queue.put_message(_message(WSMessageType.MARKET_UPDATE)), timeout=1)
+    assert (await queue.get_queue_stats())["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_policies():
+    drop_new = MessageQueue(max_size=1, overflow=OVERFLOW_DROP_NEW)
+    assert await drop_new.put_message(_message(WSMessageType.MARKET_UPDATE)) is True
+    assert await drop_new.put_message(_message(WSMessageType.MARKET_UPDATE)) is False
+    assert drop_new.dropped == 1
+
+    drop_oldest = MessageQueue(max_size=2, overflow=OVERFLOW_DROP_OLDEST, num_workers=1)
+    handled = []
+
+    async def handler(message):
+        handled.append(message.data["n"])
+
+    drop_oldest.register_handler("market_update", handler)
+    drop_oldest.register_handler("position_update", handler)
+    await drop_oldest.put_message(_message(WSMessageType.MARKET_UPDATE, n=1))
+    await drop_oldest.put_message(_message(WSMessageType.MARKET_UPDATE, n=2))
+    # A position update evicts the oldest market update
+    assert await drop_oldest.put_message(_message(WSMessageType.POSITION_UPDATE, n=3)) is True
+    await drop_oldest.start()
+    await drop_oldest.join()
+    await drop_oldest.stop()
+    assert handled == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_evicts_the_oldest_message_of_the_lane():
+    queue = MessageQueue(max_size=3, overflow=OVERFLOW_DROP_OLDEST)
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=1))
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=2))
+    await queue.put_message(_message(WSMessageType.MONITOR_UPDATE, n=3))
+    # Serving market_update moves it behind monitor_update in the lane
+    message_type, [taken] = queue._take_batch()
+    assert taken.message.data["n"] == 1
+    await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=4))
+
+    assert await queue.put_message(_message(WSMessageType.EMERGENCY, n=5)) is True
+    left = sorted(queued.message.data["n"] for lane in queue._lanes for pending in lane.values() for queued in pending)
+    assert left == [3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_batch_handler_receives_lists():
+    queue = MessageQueue(num_workers=1)
+    batches = []
+
+    async def handler(messages):
+        batches.append([m.data["n"] for m in messages])
+
+    queue.register_handler("market_update", handler, batch_size=3)
+    for n in range(7):
+        await queue.put_message(_message(WSMessageType.MARKET_UPDATE, n=n))
+    await queue.start()
+    await queue.join()
+    await queue.stop()
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+@pytest.mark.asyncio
+async def test_per_handler_concurrency_limit():
+    queue = MessageQueue(num_workers=4)
+    running = 0
+    peak = 0
+    other_done = asyncio.Event()
+
+    async def slow(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    async def fast(message):
+        other_done.set()
+
+    queue.register_handler("strategy_select", slow, concurrency=1)
+    queue.register_handler("position_update", fast)
+    for _ in range(4):
+        await queue.put_message(_message(WSMessageType.STRATEGY_SELECT))
+    await queue.start()
+    await queue.put_message(_message(WSMessageType.POSITION_UPDATE))
+    await asyncio.wait_for(other_done.wait(), timeout=1)
+    await queue.join()
+    stats = await queue.get_queue_stats()
+    await queue.stop()
+
+    assert peak == 1
+    assert stats["processed"] == 5
+    assert stats["workers"] == 4
+    assert set(stats["wait_latency_ms"]) == {"p50", "p95", "p99"}
+    assert stats["handle_latency_ms"]["p99"] >= stats["handle_latency_ms"]["p50"] > 0
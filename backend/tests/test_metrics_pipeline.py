@@ -0,0 +1,213 @@
+import math
+import pytest
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError
+from core.agents.morpho.agent import MorphoAgent
+from core.agents.morpho.components.performance_monitor import PerformanceMonitor
+from core.manager.agent import AgentManager
+from services.decision_llm import DecisionLLM, DeterministicDecisionModel
+from services.metrics import (
+    InMemoryMetricsStore,
+    MetricsPipeline,
+    MongoMetricsStore,
+    PartialRollupWrite,
+    Rollup,
+    bucket_start,
+    compute_performance,
+)
+
+START = datetime(2025, 1, 1)
+
+
+class CountingStore(InMemoryMetricsStore):
+    def __init__(self):
+        super().__init__()
+        self.insert_calls = 0
+        self.rollup_calls = 0
+        self.fail = False
+
+    async def insert_samples(self, samples):
+        if self.fail:
+            raise ConnectionError("store down")
+        self.insert_calls += 1
+        await super().insert_samples(samples)
+
+    async def merge_rollups(self, rollups):
+        if self.fail:
+            raise ConnectionError("store down")
+        self.rollup_calls += 1
+        await super().merge_rollups(rollups)
+
+
+def test_bucket_start():
+    ts = datetime(2025, 1, 1, 13, 47, 12)
+    assert bucket_start(ts, "1m") == datetime(2025, 1, 1, 13, 47)
+    assert bucket_start(ts, "1h") == datetime(2025, 1, 1, 13)
+    assert bucket_start(ts, "1d") == datetime(2025, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_samples_are_batched_and_rolled_up():
+    store = CountingStore()
+    pipeline = MetricsPipeline(store, batch_size=10_000)
+    for minute in range(120):
+        for second in (0, 30):
+            pipeline.record("v1", "equity", 1000 + minute, START + timedelta(minutes=minute, seconds=second))
+
+    assert await pipeline.flush() == 240
+    assert (store.insert_calls, store.rollup_calls) == (1, 1)
+    assert len(store.samples) == 240
+
+    hourly = await pipeline.get_series("v1", "equity", resolution="1h")
+    assert [h["count"] for h in hourly] == [120, 120]
+    assert hourly[0]["first"] == 1000 and hourly[0]["last"] == 1059
+    assert hourly[1]["min"] == 1060 and hourly[1]["max"] == 1119
+    assert len(await pipeline.get_series("v1", "equity", resolution="1m")) == 120
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_rollups_merge_across_flushes():
+    store = CountingStore()
+    pipeline = MetricsPipeline(store)
+    pipeline.record("v1", "equity", 5, START + timedelta(seconds=10))
+    await pipeline.flush()
+    pipeline.record("v1", "equity", 3, START + timedelta(seconds=5))
+    pipeline.record("v1", "equity", 9, START + timedelta(seconds=50))
+    await pipeline.flush()
+
+    [(_, rollup)] = await store.get_rollups("v1", "equity", "1m")
+    assert (rollup.count, rollup.min, rollup.max, rollup.first, rollup.last) == (3, 3, 9, 3, 9)
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_data_for_retry():
+    store = CountingStore()
+    pipeline = MetricsPipeline(store)
+    pipeline.record("v1", "equity", 1, START)
+    store.fail = True
+    assert await pipeline.flush() == 0
+    pipeline.record("v1", "equity", 2, START + timedelta(seconds=1))
+    store.fail = False
+    assert await pipeline.flush() == 2
+    [(_, rollup)] = await store.get_rollups("v1", "equity", "1m")
+    assert rollup.count == 2
+    await pipeline.stop()
+
+
+def test_compute_performance():
+    def rollup(first, low, high, last):
+        r = Rollup()
+        for value in (first, low, high, last):
+            r.add(value, START)
+        r.first, r.last = first, last
+        return r
+
+    rollups = [
+        (START, rollup(100, 100, 120, 120)),
+        (START + timedelta(days=1), rollup(120, 90, 120, 90)),
+        (START + timedelta(days=2), rollup(90, 90, 110, 110)),
+    ]
+    stats = compute_performance(rollups, "1d")
+    assert stats["pnl"] == 10
+    assert stats["roi"] == pytest.approx(0.1)
+    assert stats["max_drawdown"] == pytest.approx(0.25)
+
+    returns = [0.2, -0.25, 110 / 90 - 1]
+    mean = sum(returns) / 3
+    std = math.sqrt(sum((r - mean) ** 2 for r in returns) / 2)
+    assert stats["sharpe_ratio"] == pytest.approx(mean / std * math.sqrt(365))
+
+    assert compute_performance([], "1h") == {"pnl": 0.0, "roi": 0.0, "sharpe_ratio": 0.0, "max_drawdown": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_performance_monitor_keeps_every_tick():
+    store = CountingStore()
+    pipeline = MetricsPipeline(store)
+    monitor = PerformanceMonitor(agent_id="v1", pipeline=pipeline)
+    for tick in range(3):
+        monitor.record_metric("strategy_iteration", {
+            "analysis": {"apy_spread": 0.01 * tick, "risk_metrics": {"total_risk": 0.5}},
+            "decision": {"action": "hold"},
+            "timestamp": "2025-01-01T00:00:00"
+        })
+        monitor.record_metric("equity", 100 + tick)
+
+    assert monitor.get_metrics()["equity"] == 102
+    await pipeline.flush()
+    metrics = {s["meta"]["metric"] for s in store.samples}
+    assert metrics == {"strategy_iteration.analysis.apy_spread", "strategy_iteration.analysis.risk_metrics.total_risk", "equity"}
+    assert len(store.samples) == 9
+    assert (await monitor.get_performance())["pnl"] == 2
+    await pipeline.stop()
+
+
+class PartlyFailingStore(InMemoryMetricsStore):
+    """Merges every rollup except those of `failing` agents, like a partly failed bulk write"""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = set()
+
+    async def merge_rollups(self, rollups):
+        failed = {key: rollup for key, rollup in rollups.items() if key[0] in self.failing}
+        await super().merge_rollups({key: rollup for key, rollup in rollups.items() if key not in failed})
+        if failed:
+            raise PartialRollupWrite(failed, "partly failed")
+
+
+@pytest.mark.asyncio
+async def test_partial_rollup_failure_retries_only_the_failed_merges():
+    store = PartlyFailingStore()
+    pipeline = MetricsPipeline(store)
+    store.failing = {"v2"}
+    pipeline.record("v1", "equity", 1, START)
+    pipeline.record("v2", "equity", 1, START)
+    await pipeline.flush()
+
+    store.failing = set()
+    await pipeline.flush()
+    for agent_id in ("v1", "v2"):
+        [(_, rollup)] = await store.get_rollups(agent_id, "equity", "1m")
+        assert rollup.count == 1
+    await pipeline.stop()
+
+
+@pytest.mark.asyncio
+async def test_mongo_store_reports_which_rollups_failed():
+    class Rollups:
+        async def bulk_write(self, operations, ordered):
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "dup"}], "nInserted": 0})
+
+    store = MongoMetricsStore({"agent_metrics": None, "agent_metric_rollups": Rollups()})
+    rollups = {}
+    for agent_id in ("v1", "v2", "v3"):
+        rollups[(agent_id, "equity", "1m", START)] = rollup = Rollup()
+        rollup.add(1.0, START)
+
+    with pytest.raises(PartialRollupWrite) as failure:
+        await store.merge_rollups(rollups)
+    assert list(failure.value.failed) == [("v2", "equity", "1m", START)]
+
+
+@pytest.mark.asyncio
+async def test_agents_record_equity_and_refresh_performance():
+    pipeline = MetricsPipeline(InMemoryMetricsStore())
+    agent = MorphoAgent(strategy_params={"vault_id": "v1"}, settings=None)
+    agent.performance_monitor.pipeline = pipeline
+    agent._decision_llm = DecisionLLM(DeterministicDecisionModel(), max_wait=0)
+    manager = AgentManager(performance_interval=0)
+    manager.agents = {"v1": agent}
+
+    # Collateral is priced by the market data (100 per unit) net of debt
+    agent.current_position = {"id": "p-1", "collateral": 10, "debt": 500}
+    await manager.run_once()
+    agent.current_position["collateral"] = 11
+    await manager.run_once()
+
+    assert agent.performance_monitor.get_metrics()["equity"] == 600
+    assert agent.performance_metrics["pnl"] == 100
+    assert agent.performance_metrics["roi"] == pytest.approx(0.2)
+    await pipeline.stop()
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+import pytest
+from config.settings import get_settings
+from services import database, mongo
+from services.mongo import PoolMetrics
+
+
+@pytest.fixture
+def fresh_client(monkeypatch):
+    monkeypatch.setattr(mongo, "_client", None)
+    monkeypatch.setattr(mongo, "_pool_metrics", None)
+    monkeypatch.setattr(database, "_database_service", None)
+    yield
+    mongo.close_mongo_client()
+
+
+def test_pool_metrics_track_checkouts():
+    metrics = PoolMetrics(max_pool_size=4)
+    primary = SimpleNamespace(address=("db1", 27017), connection_id=1)
+    for _ in range(3):
+        metrics.connection_created(primary)
+        metrics.connection_check_out_started(primary)
+        metrics.connection_checked_out(primary)
+    metrics.connection_check_out_started(primary)
+
+    stats = metrics.get_stats()
+    assert (stats["open"], stats["in_use"], stats["waiting"]) == (3, 3, 1)
+    assert stats["servers"]["db1:27017"]["utilization"] == 0.75
+
+    metrics.connection_check_out_failed(primary)
+    metrics.connection_checked_in(primary)
+    metrics.connection_closed(primary)
+    stats = metrics.get_stats()
+    assert (stats["open"], stats["in_use"], stats["waiting"]) == (2, 2, 0)
+    assert stats["checkout_failures"] == 1
+
+    metrics.pool_closed(primary)
+    assert metrics.get_stats()["servers"] == {}
+
+
+def test_services_share_one_configured_client(fresh_client):
+    client = mongo.get_mongo_client()
+    assert mongo.get_mongo_client() is client
+
+    pool = client.delegate.options.pool_options
+    assert pool.max_pool_size == get_settings().MONGO_MAX_POOL_SIZE
+    assert pool.min_pool_size == get_settings().MONGO_MIN_POOL_SIZE
+
+    service = database.get_database_service()
+    assert service.client is client
+    assert database.get_database_service() is service
+    assert mongo.get_pool_stats()["max_pool_size"] == get_settings().MONGO_MAX_POOL_SIZE
+
+
+@pytest.mark.asyncio
+async def test_shared_service_close_keeps_client_open(fresh_client):
+    client = mongo.get_mongo_client()
+    service = database.get_database_service()
+    await database.close_database_service()
+    assert mongo._client is client
+    assert database.get_database_service() is not service
@@ -0,0 +1,124 @@
+import pytest
+from api.middleware.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimit,
+    RedisRateLimitBackend,
+    WebSocketRateLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def incr(self, key):
+        self.ops.append(("incr", key))
+
+    def expire(self, key, seconds):
+        self.ops.append(("expire", key, seconds))
+
+    async def execute(self):
+        for op in self.ops:
+            if op[0] == "incr":
+                self.store[op[1]] = self.store.get(op[1], 0) + 1
+        self.ops = []
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def mget(self, keys):
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self):
+        return FakePipeline(self.store)
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_weights_previous_window():
+    clock = FakeClock(0.0)
+    limiter = WebSocketRateLimiter(rate_limit=10, window=60.0, action_limits={}, clock=clock)
+
+    for _ in range(10):
+        assert await limiter.is_allowed("c1")
+    assert not await limiter.is_allowed("c1")
+
+    # Halfway into the next window, half of the previous window still counts
+    clock.now = 90.0
+    allowed = [await limiter.is_allowed("c1") for _ in range(10)]
+    assert allowed.count(True) == 5
+
+    # Two windows later the history is gone
+    clock.now = 200.0
+    assert await limiter.is_allowed("c1")
+
+
+@pytest.mark.asyncio
+async def test_action_limit_denial_does_not_spend_global_budget():
+    clock = FakeClock(0.0)
+    limiter = WebSocketRateLimiter(
+        rate_limit=10,
+        action_limits={"strategy_select": RateLimit(limit=2)},
+        clock=clock
+    )
+
+    results = [await limiter.is_allowed("c1", action="strategy_select") for _ in range(5)]
+    assert results == [True, True, False, False, False]
+
+    # Only the two allowed messages counted against the global budget
+    allowed = [await limiter.is_allowed("c1", action="deposit") for _ in range(10)]
+    assert allowed.count(True) == 8
+    # Clients are limited independently
+    assert await limiter.is_allowed("c2", action="strategy_select")
+
+
+@pytest.mark.asyncio
+async def test_topic_limits_match_prefix():
+    limiter = WebSocketRateLimiter(
+        rate_limit=100,
+        topic_limits={"market": RateLimit(limit=1)},
+        clock=FakeClock(0.0)
+    )
+    assert await limiter.is_allowed("c1", topic="market_ETH-USD")
+    assert not await limiter.is_allowed("c1", topic="market_ETH-USD")
+    assert await limiter.is_allowed("c1", topic="market_BTC-USD")
+    assert await limiter.is_allowed("c1", topic="vault_1")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_evicts_idle_and_bounds_keys():
+    clock = FakeClock(0.0)
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    limiter = WebSocketRateLimiter(rate_limit=5, action_limits={}, backend=backend, clock=clock)
+
+    for client_id in ("a", "b", "c", "d"):
+        await limiter.is_allowed(client_id)
+    assert len(backend) == 3
+
+    clock.now = 500.0
+    await limiter.is_allowed("e")
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_shares_counters():
+    redis = FakeRedis()
+    clock = FakeClock(30.0)
+    first = WebSocketRateLimiter(rate_limit=3, action_limits={}, backend=RedisRateLimitBackend(client=redis), clock=clock)
+    second = WebSocketRateLimiter(rate_limit=3, action_limits={}, backend=RedisRateLimitBackend(client=redis), clock=clock)
+
+    assert await first.is_allowed("c1")
+    assert await second.is_allowed("c1")
+    assert await first.is_allowed("c1")
+    assert not await second.is_allowed("c1")
+    assert redis.store == {"helenus:rl:c1:0": 3}
@@ -0,0 +1,186 @@
+import asyncio
+import pytest
+from api.websocket.codec import JSONCodec
+from api.websocket.pipeline import KeyLocks, RequestPipeline
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(JSONCodec().decode(data))
+
+
+@pytest.mark.asyncio
+async def test_slow_request_does_not_block_later_ones():
+    websocket = FakeWebSocket()
+    release_slow = asyncio.Event()
+
+    async def handle(message):
+        if message["type"] == "strategy_select":
+            await release_slow.wait()
+            return {"type": "strategy_init", "data": {}}
+        return {"type": "deposit_complete", "data": {"n": message["data"]["n"]}}
+
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle, max_in_flight=4)
+    await pipeline.submit({"type": "strategy_select", "data": {}, "request_id": "a"})
+    await pipeline.submit({"type": "deposit", "data": {"n": 1}, "request_id": "b"})
+    await pipeline.submit({"type": "deposit", "data": {"n": 2}})
+    await asyncio.sleep(0.01)
+
+    # Later requests answered while the first is still running
+    assert [m.get("request_id") for m in websocket.sent] == ["b", None]
+
+    release_slow.set()
+    await pipeline.drain()
+    assert websocket.sent[-1] == {"type": "strategy_init", "data": {}, "request_id": "a"}
+
+
+@pytest.mark.asyncio
+async def test_in_flight_cap_applies_backpressure():
+    websocket = FakeWebSocket()
+    running = 0
+    peak = 0
+
+    async def handle(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"type": "deposit_complete", "data": {}}
+
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle, max_in_flight=2)
+    for n in range(6):
+        await pipeline.submit({"type": "deposit", "data": {}, "request_id": str(n)})
+        assert pipeline.in_flight <= 2
+    await pipeline.drain()
+
+    assert peak == 2
+    assert sorted(m["request_id"] for m in websocket.sent) == [str(n) for n in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_become_tagged_error_responses():
+    websocket = FakeWebSocket()
+
+    async def handle(message):
+        raise RuntimeError("vault not found")
+
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle)
+    await pipeline.submit({"type": "deposit", "data": {}, "request_id": "x"})
+    await pipeline.drain()
+    assert websocket.sent == [{"type": "error", "data": {"message": "vault not found"}, "request_id": "x"}]
+
+
+@pytest.mark.asyncio
+async def test_closed_pipeline_finishes_work_without_sending():
+    websocket = FakeWebSocket()
+    finished = []
+
+    async def handle(message):
+        await asyncio.sleep(0.01)
+        finished.append(message["request_id"])
+        return {"type": "deposit_complete", "data": {}}
+
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle)
+    await pipeline.submit({"type": "deposit", "data": {}, "request_id": "late"})
+    pipeline.close()
+    await pipeline.drain()
+    assert finished == ["late"]
+    assert websocket.sent == []
+
+
+@pytest.mark.asyncio
+async def test_state_changes_to_one_vault_run_in_order():
+    websocket = FakeWebSocket()
+    balances = {"v1": 0, "v2": 0}
+    running = set()
+    overlapped = []
+
+    async def handle(message):
+        vault_id = message["data"]["vault_id"]
+        if running:
+            overlapped.append((vault_id, set(running)))
+        running.add(vault_id)
+        balance = balances[vault_id]
+        await asyncio.sleep(0.01)
+        balances[vault_id] = balance + message["data"]["amount"]
+        running.discard(vault_id)
+        return {"type": "deposit_complete", "data": {"balance": balances[vault_id]}}
+
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle, max_in_flight=8)
+    for n in range(3):
+        await pipeline.submit({"type": "deposit", "data": {"vault_id": "v1", "amount": 1}, "request_id": f"a{n}"})
+    await pipeline.submit({"type": "deposit", "data": {"vault_id": "v2", "amount": 5}, "request_id": "b"})
+    await pipeline.drain()
+
+    # No lost read-modify-write on v1, and v2 did not wait behind it
+    assert balances == {"v1": 3, "v2": 5}
+    assert all(vault_id != "v1" or "v1" not in others for vault_id, others in overlapped)
+    assert ("v2", {"v1"}) in overlapped
+    v1 = [m for m in websocket.sent if m["request_id"].startswith("a")]
+    assert [m["data"]["balance"] for m in v1] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_lock_survives_hand_over_to_a_waiter():
+    websocket = FakeWebSocket()
+    gates = {name: asyncio.Event() for name in "abc"}
+    running = set()
+    overlapped = []
+
+    async def handle(message):
+        name = message["request_id"]
+        if running:
+            overlapped.append((name, set(running)))
+        running.add(name)
+        await gates[name].wait()
+        running.discard(name)
+        return {"type": "deposit_complete", "data": {}}
+
+    locks = KeyLocks()
+    pipeline = RequestPipeline(websocket, JSONCodec(), handle, key_locks=locks)
+    deposit = {"type": "deposit", "data": {"vault_id": "v1"}}
+    await pipeline.submit({**deposit, "request_id": "a"})
+    await pipeline.submit({**deposit, "request_id": "b"})
+    await asyncio.sleep(0.01)
+
+    # A releases while B waits; C arrives before B has woken up
+    gates["a"].set()
+    await asyncio.sleep(0)
+    await pipeline.submit({**deposit, "request_id": "c"})
+    await asyncio.sleep(0.01)
+    assert running == {"b"}
+
+    gates["b"].set()
+    gates["c"].set()
+    await pipeline.drain()
+    assert overlapped == []
+    assert len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_vault_deposits_are_serialized_across_connections():
+    running = set()
+    overlapped = []
+
+    async def handle(message):
+        if running:
+            overlapped.append(message["request_id"])
+        running.add(message["request_id"])
+        await asyncio.sleep(0.01)
+        running.discard(message["request_id"])
+        return {"type": "deposit_complete", "data": {}}
+
+    first = RequestPipeline(FakeWebSocket(), JSONCodec(), handle)
+    second = RequestPipeline(FakeWebSocket(), JSONCodec(), handle)
+    await first.submit({"type": "deposit", "data": {"vault_id": "v1"}, "request_id": "a"})
+    await second.submit({"type": "deposit", "data": {"vault_id": "v1"}, "request_id": "b"})
+    # Strategy selections are only serialized within a connection
+    await first.submit({"type": "strategy_select", "data": {}, "request_id": "c"})
+    await second.submit({"type": "strategy_select", "data": {}, "request_id": "d"})
+    await asyncio.gather(first.drain(), second.drain())
+    assert "b" not in overlapped
+    assert "d" in overlapped
@@ -0,0 +1,87 @@
+import time
+import tracemalloc
+import pytest
+from config.settings import get_settings
+from core.container import ServiceContainer, get_container, reset_container
+from services import database, mongo
+from services.database import DatabaseService
+from services.vault_service import VaultService
+from services.websocket import WebSocketService
+
+
+@pytest.fixture(autouse=True)
+def fresh_container(monkeypatch):
+    monkeypatch.setattr(mongo, "_client", None)
+    monkeypatch.setattr(mongo, "_pool_metrics", None)
+    monkeypatch.setattr(database, "_database_service", None)
+    reset_container()
+    yield
+    reset_container()
+    mongo.close_mongo_client()
+
+
+def _per_request(rounds):
+    """What api/routes/vault.py used to do on every request"""
+    started = time.perf_counter()
+    tracemalloc.start()
+    for _ in range(rounds):
+        service = VaultService(db=DatabaseService(get_settings().MONGODB_URL, write_behind=False))
+        service.db.client.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (time.perf_counter() - started) / rounds, peak
+
+
+def _container_lookup(rounds):
+    started = time.perf_counter()
+    tracemalloc.start()
+    for _ in range(rounds):
+        get_container().vault_service
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (time.perf_counter() - started) / rounds, peak
+
+
+def test_container_shares_one_instance_of_each_service():
+    container = get_container()
+    assert get_container() is container
+
+    vault_service = container.vault_service
+    assert container.vault_service is vault_service
+    assert vault_service.db is container.db is database.get_database_service()
+    assert vault_service.agent_manager is container.agent_manager
+    assert vault_service.strategy_manager.agent_manager is container.agent_manager
+    assert vault_service.factory_client is container.factory_client
+    assert container.factory_client.web3 is container.web3
+    assert container.ws_service.vault_service is vault_service
+    assert container.ws_service.agent_manager is container.agent_manager
+
+
+def test_websocket_service_builds_wallet_service_once():
+    built = []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    service = WebSocketService(None, None, None, wallet_service_factory=factory)
+    assert service._get_wallet_service() is service._get_wallet_service()
+    assert len(built) == 1
+
+
+def test_benchmark_startup_and_per_request_cost():
+    started = time.perf_counter()
+    ServiceContainer().build()
+    startup = time.perf_counter() - started
+
+    before_time, before_peak = _per_request(20)
+    get_container().build()
+    after_time, after_peak = _container_lookup(2000)
+
+    print(
+        f"\ncontainer startup: {startup * 1000:.1f}ms"
+        f"\nper request before: {before_time * 1e6:.0f}us, peak {before_peak / 1024:.0f}KiB"
+        f"\nper request after: {after_time * 1e6:.2f}us, peak {after_peak / 1024:.1f}KiB"
+    )
+    assert after_time * 100 < before_time
+    assert after_peak < before_peak
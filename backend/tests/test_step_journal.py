@@ -0,0 +1,139 @@
+import asyncio
+from collections import Counter
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from models.journal import JournalStatus, StepStatus
+from services.morpho import MorphoService
+from services.step_journal import InMemoryJournalStore, StepJournal
+
+
+class FakeWrapper:
+    """
+    execute_action with the side effects counted per idempotency key: a
+    retried key is answered from the first success, like an action layer
+    that dedups
+    """
+
+    def __init__(self, fail=None, crash=None):
+        self.fail = Counter(fail or {})  # action -> failures before it works
+        self.crash = crash  # action that kills the "process" once
+        self.calls = []
+        self.effects = Counter()
+        self._done = {}
+
+    async def execute_action(self, action, params):
+        self.calls.append((action, params["idempotency_key"]))
+        key = params["idempotency_key"]
+        if key in self._done:
+            return self._done[key]
+        if action == self.crash:
+            self.crash = None
+            raise asyncio.CancelledError()
+        if self.fail[action]:
+            self.fail[action] -= 1
+            return SimpleNamespace(success=False, data=None, error=f"{action} reverted")
+        self.effects[action] += 1
+        data = {"tx_hash": f"0x{len(self._done):04x}"}
+        if action == "swap":
+            data["amount_out"] = params["amount_in"]  # 1:1 keeps the numbers readable
+        outcome = self._done[key] = SimpleNamespace(success=True, data=data, error=None)
+        return outcome
+
+
+def _service(wrapper, store, max_attempts=3):
+    return MorphoService(wrapper, journal=StepJournal(store, max_attempts=max_attempts))
+
+
+async def _loop(service):
+    return await service.execute_leverage_loop("vault-1", Decimal("1"), Decimal("0.5"), Decimal("0.01"))
+
+
+@pytest.mark.asyncio
+async def test_every_step_is_journaled_with_its_tx_hash():
+    wrapper, store = FakeWrapper(), InMemoryJournalStore()
+    result = await _loop(_service(wrapper, store))
+
+    assert result["success"] and result["loops_executed"] == 2
+    assert result["resumed"] is False
+    (journal,) = store.journals.values()
+    assert journal["status"] == JournalStatus.COMPLETED
+    assert [step["action"] for step in journal["steps"]] == [
+        "morpho_deposit", "morpho_borrow", "swap", "morpho_deposit", "morpho_borrow", "swap", "morpho_deposit"
+    ]
+    assert all(step["status"] == StepStatus.CONFIRMED and step["tx_hash"] for step in journal["steps"])
+    assert len({step["idempotency_key"] for step in journal["steps"]}) == 7
+
+
+@pytest.mark.asyncio
+async def test_failed_step_resumes_without_repeating_confirmed_work():
+    wrapper, store = FakeWrapper(fail={"swap": 1}), InMemoryJournalStore()
+    service = _service(wrapper, store)
+
+    first = await _loop(service)
+    assert first == {"success": False, "error": first["error"], "resumable": True}
+    assert wrapper.effects == {"morpho_deposit": 1, "morpho_borrow": 1}
+
+    # Next tick: deposit and borrow come from the journal, the swap is retried
+    second = await _loop(service)
+    assert second["success"] and second["resumed"] and second["replayed_steps"] == 2
+    assert wrapper.effects == {"morpho_deposit": 3, "morpho_borrow": 2, "swap": 2}
+    swap_keys = [key for action, key in wrapper.calls if action == "swap"]
+    assert swap_keys[0] == swap_keys[1]
+
+    # Same outcome as a run that never failed
+    clean = await _loop(_service(FakeWrapper(), InMemoryJournalStore()))
+    assert second["final_debt"] == clean["final_debt"]
+    assert second["final_collateral"] == clean["final_collateral"]
+
+
+@pytest.mark.asyncio
+async def test_crash_mid_step_resumes_in_a_new_process():
+    wrapper, store = FakeWrapper(crash="morpho_borrow"), InMemoryJournalStore()
+    with pytest.raises(asyncio.CancelledError):
+        await _loop(_service(wrapper, store))
+    (journal,) = store.journals.values()
+    assert journal["steps"][-1]["status"] == StepStatus.PLANNED
+
+    # A fresh service (new process) over the same store picks the run up,
+    # started with the original parameters
+    service = _service(wrapper, store)
+    result = await service.execute_leverage_loop("vault-1", Decimal("5"), Decimal("0.9"), Decimal("0.05"))
+    assert result["success"] and result["loops_executed"] == 2
+    assert wrapper.effects["morpho_deposit"] == 3
+    assert service.journal.get_stats()["resumed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_step_out_of_attempts_fails_the_journal():
+    wrapper, store = FakeWrapper(fail={"morpho_borrow": 2}), InMemoryJournalStore()
+    service = _service(wrapper, store, max_attempts=2)
+
+    assert (await _loop(service))["resumable"] is True
+    assert (await _loop(service))["resumable"] is False
+    (failed,) = store.journals.values()
+    assert failed["status"] == JournalStatus.FAILED
+
+    # A new run starts over
+    assert (await _loop(service))["success"]
+    assert len(store.journals) == 2
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_fails_the_journal():
+    class NoAmountOut(FakeWrapper):
+        async def execute_action(self, action, params):
+            outcome = await super().execute_action(action, params)
+            if action == "swap":
+                outcome = SimpleNamespace(success=True, data={"tx_hash": outcome.data["tx_hash"]}, error=None)
+            return outcome
+
+    store = InMemoryJournalStore()
+    assert (await _loop(_service(NoAmountOut(), store)))["success"] is False
+    (failed,) = store.journals.values()
+    assert failed["status"] == JournalStatus.FAILED
+    assert "KeyError" in failed["result"]["error"]
+
+    # Not left running: the next run starts over instead of replaying into the same error
+    assert (await _loop(_service(FakeWrapper(), store)))["success"]
+    assert len(store.journals) == 2
@@ -0,0 +1,125 @@
+import json
+import time
+import tracemalloc
+from datetime import datetime
+import pytest
+from cdp import Wallet
+from cdp_agentkit_core.actions import CdpAction
+from cdp_langchain.agent_toolkits import CdpToolkit
+from cdp_langchain.tools import CdpTool
+from cdp_langchain.utils import CdpAgentkitWrapper
+from pydantic import BaseModel
+from core.agents.morpho import agent as agent_module
+from core.agents.morpho.agent import MorphoAgent
+from core.agents.morpho.actions.borrow import MorphoBorrowInput, morpho_borrow
+from core.agents.morpho.actions.leverage import MorphoLeverageInput, morpho_leverage
+from core.agents.morpho.actions.repay import MorphoRepayInput, morpho_repay
+from core.agents.morpho.tools import ToolRegistry, get_tool_registry
+from models.wallet import Wallet as WalletModel
+
+AGENTS = 1000
+
+
+def _wrapper(wallet=None):
+    # Skip the validator: it configures the SDK and creates a wallet remotely
+    return CdpAgentkitWrapper.model_construct(wallet=wallet or object())
+
+
+class TransferInput(BaseModel):
+    amount: int
+
+
+def transfer(wallet: Wallet, amount: int) -> dict:
+    return {"wallet": wallet, "amount": amount}
+
+
+async def settle(amount: int) -> dict:
+    return {"settled": amount}
+
+
+def _per_agent_toolkit(wrapper):
+    """What MorphoAgent._setup_cdp_tools used to build for every agent"""
+    tools = CdpToolkit.from_cdp_agentkit_wrapper(wrapper).get_tools()
+    for name, schema, func in [
+        ("morpho_borrow", MorphoBorrowInput, morpho_borrow),
+        ("morpho_leverage", MorphoLeverageInput, morpho_leverage),
+        ("morpho_repay", MorphoRepayInput, morpho_repay),
+    ]:
+        tools.append(CdpTool(
+            name=name,
+            description=f"Execute {name} operation on Morpho",
+            cdp_agentkit_wrapper=wrapper,
+            args_schema=schema,
+            func=func
+        ))
+    return tools
+
+
+def _measure(build):
+    wrappers = [_wrapper() for _ in range(AGENTS)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    handles = [build(wrapper) for wrapper in wrappers]
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(handles) == AGENTS
+    return elapsed, size
+
+
+def test_shared_registry_has_cdp_and_morpho_tools():
+    registry = get_tool_registry()
+    assert get_tool_registry() is registry
+    for name in ["morpho_borrow", "morpho_leverage", "morpho_repay", "morpho_deposit", "transfer"]:
+        assert name in registry
+    with pytest.raises(ValueError):
+        registry.get("missing")
+
+
+@pytest.mark.asyncio
+async def test_bound_tools_run_with_the_agent_wallet():
+    registry = ToolRegistry([
+        CdpAction(name="transfer", description="", args_schema=TransferInput, func=transfer),
+        CdpAction(name="settle", description="", args_schema=TransferInput, func=settle),
+    ])
+    wallet = object()
+    tools = registry.bind(_wrapper(wallet))
+
+    assert await tools.arun("transfer", {"amount": "5"}) == {"wallet": wallet, "amount": 5}
+    assert await tools.arun("settle", {"amount": 2}) == {"settled": 2}
+    with pytest.raises(ValueError):
+        await tools.arun("missing", {})
+
+    langchain_tools = tools.get_tools()
+    assert [tool.name for tool in langchain_tools] == ["transfer", "settle"]
+    assert tools.get_tools() is langchain_tools
+
+
+def test_benchmark_tool_setup_for_1000_agents():
+    registry = get_tool_registry()
+    before_time, before_size = _measure(_per_agent_toolkit)
+    after_time, after_size = _measure(registry.bind)
+
+    print(
+        f"\n{AGENTS} agents, per-agent toolkit: {before_time * 1000:.0f}ms, {before_size / 2**20:.1f}MiB"
+        f"\n{AGENTS} agents, shared registry: {after_time * 1000:.1f}ms, {after_size / 2**20:.2f}MiB"
+    )
+    assert after_time * 10 < before_time
+    assert after_size * 10 < before_size
+
+
+@pytest.mark.parametrize("wallet_data, imported", [
+    # What strategy_select passes: the record returned by create_agent_wallet
+    (WalletModel(id="w-1", user_id="u-1", address="0xabc", status="active",
+                 created_at=datetime(2025, 5, 1), updated_at=datetime(2025, 5, 1)), None),
+    ({"id": "w-1", "address": "0xabc"}, None),
+    ({"wallet_id": "cdp-1", "seed": "ab" * 32}, {"wallet_id": "cdp-1", "seed": "ab" * 32}),
+])
+def test_agent_imports_only_exported_wallet_data(monkeypatch, wallet_data, imported):
+    created = []
+    monkeypatch.setattr(agent_module, "CdpAgentkitWrapper", lambda **kwargs: created.append(kwargs))
+    agent = MorphoAgent(strategy_params={"vault_id": "vault-1", "wallet_data": wallet_data}, settings=None)
+
+    agent._create_cdp_wrapper()
+    cdp_wallet_data = created[0]["cdp_wallet_data"]
+    assert (json.loads(cdp_wallet_data) if cdp_wallet_data else None) == imported
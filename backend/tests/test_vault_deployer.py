@@ -0,0 +1,174 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from web3 import Web3
+from models.database import VaultDB
+from services.vault_deployer import VaultDeployer
+from services.vault_service import VaultService
+from utils.vault_factory import vault_salt
+
+AGENT = Web3.to_checksum_address("0x" + "aa" * 20)
+USER = Web3.to_checksum_address("0x" + "bb" * 20)
+DEPLOY_TIME = 0.2  # stands in for a send + receipt round trip
+
+
+class FakeFactory:
+    """computeVaultAddress/deployVaultDeterministic without a chain"""
+
+    def __init__(self, failures=0):
+        self.code = set()
+        self.failures = failures
+        self.deploys = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @staticmethod
+    def _address(salt):
+        return Web3.to_checksum_address(Web3.keccak(salt)[-20:])
+
+    async def compute_vault_address(self, agent, user, salt):
+        return self._address(salt)
+
+    async def is_deployed(self, address):
+        return address in self.code
+
+    async def deploy_vault(self, agent, user, salt=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(DEPLOY_TIME)
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("node unavailable")
+            self.deploys += 1
+            self.code.add(self._address(salt))
+            return self._address(salt)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeDb:
+    def __init__(self):
+        self.vaults = {}
+        self.wallet = SimpleNamespace(address=AGENT, cdp_wallet_id="wallet-1")
+
+    def add(self, vault_id, settings=None):
+        self.vaults[vault_id] = VaultDB(
+            id=vault_id, user_id="user-1", strategy_id="s", initial_deposit=0, current_balance=0, settings=settings
+        )
+        return self.vaults[vault_id]
+
+    async def get_vault(self, vault_id):
+        vault = self.vaults.get(vault_id)
+        return vault.model_copy(deep=True) if vault else None
+
+    async def update_vault_settings(self, vault_id, settings):
+        self.vaults[vault_id].settings = dict(settings)
+
+    async def update_vault_balance(self, vault_id, balance):
+        self.vaults[vault_id].current_balance = balance
+
+    async def get_agent_wallet(self, user_id):
+        return self.wallet
+
+
+@pytest.mark.asyncio
+async def test_assign_returns_before_the_contract_is_deployed():
+    factory, db = FakeFactory(), FakeDb()
+    deployer = VaultDeployer(factory, db)
+    vault = db.add("vault-1")
+
+    started = time.perf_counter()
+    address = await deployer.assign(vault, AGENT, USER)
+    assert time.perf_counter() - started < DEPLOY_TIME / 4
+    assert address == await factory.compute_vault_address(AGENT, USER, vault_salt("vault-1"))
+    assert db.vaults["vault-1"].settings == {"deposit_address": address, "contract_status": "pending"}
+    assert deployer.get_stats()["pending"] == 1
+
+    assert await deployer.wait_deployed("vault-1", timeout=5) == address
+    assert db.vaults["vault-1"].settings["contract_status"] == "deployed"
+    assert await factory.is_deployed(address)
+
+    # Deployed: nothing more to compute or send
+    assert await deployer.assign(await db.get_vault("vault-1"), AGENT, USER) == address
+    assert await deployer.wait_deployed("vault-1") == address
+    assert (factory.deploys, deployer.get_stats()["assigned"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_pending_vault_is_finished_without_a_second_deployment():
+    factory, db = FakeFactory(), FakeDb()
+    address = await factory.compute_vault_address(AGENT, USER, vault_salt("vault-1"))
+    # Deployed before a restart, but never marked so
+    factory.code.add(address)
+    vault = db.add("vault-1", {"deposit_address": address, "contract_status": "pending"})
+
+    deployer = VaultDeployer(factory, db)
+    assert await deployer.assign(vault, AGENT, USER) == address
+    await deployer.wait_deployed("vault-1", timeout=5)
+    assert factory.deploys == 0
+    assert deployer.get_stats()["already_deployed"] == 1
+    assert db.vaults["vault-1"].settings["contract_status"] == "deployed"
+
+
+@pytest.mark.asyncio
+async def test_failed_deployments_are_retried_then_marked_failed():
+    factory, db = FakeFactory(failures=3), FakeDb()
+    deployer = VaultDeployer(factory, db, max_attempts=2, retry_delay=0)
+    vault = db.add("vault-1")
+
+    await deployer.assign(vault, AGENT, USER)
+    with pytest.raises(ConnectionError):
+        await deployer.wait_deployed("vault-1", timeout=5)
+    assert db.vaults["vault-1"].settings["contract_status"] == "failed"
+    assert deployer.get_stats()["retries"] == 1
+
+    # The address stays the same; the next assign tries again
+    address = await deployer.assign(await db.get_vault("vault-1"), AGENT, USER)
+    assert await deployer.wait_deployed("vault-1", timeout=5) == address
+    assert db.vaults["vault-1"].settings == {"deposit_address": address, "contract_status": "deployed"}
+
+
+@pytest.mark.asyncio
+async def test_deployments_are_bounded_and_overlap():
+    factory, db = FakeFactory(), FakeDb()
+    deployer = VaultDeployer(factory, db, concurrency=4)
+    vaults = [db.add(f"vault-{i}") for i in range(12)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*[deployer.assign(vault, AGENT, USER) for vault in vaults])
+    await asyncio.gather(*[deployer.wait_deployed(vault.id, timeout=5) for vault in vaults])
+    elapsed = time.perf_counter() - started
+
+    assert factory.max_in_flight == 4
+    assert elapsed < 12 * DEPLOY_TIME / 2
+    assert len({db.vaults[vault.id].settings["deposit_address"] for vault in vaults}) == 12
+
+
+@pytest.mark.asyncio
+async def test_first_deposit_does_not_wait_for_deployment():
+    factory, db = FakeFactory(), FakeDb()
+    db.add("vault-1")
+    agent = SimpleNamespace(execute_deposit=None)
+    deposits = []
+
+    async def execute_deposit(params):
+        deposits.append(params)
+        return {"tx_hash": "0x01"}
+
+    agent.execute_deposit = execute_deposit
+    service = VaultService(
+        db=db,
+        agent_manager=SimpleNamespace(get_agent=lambda vault_id: agent),
+        strategy_manager=object(),
+        factory_client=factory,
+        deployer=VaultDeployer(factory, db)
+    )
+
+    started = time.perf_counter()
+    result = await service.handle_deposit("user-1", "vault-1", 5.0, "0xtoken", USER)
+    assert time.perf_counter() - started < DEPLOY_TIME / 4
+    assert result["new_balance"] == 5.0
+    assert deposits[0]["vault_address"] == db.vaults["vault-1"].settings["deposit_address"]
+    await service.deployer.wait_deployed("vault-1", timeout=5)
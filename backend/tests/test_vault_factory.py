@@ -0,0 +1,150 @@
+import asyncio
+import os
+import pytest
+from web3 import Web3
+from utils.vault_factory import NonceManager, VaultFactoryClient, vault_salt
+
+eth_tester = pytest.importorskip("eth_tester")
+from web3.providers.eth_tester import EthereumTesterProvider  # noqa: E402
+
+VAULT_DEPLOYED = Web3.keccak(text="VaultDeployed(address,address,address)")
+
+# Stand-in for contracts/src/VaultFactory.sol (no solc here): any call
+# CREATEs an empty contract, emits VaultDeployed(vault, agent, user) with
+# agent/user indexed, and returns the vault address.
+#   PUSH1 0 PUSH1 0 PUSH1 0 CREATE PUSH1 0 MSTORE
+#   PUSH1 0x24 CALLDATALOAD PUSH1 0x04 CALLDATALOAD PUSH32 <topic>
+#   PUSH1 0x20 PUSH1 0 LOG3 PUSH1 0x20 PUSH1 0 RETURN
+FACTORY_RUNTIME = (
+    bytes.fromhex("600060006000f0600052" "602435" "600435" "7f")
+    + VAULT_DEPLOYED
+    + bytes.fromhex("60206000a3" "60206000f3")
+)
+FACTORY_INIT = bytes([0x60, len(FACTORY_RUNTIME), 0x60, 12, 0x60, 0, 0x39, 0x60, len(FACTORY_RUNTIME), 0x60, 0, 0xF3])
+
+
+def _deploy_factory(web3):
+    tx_hash = web3.eth.send_transaction({
+        "from": web3.eth.accounts[0],
+        "data": FACTORY_INIT + FACTORY_RUNTIME,
+        "gas": 200000
+    })
+    return web3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+
+
+@pytest.fixture
+def chain():
+    tester = eth_tester.EthereumTester()
+    web3 = Web3(EthereumTesterProvider(tester))
+    client = VaultFactoryClient(
+        None,
+        _deploy_factory(web3),
+        tester.backend.account_keys[0].to_bytes(),
+        web3=web3,
+        poll_interval=0.01
+    )
+    return tester, web3, client
+
+
+def _pairs(web3, count):
+    return [(web3.eth.accounts[1 + i % 4], web3.eth.accounts[5 + i % 4]) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_deploys_get_distinct_nonces(chain):
+    _, web3, client = chain
+    start = web3.eth.get_transaction_count(client.account.address)
+
+    vaults = await client.deploy_vaults(_pairs(web3, 10))
+
+    assert len(set(vaults)) == 10
+    assert web3.eth.get_transaction_count(client.account.address) == start + 10
+    transactions = [
+        web3.eth.get_transaction(tx)
+        for n in range(web3.eth.block_number + 1)
+        for tx in web3.eth.get_block(n)["transactions"]
+    ]
+    nonces = sorted(tx["nonce"] for tx in transactions if tx["to"] == client.factory_address)
+    assert nonces == list(range(start, start + 10))
+    # Every block is read once, however many deployments were waiting
+    assert client.receipts.blocks_scanned <= 10
+    # EIP-1559 fees from the oracle; deployVault gas estimated once
+    assert all(tx["type"] == 2 for tx in transactions if tx["to"] == client.factory_address)
+    assert client.fee_oracle.get_stats()["gas_estimates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unsent_nonce_is_reused(chain, monkeypatch):
+    _, web3, client = chain
+    await client.deploy_vault(*_pairs(web3, 1)[0])
+    start = web3.eth.get_transaction_count(client.account.address)
+
+    real_send = web3.eth.send_raw_transaction
+    calls = []
+
+    def flaky_send(raw):
+        calls.append(raw)
+        if len(calls) == 1:
+            raise ConnectionError("node unavailable")
+        return real_send(raw)
+
+    monkeypatch.setattr(web3.eth, "send_raw_transaction", flaky_send)
+    with pytest.raises(ConnectionError):
+        await client.deploy_vault(*_pairs(web3, 1)[0])
+    await client.deploy_vault(*_pairs(web3, 1)[0])
+    assert web3.eth.get_transaction_count(client.account.address) == start + 1
+
+
+@pytest.mark.asyncio
+async def test_stale_nonce_is_resynced(chain):
+    _, web3, client = chain
+    await client.deploy_vault(*_pairs(web3, 1)[0])
+    # Someone else spends the deployer's next nonce
+    web3.eth.send_transaction({"from": client.account.address, "to": web3.eth.accounts[1], "value": 1})
+
+    assert Web3.is_address(await client.deploy_vault(*_pairs(web3, 1)[0]))
+
+
+@pytest.mark.asyncio
+async def test_salted_deploy_uses_create2_entry_point(chain):
+    _, web3, client = chain
+    agent, user = _pairs(web3, 1)[0]
+    vault = await client.deploy_vault(agent, user, salt=vault_salt("vault-1"))
+
+    assert await client.is_deployed(vault) is False  # the stand-in CREATEs empty contracts
+    tx = web3.eth.get_transaction(web3.eth.get_block("latest")["transactions"][0])
+    selector = Web3.keccak(text="deployVaultDeterministic(address,address,bytes32)")[:4]
+    assert bytes(tx["input"]).startswith(selector)
+    assert bytes(tx["input"]).endswith(vault_salt("vault-1"))
+
+
+@pytest.mark.asyncio
+async def test_nonce_gaps_are_filled_first():
+    manager = NonceManager(None, "0x0")
+    manager._next = 10
+    nonces = [await manager.allocate() for _ in range(4)]
+    manager.release(nonces[1])
+    manager.release(nonces[3])
+    assert [await manager.allocate() for _ in range(3)] == [11, 13, 14]
+
+
+@pytest.mark.skipif(not os.getenv("WEB3_TEST_PROVIDER_URI"), reason="needs a dev chain with a mempool (e.g. anvil)")
+@pytest.mark.asyncio
+async def test_burst_lands_in_one_block_on_dev_chain():
+    """
+    Against anvil/hardhat: WEB3_TEST_PROVIDER_URI, WEB3_TEST_PRIVATE_KEY and
+    WEB3_TEST_FACTORY_ADDRESS (a deployed VaultFactory), with block time > 1s
+    """
+    web3 = Web3(Web3.HTTPProvider(os.environ["WEB3_TEST_PROVIDER_URI"]))
+    client = VaultFactoryClient(
+        None,
+        os.environ["WEB3_TEST_FACTORY_ADDRESS"],
+        os.environ["WEB3_TEST_PRIVATE_KEY"],
+        web3=web3,
+        poll_interval=0.1
+    )
+    agent, user = client.account.address, web3.eth.accounts[1]
+    submitted = await asyncio.gather(*[client.submit_deploy(agent, user) for _ in range(20)])
+    receipts = await asyncio.gather(*[client.receipts.wait(tx_hash, receipt, 120) for tx_hash, receipt in submitted])
+    blocks = {receipt["blockNumber"] for receipt in receipts}
+    assert len(blocks) <= 2
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from decimal import Decimal
+import pytest
+from api.websocket.backplane import InProcessBackplane, RedisBackplane
+from api.websocket.codec import MsgPackCodec, msgpack
+from api.websocket.manager import ConnectionManager
+
+
+class FakePubSub:
+    """Local stand-in for redis.asyncio.client.PubSub"""
+
+    def __init__(self, server):
+        self.server = server
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        if self.inbox.empty():
+            await asyncio.sleep(timeout)
+        return None if self.inbox.empty() else self.inbox.get_nowait()
+
+    async def close(self):
+        self.server.pubsubs.remove(self)
+
+
+class FakeRedis:
+    """Local stand-in for a Redis server shared by several workers"""
+
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def publish(self, channel, data):
+        receivers = [p for p in self.pubsubs if channel in p.channels]
+        for pubsub in receivers:
+            pubsub.inbox.put_nowait({"type": "message", "channel": channel.encode(), "data": data if isinstance(data, bytes) else data.encode()})
+        return len(receivers)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.binary_frames = 0
+
+    async def send_text(self, payload):
+        self.sent.append(json.loads(payload))
+
+    async def send_bytes(self, payload):
+        self.binary_frames += 1
+        self.sent.append(MsgPackCodec().decode(payload))
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+def _types(websocket, message_type):
+    return [m for m in websocket.sent if m.get("type") == message_type]
+
+
+@pytest.mark.asyncio
+async def test_in_process_backplane_only_delivers_subscribed_topics():
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    alice, bob = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(alice, "alice")
+    await manager.connect(bob, "bob")
+    manager.subscriptions["alice"].add("strategy_1")
+    await manager._add_topics("alice", {"strategy_1"})
+
+    await manager.broadcast_message({"type": "monitor_update", "data": {"v": 1}}, "strategy_1")
+
+    assert _types(alice, "monitor_update") == [{"type": "monitor_update", "data": {"v": 1}}]
+    assert _types(bob, "monitor_update") == []
+
+
+@pytest.mark.asyncio
+async def test_messages_and_pings_use_the_negotiated_codec():
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    packed, plain = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(packed, "packed", codec=MsgPackCodec())
+    await manager.connect(plain, "plain")
+
+    await manager.broadcast({"type": "system", "data": {"v": 1}})
+    await manager._send_ping("packed")
+
+    assert _types(packed, "system") == [{"type": "system", "data": {"v": 1}}]
+    assert len(_types(packed, "ping")) == 1
+    assert packed.binary_frames == len(packed.sent)
+    assert plain.binary_frames == 0 and _types(plain, "system")
+
+
+@pytest.mark.asyncio
+async def test_redis_backplane_fans_out_across_workers():
+    redis = FakeRedis()
+    worker_a = ConnectionManager(backplane=RedisBackplane(client=redis, poll_timeout=0.01))
+    worker_b = ConnectionManager(backplane=RedisBackplane(client=redis, poll_timeout=0.01))
+    on_a, on_b = FakeWebSocket(), FakeWebSocket()
+    try:
+        await worker_a.connect(on_a, "client_a")
+        await worker_b.connect(on_b, "client_b")
+        worker_b.subscriptions["client_b"].add("strategy_7")
+        await worker_b._add_topics("client_b", {"strategy_7"})
+
+        # Published on worker A, only subscribed on worker B
+        await worker_a.broadcast_message({"type": "monitor_update", "data": {"vault_id": "7"}}, "strategy_7")
+        await worker_a.broadcast({"type": "system", "data": {}})
+        await _settle()
+
+        assert _types(on_b, "monitor_update") == [{"type": "monitor_update", "data": {"vault_id": "7"}}]
+        assert _types(on_a, "monitor_update") == []
+        assert len(_types(on_a, "system")) == 1
+        assert len(_types(on_b, "system")) == 1
+
+        # Last local subscriber leaving drops the worker's channel subscription
+        await worker_b.disconnect("client_b")
+        channels = set().union(*(p.channels for p in redis.pubsubs))
+        assert "helenus:ws:strategy_7" not in channels
+    finally:
+        await worker_a.backplane.stop()
+        await worker_b.backplane.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_and_in_process_delivery_agree():
+    message = {"type": "market_update", "data": {"price": Decimal("3100.50"), "amounts": [Decimal("-0.000001"), 2]}}
+
+    async def deliver(backplane):
+        received = []
+
+        async def handler(topic, delivered):
+            received.append((topic, delivered))
+
+        await backplane.start(handler)
+        try:
+            await backplane.subscribe("market_ETH-USD")
+            await backplane.publish("market_ETH-USD", message)
+            await _settle()
+        finally:
+            await backplane.stop()
+        return received
+
+    over_redis = await deliver(RedisBackplane(client=FakeRedis(), poll_timeout=0.01))
+    in_process = await deliver(InProcessBackplane())
+    assert over_redis == in_process
+    if msgpack is not None:
+        assert over_redis == [("market_ETH-USD", message)]
+        assert str(over_redis[0][1]["data"]["price"]) == "3100.50"
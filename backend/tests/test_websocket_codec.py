@@ -0,0 +1,98 @@
+import pytest
+from decimal import Decimal
+from api.websocket.codec import (
+    JSONCodec,
+    MsgPackCodec,
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    decimal_to_scaled,
+    scaled_to_decimal,
+    select_codec,
+    accept_with_codec,
+)
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket"""
+
+    def __init__(self, subprotocols=None, frames=None):
+        self.scope = {"subprotocols": subprotocols or []}
+        self.frames = list(frames or [])
+        self.accepted_subprotocol = "unset"
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        self.accepted_subprotocol = subprotocol
+
+    async def receive(self):
+        return self.frames.pop(0)
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+@pytest.mark.parametrize("value", ["0", "1.25", "-0.000001", "12E+3", "123456789.123456789"])
+def test_decimal_scaled_round_trip(value):
+    unscaled, scale = decimal_to_scaled(Decimal(value))
+    assert isinstance(unscaled, int)
+    assert scaled_to_decimal(unscaled, scale) == Decimal(value)
+
+
+def test_msgpack_round_trip_keeps_decimal_precision():
+    codec = MsgPackCodec()
+    message = {
+        "type": "market_update",
+        "data": {"oracle_price": Decimal("3150.123456789"), "symbol": "ETH-USD"},
+        "request_id": None,
+    }
+    payload = codec.encode(message)
+    assert isinstance(payload, bytes)
+    assert len(payload) < len(JSONCodec().encode(message))
+    decoded = codec.decode(payload)
+    assert decoded["data"]["oracle_price"] == Decimal("3150.123456789")
+    assert decoded["data"]["symbol"] == "ETH-USD"
+
+
+def test_select_codec_follows_client_preference():
+    assert isinstance(select_codec([MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL]), MsgPackCodec)
+    codec = select_codec([JSON_SUBPROTOCOL, MSGPACK_SUBPROTOCOL])
+    assert isinstance(codec, JSONCodec)
+    assert codec.subprotocol == JSON_SUBPROTOCOL
+
+
+def test_select_codec_falls_back_to_plain_json():
+    codec = select_codec(["unknown.v9"])
+    assert isinstance(codec, JSONCodec)
+    assert codec.subprotocol is None
+
+
+@pytest.mark.asyncio
+async def test_accept_negotiates_and_uses_binary_frames():
+    codec = MsgPackCodec()
+    websocket = FakeWebSocket(
+        subprotocols=[MSGPACK_SUBPROTOCOL],
+        frames=[{"type": "websocket.receive", "bytes": codec.encode({"type": "deposit", "data": {"amount": Decimal("1.5")}})}],
+    )
+    negotiated = await accept_with_codec(websocket)
+    assert websocket.accepted_subprotocol == MSGPACK_SUBPROTOCOL
+
+    message = await negotiated.receive(websocket)
+    assert message["data"]["amount"] == Decimal("1.5")
+
+    await negotiated.send(websocket, {"type": "deposit_complete", "data": {"new_balance": Decimal("2.5")}})
+    assert isinstance(websocket.sent[0], bytes)
+    assert codec.decode(websocket.sent[0])["data"]["new_balance"] == Decimal("2.5")
+
+
+@pytest.mark.asyncio
+async def test_legacy_client_gets_json_text_frames():
+    websocket = FakeWebSocket(frames=[{"type": "websocket.receive", "text": '{"type": "deposit", "data": {}}'}])
+    codec = await accept_with_codec(websocket)
+    assert websocket.accepted_subprotocol is None
+    assert await codec.receive(websocket) == {"type": "deposit", "data": {}}
+
+    await codec.send(websocket, {"type": "error", "data": {"amount": Decimal("0.1")}})
+    assert websocket.sent == ['{"type":"error","data":{"amount":"0.1"}}']
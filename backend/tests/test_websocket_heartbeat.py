@@ -0,0 +1,122 @@
+import pytest
+from api.websocket.heartbeat import TimerWheel, HeartbeatMonitor
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_timer_wheel_expires_timers_at_their_tick():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3)
+    wheel.schedule("a", 3)
+    wheel.schedule("b", 5)
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(5) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_cascades_long_timers_from_upper_levels():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3)
+    # Beyond level 0 (8 ticks) and level 1 (64 ticks)
+    for delay in (9, 63, 100, 700):
+        wheel.schedule(delay, delay)
+    fired = {}
+    for now in range(1, 710):
+        for key in wheel.advance(now):
+            fired[key] = now
+    assert fired == {9: 9, 63: 63, 100: 100, 700: 700}
+
+
+def test_timer_wheel_reschedule_and_cancel():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=2)
+    wheel.schedule("a", 2)
+    wheel.schedule("a", 10)
+    assert wheel.advance(5) == []
+    assert wheel.cancel("a") is True
+    assert wheel.cancel("a") is False
+    assert wheel.advance(20) == []
+
+
+def _monitor(clock, **kwargs):
+    monitor = HeartbeatMonitor(interval=10, max_missed_pongs=2, jitter=0, clock=clock, **kwargs)
+    events = []
+
+    def track(client_id):
+        async def ping():
+            events.append(("ping", client_id))
+
+        async def evict():
+            events.append(("evict", client_id))
+
+        monitor.track(client_id, ping=ping, evict=evict)
+
+    return monitor, events, track
+
+
+@pytest.mark.asyncio
+async def test_active_connections_are_not_pinged():
+    clock = FakeClock()
+    monitor, events, track = _monitor(clock)
+    track("busy")
+    for step in range(1, 31):
+        clock.now = step
+        monitor.touch("busy")
+        await monitor.tick()
+    assert events == []
+    await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_idle_connection_is_pinged_then_evicted_after_missed_pongs():
+    clock = FakeClock()
+    monitor, events, track = _monitor(clock)
+    track("idle")
+    for step in range(1, 41):
+        clock.now = step
+        await monitor.tick()
+    assert events == [("ping", "idle"), ("ping", "idle"), ("evict", "idle")]
+    assert "idle" not in monitor.connections
+    assert monitor.get_stats()["evictions"] == 1
+    await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_pong_resets_missed_count():
+    clock = FakeClock()
+    monitor, events, track = _monitor(clock)
+    track("slow")
+    for step in range(1, 61):
+        clock.now = step
+        if ("ping", "slow") in events and step % 10 == 5:
+            monitor.touch("slow")  # pong arrives a few seconds after each ping
+        await monitor.tick()
+    assert ("evict", "slow") not in events
+    await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_jitter_spreads_pings_for_connections_opened_together():
+    clock = FakeClock()
+    monitor = HeartbeatMonitor(interval=10, max_missed_pongs=5, jitter=0.5, clock=clock)
+    ping_times = {}
+
+    for index in range(50):
+        async def ping(index=index):
+            ping_times.setdefault(index, clock.now)
+
+        async def evict():
+            pass
+
+        monitor.track(index, ping=ping, evict=evict)
+
+    for step in range(1, 20):
+        clock.now = step
+        await monitor.tick()
+    assert len(ping_times) == 50
+    assert len(set(ping_times.values())) > 1
+    await monitor.stop()
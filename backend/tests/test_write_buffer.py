@@ -0,0 +1,201 @@
+import asyncio
+import pytest
+from pymongo.errors import BulkWriteError
+from services.database import DatabaseService
+from services.write_buffer import WriteBehindBuffer, flush_all
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = {d["id"]: dict(d) for d in documents}
+        self.bulk_writes = []
+        self.fail_keys = set()
+        self.finds = 0
+
+    async def bulk_write(self, operations, ordered=True):
+        assert ordered is False
+        self.bulk_writes.append(len(operations))
+        errors = []
+        for index, op in enumerate(operations):
+            key = op._filter["id"]
+            if key in self.fail_keys:
+                errors.append({"index": index, "code": 1, "errmsg": "boom"})
+                continue
+            self.documents.setdefault(key, {"id": key}).update(op._doc["$set"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def find_one(self, query):
+        self.finds += 1
+        document = self.documents.get(query["id"])
+        return dict(document) if document else None
+
+
+@pytest.mark.asyncio
+async def test_updates_coalesce_into_one_bulk_write():
+    collection = FakeCollection()
+    buffer = WriteBehindBuffer(collection, clock=FakeClock())
+    for n in range(100):
+        await buffer.set(f"v{n % 10}", {"current_balance": n})
+        await buffer.set(f"v{n % 10}", {"settings": {"n": n}})
+
+    assert collection.bulk_writes == []
+    assert buffer.overlay("v3") == {"current_balance": 93, "settings": {"n": 93}}
+    assert await buffer.flush() == 10
+    assert collection.bulk_writes == [10]
+    assert collection.documents["v3"]["current_balance"] == 93
+    assert buffer.get_stats()["coalesced"] == 190
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_due_only_honours_window_and_max_age():
+    clock = FakeClock()
+    collection = FakeCollection()
+    buffer = WriteBehindBuffer(collection, window=1.0, max_age=3.0, clock=clock)
+
+    await buffer.set("quiet", {"current_balance": 1})
+    await buffer.set("busy", {"current_balance": 1})
+    for step in range(1, 4):
+        clock.now = step * 0.8
+        await buffer.set("busy", {"current_balance": step})
+        await buffer.flush(due_only=True)
+    # "quiet" went out after its window; "busy" kept writing until max age
+    assert "quiet" in collection.documents
+    assert "busy" not in collection.documents
+    clock.now = 3.0
+    await buffer.flush(due_only=True)
+    assert collection.documents["busy"]["current_balance"] == 3
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_retried_under_newer_values():
+    clock = FakeClock()
+    collection = FakeCollection()
+    collection.fail_keys = {"v1"}
+    buffer = WriteBehindBuffer(collection, clock=clock)
+    await buffer.set("v1", {"current_balance": 1, "status": "active"})
+    await buffer.set("v2", {"current_balance": 2})
+
+    assert await buffer.flush() == 1
+    await buffer.set("v1", {"current_balance": 5})
+    collection.fail_keys = set()
+    clock.now = 1.0
+    await buffer.flush()
+    assert collection.documents["v1"] == {"id": "v1", "current_balance": 5, "status": "active"}
+    assert buffer.get_stats()["failed"] == 1
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_writes_back_off_and_are_dropped():
+    clock = FakeClock()
+    collection = FakeCollection()
+    collection.fail_keys = {"v1"}
+    buffer = WriteBehindBuffer(collection, max_attempts=3, retry_backoff=1.0, clock=clock)
+    await buffer.set("v1", {"current_balance": 1})
+
+    attempts = []
+    for step in range(8):
+        clock.now = float(step)
+        before = len(collection.bulk_writes)
+        await buffer.flush(due_only=True)
+        if len(collection.bulk_writes) > before:
+            attempts.append(clock.now)
+    # Written once its window passed, retried 1s then 2s later, then given up
+    assert attempts == [1.0, 2.0, 4.0]
+    assert len(buffer) == 0
+    assert buffer.get_stats()["dropped"] == 1
+
+    # A value set while a failing write backs off replaces it, not the other way round
+    await buffer.set("v2", {"current_balance": 1})
+    collection.fail_keys = {"v2"}
+    await buffer.flush()
+    await buffer.set("v2", {"current_balance": 2})
+    collection.fail_keys = set()
+    await buffer.stop()
+    assert collection.documents["v2"]["current_balance"] == 2
+
+
+@pytest.mark.asyncio
+async def test_background_flush_and_shutdown_hook():
+    collection = FakeCollection()
+    buffer = WriteBehindBuffer(collection, window=0.01, max_age=0.05)
+    await buffer.set("v1", {"current_balance": 1})
+    await asyncio.sleep(0.05)
+    assert collection.documents["v1"]["current_balance"] == 1
+
+    slow = WriteBehindBuffer(collection, window=60, max_age=60)
+    await slow.set("v2", {"current_balance": 2})
+    await flush_all()
+    assert collection.documents["v2"]["current_balance"] == 2
+
+
+@pytest.mark.asyncio
+async def test_database_service_reads_its_buffered_writes():
+    service = DatabaseService("mongodb://localhost:27017", write_window=60, write_max_age=60)
+    service.db.vaults = FakeCollection([{
+        "id": "v1", "user_id": "u1", "strategy_id": "s1",
+        "initial_deposit": 100.0, "current_balance": 100.0, "settings": {}
+    }])
+    service.vault_writes.collection = service.db.vaults
+
+    await service.get_vault("v1")
+    settings = {"deposit_address": "0xbeef"}
+    await service.update_vault_balance("v1", 150.0)
+    await service.update_vault_settings("v1", settings)
+    settings["deposit_address"] = "0xdead"
+
+    # Served from the updated cache entry, then from the database plus overlay
+    vault = await service.get_vault("v1")
+    assert (vault.current_balance, vault.settings) == (150.0, {"deposit_address": "0xbeef"})
+    service.vault_cache.clear()
+    vault = await service.get_vault("v1")
+    assert (vault.current_balance, vault.settings) == (150.0, {"deposit_address": "0xbeef"})
+    assert service.db.vaults.bulk_writes == []
+
+    await service.close()
+    assert service.db.vaults.bulk_writes == [1]
+    assert service.db.vaults.documents["v1"]["current_balance"] == 150.0
+
+
+@pytest.mark.asyncio
+async def test_update_racing_a_flush_keeps_concurrent_cache_changes():
+    class GatedCollection(FakeCollection):
+        def __init__(self, documents):
+            super().__init__(documents)
+            self.gate = asyncio.Event()
+
+        async def bulk_write(self, operations, ordered=True):
+            await self.gate.wait()
+            await super().bulk_write(operations, ordered=ordered)
+
+    service = DatabaseService("mongodb://localhost:27017", write_window=60, write_max_age=60)
+    service.db.vaults = GatedCollection([{
+        "id": "v1", "user_id": "u1", "strategy_id": "s1",
+        "initial_deposit": 100.0, "current_balance": 100.0, "settings": {}
+    }])
+    service.vault_writes.collection = service.db.vaults
+    service.vault_writes.max_pending = 1
+    await service.get_vault("v1")
+
+    # Each update fills the buffer and flushes; the second runs while the first's flush is blocked
+    balance = asyncio.create_task(service.update_vault_balance("v1", 150.0))
+    await asyncio.sleep(0)
+    settings = asyncio.create_task(service.update_vault_settings("v1", {"deposit_address": "0xbeef"}))
+    await asyncio.sleep(0)
+    service.db.vaults.gate.set()
+    await asyncio.gather(balance, settings)
+
+    vault = await service.get_vault("v1")
+    assert (vault.current_balance, vault.settings) == (150.0, {"deposit_address": "0xbeef"})
+    await service.close()
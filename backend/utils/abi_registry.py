@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from eth_abi import decode, encode
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+ABI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "abis")
+
+
+class FunctionSpec(NamedTuple):
+    name: str
+    signature: str  # e.g. "deployVault(address,address)"
+    selector: bytes
+    input_types: Tuple[str, ...]
+    output_types: Tuple[str, ...]
+
+
+class EventSpec(NamedTuple):
+    name: str
+    signature: str
+    topic: bytes
+    indexed: Tuple[Tuple[str, str], ...]  # (name, type) of the topics after the first
+    data: Tuple[Tuple[str, str], ...]  # (name, type) of the ABI-encoded data
+
+
+def _canonical_type(param: Dict[str, Any]) -> str:
+    """Solidity type as it appears in a signature; tuples are spelled out"""
+    type_ = param["type"]
+    if type_.startswith("tuple"):
+        components = ",".join(_canonical_type(c) for c in param["components"])
+        return f"({components}){type_[len('tuple'):]}"
+    return type_
+
+
+def _checksum(types: Tuple[str, ...], values: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    return tuple(Web3.to_checksum_address(v) if t == "address" else v for t, v in zip(types, values))
+
+
+class ContractAbi:
+    """
+    One parsed ABI with precomputed selectors and event topics.
+
+    Calldata is encoded straight from the selector and input types, and logs
+    are decoded by topic, without building web3 contract objects.
+
+    Example:
+        factory = get_abi_registry().get("vault_factory")
+        data = factory.encode("deployVault", agent, user)
+        event = factory.decode_log(receipt["logs"][0])  # {"event", "address", "args"}
+    """
+
+    def __init__(self, name: str, abi: List[Dict[str, Any]]):
+        self.name = name
+        self.abi = abi
+        self.functions: Dict[str, FunctionSpec] = {}
+        self.events: Dict[str, EventSpec] = {}
+        self.events_by_topic: Dict[bytes, EventSpec] = {}
+        overloads: Dict[str, List[FunctionSpec]] = {}
+
+        for entry in abi:
+            if entry.get("type") == "function":
+                inputs = tuple(_canonical_type(p) for p in entry.get("inputs", []))
+                signature = f"{entry['name']}({','.join(inputs)})"
+                spec = FunctionSpec(
+                    entry["name"],
+                    signature,
+                    bytes(Web3.keccak(text=signature)[:4]),
+                    inputs,
+                    tuple(_canonical_type(p) for p in entry.get("outputs", []))
+                )
+                self.functions[signature] = spec
+                overloads.setdefault(spec.name, []).append(spec)
+            elif entry.get("type") == "event":
+                params = [(p["name"], _canonical_type(p), p.get("indexed", False)) for p in entry.get("inputs", [])]
+                signature = f"{entry['name']}({','.join(t for _, t, _ in params)})"
+                spec = EventSpec(
+                    entry["name"],
+                    signature,
+                    bytes(Web3.keccak(text=signature)),
+                    tuple((n, t) for n, t, indexed in params if indexed),
+                    tuple((n, t) for n, t, indexed in params if not indexed)
+                )
+                self.events[spec.name] = spec
+                if not entry.get("anonymous"):
+                    self.events_by_topic[spec.topic] = spec
+
+        # Plain names work when they are not overloaded
+        for name, specs in overloads.items():
+            if len(specs) == 1:
+                self.functions[name] = specs[0]
+
+    def function(self, name: str) -> FunctionSpec:
+        """Function by name or signature"""
+        spec = self.functions.get(name)
+        if spec is None:
+            if any(s.name == name for s in self.functions.values()):
+                raise ValueError(f"{self.name}.{name} is overloaded; use its signature")
+            raise ValueError(f"{self.name} has no function {name}")
+        return spec
+
+    def encode(self, name: str, *args: Any) -> bytes:
+        """Calldata for a call of `name` with `args`"""
+        spec = self.function(name)
+        return spec.selector + encode(spec.input_types, args)
+
+    def decode_output(self, name: str, data: bytes) -> Tuple[Any, ...]:
+        spec = self.function(name)
+        return _checksum(spec.output_types, decode(spec.output_types, bytes(data)))
+
+    def decode_log(self, log: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Decode a log emitted by this contract
+
+        Returns:
+            {"event", "address", "args"}, or None if the log is not one of its events
+        """
+        topics = [bytes(topic) for topic in log["topics"]]
+        spec = self.events_by_topic.get(topics[0]) if topics else None
+        if spec is None or len(topics) != len(spec.indexed) + 1:
+            return None
+        args = {}
+        for (name, type_), topic in zip(spec.indexed, topics[1:]):
+            if type_ in ("string", "bytes") or type_.endswith("]") or type_.startswith("("):
+                args[name] = topic  # dynamic values are only present as their hash
+            else:
+                args[name] = _checksum((type_,), decode([type_], topic))[0]
+        data_types = tuple(type_ for _, type_ in spec.data)
+        values = _checksum(data_types, decode(data_types, bytes(log["data"])))
+        args.update(zip((name for name, _ in spec.data), values))
+        return {"event": spec.name, "address": log["address"], "args": args}
+
+
+class AbiRegistry:
+    """
+    ABIs under utils/abis, each read and parsed on first use.
+
+    Contract objects are cached per Web3 instance and (ABI, address), so
+    clients sharing a Web3 share their contract objects too.
+
+    Example:
+        registry = get_abi_registry()
+        contract = registry.contract(web3, "metamorpho", vault_address)
+    """
+
+    def __init__(self, directory: str = ABI_DIR):
+        self.directory = directory
+        self._abis: Dict[str, ContractAbi] = {}
+        self._contracts: "weakref.WeakKeyDictionary[Web3, Dict[Tuple[str, str], Any]]" = weakref.WeakKeyDictionary()
+        # Lookups also happen on worker threads (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ContractAbi:
+        """Parsed ABI of utils/abis/<name>.json"""
+        parsed = self._abis.get(name)
+        if parsed is None:
+            with self._lock:
+                parsed = self._abis.get(name)
+                if parsed is None:
+                    with open(os.path.join(self.directory, f"{name}.json"), "r") as file:
+                        parsed = self._abis[name] = ContractAbi(name, json.load(file))
+                    logger.debug(f"Loaded ABI {name}")
+        return parsed
+
+    def abi(self, name: str) -> List[Dict[str, Any]]:
+        return self.get(name).abi
+
+    def contract(self, web3: Web3, name: str, address: str):
+        """web3 contract object for `name` at `address`, built once per Web3"""
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            contracts = self._contracts.setdefault(web3, {})
+            contract = contracts.get((name, address))
+        if contract is None:
+            contract = web3.eth.contract(address=address, abi=self.abi(name))
+            with self._lock:
+                contract = contracts.setdefault((name, address), contract)
+        return contract
+
+
+_registry: Optional[AbiRegistry] = None
+
+
+def get_abi_registry() -> AbiRegistry:
+    """Registry shared by every contract client"""
+    global _registry
+    if _registry is None:
+        _registry = AbiRegistry()
+    return _registry
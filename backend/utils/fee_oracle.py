@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+
+class SpeedTier(NamedTuple):
+    percentile: int  # priority fee percentile paid in recent blocks
+    base_fee_multiplier: float  # headroom over the next block's base fee
+
+
+SPEED_TIERS = {
+    "slow": SpeedTier(10, 1.25),  # survives ~2 full blocks of base fee growth
+    "standard": SpeedTier(50, 2.0),
+    "fast": SpeedTier(90, 2.0),
+}
+
+
+class FeeOracle:
+    """
+    EIP-1559 fee suggestions from a cached eth_feeHistory.
+
+    Fee history is fetched at most once per block: within `ttl` seconds the
+    cached copy is used outright, after that only the block number is read
+    and the history is refetched if the head moved. Gas limits are estimated
+    once per call shape (e.g. "deployVault") and memoized with a margin.
+
+    Example:
+        oracle = FeeOracle(web3)
+        fees = await oracle.fees("fast")  # maxFeePerGas / maxPriorityFeePerGas
+        gas = await oracle.gas_limit(tx, shape="deployVault")
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        history_blocks: int = 20,
+        ttl: float = 2.0,
+        gas_margin: float = 1.2,
+        min_priority_fee: int = Web3.to_wei(0.001, "gwei")
+    ):
+        """
+        Args:
+            web3: Web3 instance of the target chain
+            history_blocks: Blocks of fee history to sample
+            ttl: Seconds cached fees are used without checking the head (~block time)
+            gas_margin: Multiplier on estimated gas
+            min_priority_fee: Floor for the suggested tip (wei)
+        """
+        self.web3 = web3
+        self.history_blocks = history_blocks
+        self.ttl = ttl
+        self.gas_margin = gas_margin
+        self.min_priority_fee = min_priority_fee
+        self._percentiles = sorted({tier.percentile for tier in SPEED_TIERS.values()})
+        self._head: Optional[int] = None
+        self._checked_at = 0.0
+        self._suggestions: Dict[str, Dict[str, int]] = {}
+        self._gas: Dict[Hashable, int] = {}
+        self._estimating: Dict[Hashable, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self._stats = {"history_fetches": 0, "history_hits": 0, "gas_estimates": 0, "gas_hits": 0}
+
+    async def fees(self, speed: str = "standard") -> Dict[str, int]:
+        """
+        Fee fields for a transaction at the given speed
+
+        Returns:
+            {"maxFeePerGas", "maxPriorityFeePerGas"}, or {"gasPrice"} on
+            chains without a base fee
+        """
+        if speed not in SPEED_TIERS:
+            raise ValueError(f"Unknown speed tier: {speed}")
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= self.ttl or not self._suggestions:
+                head = await asyncio.to_thread(self.web3.eth.get_block_number)
+                if head != self._head or not self._suggestions:
+                    self._suggestions = await self._suggest(head)
+                    self._head = head
+                    self._stats["history_fetches"] += 1
+                else:
+                    self._stats["history_hits"] += 1
+                self._checked_at = time.monotonic()
+            else:
+                self._stats["history_hits"] += 1
+            return dict(self._suggestions[speed])
+
+    async def _suggest(self, head: int) -> Dict[str, Dict[str, int]]:
+        history = await asyncio.to_thread(
+            self.web3.eth.fee_history, self.history_blocks, head, self._percentiles
+        )
+        base_fees = history.get("baseFeePerGas") or []
+        if not base_fees or not base_fees[-1]:
+            gas_price = await asyncio.to_thread(lambda: self.web3.eth.gas_price)
+            return {speed: {"gasPrice": gas_price} for speed in SPEED_TIERS}
+
+        # The last entry is the base fee of the block after `head`
+        next_base_fee = base_fees[-1]
+        rewards = [row for row in history.get("reward") or [] if row]
+        fallback_tip = None
+        if not rewards:
+            fallback_tip = await asyncio.to_thread(lambda: self.web3.eth.max_priority_fee)
+
+        suggestions = {}
+        for speed, tier in SPEED_TIERS.items():
+            if rewards:
+                column = self._percentiles.index(tier.percentile)
+                tip = int(statistics.median(row[column] for row in rewards))
+            else:
+                tip = fallback_tip
+            tip = max(tip, self.min_priority_fee)
+            suggestions[speed] = {
+                "maxFeePerGas": int(next_base_fee * tier.base_fee_multiplier) + tip,
+                "maxPriorityFeePerGas": tip
+            }
+        return suggestions
+
+    async def gas_limit(self, tx: Dict[str, Any], shape: Optional[Hashable] = None) -> int:
+        """
+        Gas limit for `tx`, estimated once per shape
+
+        Args:
+            tx: Transaction to estimate ("from", "to", "data", "value")
+            shape: Key for calls that cost the same; defaults to the target
+                and function selector
+        """
+        if shape is None:
+            data = tx.get("data") or "0x"
+            shape = (tx.get("to"), (data if isinstance(data, str) else Web3.to_hex(data))[:10])
+        gas = self._gas.get(shape)
+        if gas is not None:
+            self._stats["gas_hits"] += 1
+            return gas
+
+        # Concurrent first calls for a shape share one estimate
+        pending = self._estimating.get(shape)
+        if pending is not None:
+            self._stats["gas_hits"] += 1
+            return await asyncio.shield(pending)
+        pending = self._estimating[shape] = asyncio.get_running_loop().create_future()
+        try:
+            estimate = await asyncio.to_thread(self.web3.eth.estimate_gas, tx)
+            self._stats["gas_estimates"] += 1
+            gas = self._gas[shape] = int(estimate * self.gas_margin)
+            pending.set_result(gas)
+            return gas
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            # Retrieved here so an estimate nobody else awaited is not reported
+            pending.exception()
+            raise
+        finally:
+            del self._estimating[shape]
+
+    def forget_gas(self, shape: Hashable) -> None:
+        """Drop a memoized estimate, e.g. after a transaction ran out of gas"""
+        self._gas.pop(shape, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "head": self._head, "shapes": len(self._gas)}
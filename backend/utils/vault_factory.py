@@ -1,45 +1,308 @@
-import os
-import json
+import asyncio
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 from web3 import Web3
+from utils.abi_registry import get_abi_registry
+from utils.fee_oracle import FeeOracle
 
-def load_abi(file_path: str):
-    """Load the ABI JSON file from the given file path."""
-    with open(file_path, "r") as file:
-        return json.load(file)
+logger = logging.getLogger(__name__)
+
+
+def __getattr__(name: str):
+    # Read from utils/abis/vault_factory.json on first use
+    if name == "VAULT_FACTORY_ABI":
+        return get_abi_registry().abi("vault_factory")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+DEPLOY_SHAPE = "deployVault"  # every deployment costs the same gas
+DETERMINISTIC_DEPLOY_SHAPE = "deployVaultDeterministic"
+
+
+def vault_salt(vault_id: str) -> bytes:
+    """CREATE2 salt of a vault record: one counterfactual address per vault"""
+    return bytes(Web3.keccak(text=vault_id))
+
+
+class NonceManager:
+    """
+    Local nonce allocator for one sending account.
+
+    Syncs with the chain's pending transaction count on first use and then
+    hands out nonces locally, so concurrent senders never read the same count.
+    A nonce whose transaction was never broadcast is released and handed out
+    again before any new one (gap recovery). resync() starts over from the
+    chain, e.g. after a "nonce too low" error.
+    """
+
+    def __init__(self, web3: Web3, address: str):
+        self.web3 = web3
+        self.address = address
+        self._next: Optional[int] = None
+        self._released: List[int] = []
+        self._lock = asyncio.Lock()
+
+    async def allocate(self) -> int:
+        async with self._lock:
+            if self._released:
+                return heapq.heappop(self._released)
+            if self._next is None:
+                self._next = await asyncio.to_thread(
+                    self.web3.eth.get_transaction_count, self.address, "pending"
+                )
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int) -> None:
+        """Give back a nonce whose transaction was not sent"""
+        if self._next is not None and nonce == self._next - 1:
+            self._next = nonce
+        elif nonce not in self._released:
+            heapq.heappush(self._released, nonce)
+
+    async def resync(self) -> None:
+        async with self._lock:
+            self._next = await asyncio.to_thread(
+                self.web3.eth.get_transaction_count, self.address, "pending"
+            )
+            self._released = []
+            logger.info(f"Nonce for {self.address} resynced to {self._next}")
+
+
+class ReceiptPoller:
+    """
+    One polling loop for every transaction waiting on a receipt.
+
+    Instead of one wait_for_transaction_receipt per transaction, the poller
+    reads each new block once and resolves the futures of all pending
+    transactions it contains. The loop runs only while something is waiting.
+    """
+
+    def __init__(self, web3: Web3, poll_interval: float = 1.0):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._next_block: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.blocks_scanned = 0
+
+    async def watch(self, tx_hash: bytes) -> asyncio.Future:
+        """
+        Future for the receipt of `tx_hash`
+
+        Await this before broadcasting: it fixes the first block to scan (the
+        one after the current head), so the transaction's block is not skipped.
+        """
+        tx_hash = bytes(tx_hash)
+        future = self._pending.get(tx_hash)
+        if future is None:
+            future = self._pending[tx_hash] = asyncio.get_running_loop().create_future()
+        if self._next_block is None:
+            number = await asyncio.to_thread(self.web3.eth.get_block_number)
+            if self._next_block is None:
+                # Mined before anything we broadcast next
+                self._next_block = number + 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    def forget(self, tx_hash: bytes) -> None:
+        future = self._pending.pop(bytes(tx_hash), None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    async def wait(self, tx_hash: bytes, future: asyncio.Future, timeout: Optional[float] = None) -> Any:
+        """Wait for a future returned by watch(); stops watching on timeout"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.forget(tx_hash)
+            raise TimeoutError(f"No receipt for {Web3.to_hex(tx_hash)} after {timeout}s") from None
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                latest = await asyncio.to_thread(self.web3.eth.get_block_number)
+                while self._next_block <= latest and self._pending:
+                    await self._scan(self._next_block)
+                    self._next_block += 1
+                if self._pending:
+                    await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.error(f"Receipt poller error: {str(e)}")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            self._pending.clear()
+        finally:
+            if not self._pending:
+                # Idle: the next watch() starts from the then-current block
+                self._next_block = None
+
+    async def _scan(self, number: int) -> None:
+        block = await asyncio.to_thread(self.web3.eth.get_block, number)
+        self.blocks_scanned += 1
+        for tx_hash in block["transactions"]:
+            future = self._pending.pop(bytes(tx_hash), None)
+            if future is None or future.done():
+                continue
+            receipt = await asyncio.to_thread(self.web3.eth.get_transaction_receipt, tx_hash)
+            future.set_result(receipt)
 
-# Determine the current directory and the path to the ABI file.
-current_dir = os.path.dirname(os.path.abspath(__file__))
-abi_file_path = os.path.join(current_dir, "vault_factory_abi.json")
-VAULT_FACTORY_ABI = load_abi(abi_file_path)
 
 class VaultFactoryClient:
-    def __init__(self, rpc_url, factory_address, deployer_private_key):
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+    """
+    Deploys vaults through the VaultFactory contract.
+
+    Calldata is encoded and receipts decoded with the shared ABI registry's
+    precomputed selectors and topics. Deployments are pipelined: nonces come from a local NonceManager and
+    transactions are signed and sent back to back, then all wait on one
+    ReceiptPoller. A burst of N deployments is mined in about one block
+    instead of N sequential send-and-wait round trips.
+    """
+
+    def __init__(
+        self,
+        rpc_url,
+        factory_address,
+        deployer_private_key,
+        web3=None,
+        poll_interval: float = 1.0,
+        fee_oracle: Optional[FeeOracle] = None,
+        speed: str = "standard"
+    ):
+        # Pass a shared Web3 instance (and fee oracle) to reuse its HTTP session
+        self.web3 = web3 or Web3(Web3.HTTPProvider(rpc_url))
         self.factory_address = Web3.to_checksum_address(factory_address)
-        self.deployer_private_key = deployer_private_key
         self.account = self.web3.eth.account.from_key(deployer_private_key)
-        self.factory_contract = self.web3.eth.contract(
-            address=self.factory_address,
-            abi=VAULT_FACTORY_ABI
-        )
+        registry = get_abi_registry()
+        self.abi = registry.get("vault_factory")
+        self.factory_contract = registry.contract(self.web3, "vault_factory", self.factory_address)
+        self.nonces = NonceManager(self.web3, self.account.address)
+        self.receipts = ReceiptPoller(self.web3, poll_interval=poll_interval)
+        self.fee_oracle = fee_oracle if fee_oracle is not None else FeeOracle(self.web3)
+        self.speed = speed
+        self._send_lock = asyncio.Lock()
+        self._chain_id: Optional[int] = None
+
+    async def deploy_vault(
+        self,
+        agent_address: str,
+        user_address: str,
+        timeout: Optional[float] = 300,
+        speed: Optional[str] = None,
+        salt: Optional[bytes] = None
+    ) -> str:
+        """
+        Deploy a vault and return its address
+
+        Args:
+            agent_address: Agent wallet allowed to operate the vault
+            user_address: Owner of the vault
+            timeout: Seconds to wait for the receipt
+            speed: Fee tier ("slow", "standard", "fast"); defaults to the client's
+            salt: Deploy with CREATE2 at compute_vault_address(agent, user, salt)
+        """
+        tx_hash, receipt = await self.submit_deploy(agent_address, user_address, speed, salt)
+        receipt = await self.receipts.wait(tx_hash, receipt, timeout)
+        if receipt["status"] != 1:
+            # Possibly out of gas: estimate again next time
+            self.fee_oracle.forget_gas(DEPLOY_SHAPE if salt is None else DETERMINISTIC_DEPLOY_SHAPE)
+        return self.vault_address(receipt)
 
-    def deploy_vault(self, agent_address, user_address):
+    async def deploy_vaults(self, pairs: List[Tuple[str, str]], timeout: Optional[float] = 300) -> List[str]:
+        """Deploy a vault per (agent_address, user_address) pair concurrently"""
+        return await asyncio.gather(*[self.deploy_vault(agent, user, timeout) for agent, user in pairs])
+
+    async def submit_deploy(
+        self,
+        agent_address: str,
+        user_address: str,
+        speed: Optional[str] = None,
+        salt: Optional[bytes] = None
+    ) -> Tuple[bytes, asyncio.Future]:
+        """
+        Sign and broadcast a deployVault (or, with a salt, deployVaultDeterministic) transaction
+
+        Returns:
+            The transaction hash and a future for its receipt
+        """
         agent = Web3.to_checksum_address(agent_address)
         user = Web3.to_checksum_address(user_address)
-        txn = self.factory_contract.functions.deployVault(agent, user).buildTransaction({
-            'from': self.account.address,
-            'nonce': self.web3.eth.get_transaction_count(self.account.address),
-            'gas': 3000000,
-            'gasPrice': self.web3.toWei('20', 'gwei')
-        })
-        signed_txn = self.web3.eth.account.sign_transaction(txn, private_key=self.deployer_private_key)
-        txn_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.web3.eth.wait_for_transaction_receipt(txn_hash)
-        if receipt.status != 1:
+        if self._chain_id is None:
+            self._chain_id = await asyncio.to_thread(lambda: self.web3.eth.chain_id)
+        if salt is None:
+            function, shape, args = "deployVault", DEPLOY_SHAPE, (agent, user)
+        else:
+            function, shape, args = "deployVaultDeterministic", DETERMINISTIC_DEPLOY_SHAPE, (agent, user, salt)
+        data = Web3.to_hex(self.abi.encode(function, *args))
+        gas = await self.fee_oracle.gas_limit(
+            {"from": self.account.address, "to": self.factory_address, "data": data},
+            shape=shape
+        )
+        fees = await self.fee_oracle.fees(speed or self.speed)
+        params = {
+            "from": self.account.address,
+            "to": self.factory_address,
+            "data": data,
+            "value": 0,
+            "gas": gas,
+            "chainId": self._chain_id,
+            **fees
+        }
+
+        # Sends are serialized so nonces reach the node in order; only the
+        # receipt waits overlap
+        async with self._send_lock:
+            try:
+                return await self._send(function, params)
+            except Exception as e:
+                if "nonce" not in str(e).lower():
+                    raise
+                logger.warning(f"Nonce rejected ({str(e)}), resyncing and retrying")
+                await self.nonces.resync()
+                return await self._send(function, params)
+
+    async def _send(self, function: str, params: Dict[str, Any]) -> Tuple[bytes, asyncio.Future]:
+        nonce = await self.nonces.allocate()
+        try:
+            signed_txn = self.account.sign_transaction({**params, "nonce": nonce})
+            receipt = await self.receipts.watch(signed_txn.hash)
+            try:
+                await asyncio.to_thread(self.web3.eth.send_raw_transaction, signed_txn.raw_transaction)
+            except Exception:
+                self.receipts.forget(signed_txn.hash)
+                raise
+        except Exception:
+            self.nonces.release(nonce)
+            raise
+        logger.info(f"{function} sent with nonce {nonce}: {Web3.to_hex(signed_txn.hash)}")
+        return bytes(signed_txn.hash), receipt
+
+    async def compute_vault_address(self, agent_address: str, user_address: str, salt: bytes) -> str:
+        """Address deployVaultDeterministic will deploy to (one eth_call, no transaction)"""
+        data = self.abi.encode(
+            "computeVaultAddress",
+            Web3.to_checksum_address(agent_address),
+            Web3.to_checksum_address(user_address),
+            salt
+        )
+        result = await asyncio.to_thread(self.web3.eth.call, {"to": self.factory_address, "data": Web3.to_hex(data)})
+        return self.abi.decode_output("computeVaultAddress", result)[0]
+
+    async def is_deployed(self, address: str) -> bool:
+        code = await asyncio.to_thread(self.web3.eth.get_code, Web3.to_checksum_address(address))
+        return len(code) > 0
+
+    def vault_address(self, receipt) -> str:
+        """Vault address from a deployVault receipt"""
+        if receipt["status"] != 1:
             raise Exception("Vault deployment transaction failed")
-        # Process the event to obtain the new vault address.
-        events = self.factory_contract.events.VaultDeployed().processReceipt(receipt)
-        if not events:
-            raise Exception("VaultDeployed event not found")
-        vault_address = events[0]['args']['vaultAddress']
-        return vault_address 
\ No newline at end of file
+        for log in receipt["logs"]:
+            if Web3.to_checksum_address(log["address"]) != self.factory_address:
+                continue
+            event = self.abi.decode_log(log)
+            if event is not None and event["event"] == "VaultDeployed":
+                return event["args"]["vaultAddress"]
+        raise Exception("VaultDeployed event not found")
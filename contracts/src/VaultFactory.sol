@@ -11,4 +11,18 @@ contract VaultFactory {
         emit VaultDeployed(address(vault), agent, user);
         return address(vault);
     }
+
+    // CREATE2: the address is known (computeVaultAddress) before deployment,
+    // so deposits can be taken first and the vault deployed afterwards.
+    // Anyone may deploy; the address commits to agent and user.
+    function deployVaultDeterministic(address agent, address user, bytes32 salt) external returns (address) {
+        Vault vault = new Vault{salt: salt}(agent, user);
+        emit VaultDeployed(address(vault), agent, user);
+        return address(vault);
+    }
+
+    function computeVaultAddress(address agent, address user, bytes32 salt) external view returns (address) {
+        bytes32 initCodeHash = keccak256(abi.encodePacked(type(Vault).creationCode, abi.encode(agent, user)));
+        return address(uint160(uint256(keccak256(abi.encodePacked(bytes1(0xff), address(this), salt, initCodeHash)))));
+    }
 } 
\ No newline at end of file